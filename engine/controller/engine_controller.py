@@ -1,10 +1,17 @@
 from functools import partial
+from typing import Optional
 from module.config_module import ConfigLoader
 from utils.status import StatusCode
-from utils.return_type import ReturnList, ReturnDict, ReturnStatus
+from utils.return_type import ReturnList, ReturnDict, ReturnStatus, encode_reply
 from utils.exception_handler import exception_handler
-from .project_controller import Task
-from kernel.frame import FrameModel, frame_to_model, make_frame, make_empty_frame
+from kernel.frame import (
+    FrameModel,
+    frame_to_dict,
+    frame_to_model,
+    make_empty_frame,
+)
+from kernel.operation import FrameOperationModel
+from .project_controller import Task, task_reader, task_writer
 
 engine_controller_exception_handler = partial(
     exception_handler, module_name="Engine Controller", debug=True
@@ -26,32 +33,53 @@ class EngineController:
         self.__engine_config: dict = config_loader.engine()
 
     @engine_controller_exception_handler
-    def get_frame_ids(self, task: Task, chapter_name: str) -> ReturnList:
+    @task_reader
+    def get_frame_ids(
+        self,
+        task: Task,
+        chapter_name: str,
+        offset: int = 0,
+        limit: Optional[int] = None,
+        after_fid: Optional[int] = None,
+    ) -> ReturnList:
         """
-        get all frame ids
+        get the frame ids of chapter, all by default or a window of them
 
         @param chapter_name:
         @param task:
+        @param offset: skip the first frames of the window
+        @param limit: max amount of frames, None for all
+        @param after_fid: cursor, the window starts after this frame
         @return: list of ordered frame id
 
         """
         engine = task.project_engine
-        fids = engine.get_chapter(chapter_name).get_all_fid()
+        fids = engine.get_chapter_fids(chapter_name, offset, limit, after_fid)
         return ReturnList(status=StatusCode.OK, content=fids)
 
     @engine_controller_exception_handler
-    def get_frame_names(self, task: Task, chapter_name: str):
+    @task_reader
+    def get_frame_names(
+        self,
+        task: Task,
+        chapter_name: str,
+        offset: int = 0,
+        limit: Optional[int] = None,
+        after_fid: Optional[int] = None,
+    ):
         """
-        get all frame names
+        get the frame names of chapter, all by default or a window of them
 
         @param chapter_name:
         @param task: cur task
+        @param offset: skip the first frames of the window
+        @param limit: max amount of frames, None for all
+        @param after_fid: cursor, the window starts after this frame
         @return: list of ordered frame names
 
         """
         engine = task.project_engine
-        fids = engine.get_chapter(chapter_name).get_all_fid()
-        names = [engine.get_frame_name(i) for i in fids]
+        names = engine.get_chapter_frame_names(chapter_name, offset, limit, after_fid)
         return ReturnList(status=StatusCode.OK, content=names)
 
     @engine_controller_exception_handler
@@ -66,6 +94,7 @@ class EngineController:
         return ReturnDict(status=StatusCode.OK, content=engine.get_engine_meta())
 
     @engine_controller_exception_handler
+    @task_writer
     def append_frame(self, task: Task, to_chapter: str, frame_name: str) -> ReturnList:
         """
         append an empty frame according to chapter
@@ -85,6 +114,7 @@ class EngineController:
         )
 
     @engine_controller_exception_handler
+    @task_writer
     def modify_frame(
         self, task: Task, fid: int, frame_component_raw: FrameModel
     ) -> ReturnStatus:
@@ -98,13 +128,60 @@ class EngineController:
 
         """
         engine = task.project_engine
-        frame_component = frame_component_raw.to_frame().__dict__
-        frame = make_frame(**frame_component)
+        frame = frame_component_raw.to_frame()
         engine.change_frame(fid, frame)
         engine.commit()
         return ReturnStatus(status=StatusCode.OK)
 
     @engine_controller_exception_handler
+    @task_writer
+    def apply_batch(
+        self, task: Task, operations: list[FrameOperationModel], force: bool = False
+    ) -> ReturnList:
+        """
+        apply a list of frame operations as a unit and commit once
+
+        @param task: current task
+        @param operations: operations to be applied by order
+        @param force: force push mode, ignore checking frame valid
+        @return: fid corresponding to each operation
+
+        """
+        engine = task.project_engine
+        fids = engine.apply_batch([i.to_operation() for i in operations], force=force)
+        engine.commit()
+        return ReturnList(
+            status=StatusCode.OK,
+            msg=f"successfully apply {len(fids)} operations",
+            content=fids,
+        )
+
+    @engine_controller_exception_handler
+    @task_writer
+    def move_frame(
+        self, task: Task, fid: int, after_fid: int, to_chapter: str = None
+    ) -> ReturnList:
+        """
+        move the frame after another frame, the frame keeps its fid
+
+        @param task: current task
+        @param fid: the frame to be moved
+        @param after_fid: move after this frame, -1 for the head of to_chapter
+        @param to_chapter: move into this chapter, required if after_fid is -1
+        @return: the moved fid
+
+        """
+        engine = task.project_engine
+        engine.move_frame(fid, after_fid, to_chapter)
+        engine.commit()
+        return ReturnList(
+            status=StatusCode.OK,
+            msg=f"successfully move frame with id '{fid}'",
+            content=[fid],
+        )
+
+    @engine_controller_exception_handler
+    @task_reader
     def get_frame(self, task: Task, fid: int) -> ReturnDict:
         """
         get the frame information
@@ -121,6 +198,63 @@ class EngineController:
         return ReturnDict(content=frame_model.__dict__)
 
     @engine_controller_exception_handler
+    @task_reader
+    def get_frame_json(self, task: Task, fid: int) -> bytes:
+        """
+        get the frame information, same as `get_frame` but the reply is
+        encoded as json from the cache of engine
+
+        @return: json of reply
+
+        """
+        engine = task.project_engine
+        if not engine.check_frame_exist(fid):
+            reply = ReturnDict(status=StatusCode.FAIL, msg=f"No such frame id '{fid}'")
+            return reply.json().encode()
+
+        return encode_reply(engine.get_frame_json(fid))
+
+    @engine_controller_exception_handler
+    @task_reader
+    def get_frames(
+        self,
+        task: Task,
+        fids: Optional[list[int]] = None,
+        chapter_name: Optional[str] = None,
+        offset: int = 0,
+        limit: Optional[int] = None,
+    ) -> ReturnDict:
+        """
+        get the information of many frames at once, either by the given
+        frame ids or by a window of frames in the chapter
+
+        @param task: current task
+        @param fids: frame ids to fetch
+        @param chapter_name: fetch frames of the chapter if fids not given
+        @param offset: skip the first frames of the chapter
+        @param limit: max amount of frames of the chapter, None for all
+        @return: content of frames by frame id, and the frame ids not found
+
+        """
+        engine = task.project_engine
+        if fids is None:
+            if chapter_name is None:
+                return ReturnDict(
+                    status=StatusCode.FAIL, msg="either fids or chapter is required"
+                )
+            fids = engine.get_chapter_fids(chapter_name, offset, limit)
+
+        frames = {}
+        missing = []
+        for fid in fids:
+            if engine.check_frame_exist(fid):
+                frames[fid] = frame_to_dict(engine.get_frame(fid))
+            else:
+                missing.append(fid)
+        return ReturnDict(content={"frames": frames, "missing": missing})
+
+    @engine_controller_exception_handler
+    @task_writer
     def remove_frame(self, task: Task, fid: int) -> ReturnList:
         """
         remove the frame with given fid
@@ -140,6 +274,25 @@ class EngineController:
         )
 
     @engine_controller_exception_handler
+    @task_reader
+    def validate(self, task: Task) -> ReturnDict:
+        """
+        check all frames in the project
+
+        @param task: current task
+        @return: report contain {fid: error message} of invalid frames
+
+        """
+        engine = task.project_engine
+        report = engine.validate_all()
+        return ReturnDict(
+            status=StatusCode.OK,
+            msg=f"{report['invalid']} of {report['total']} frames invalid",
+            content=report,
+        )
+
+    @engine_controller_exception_handler
+    @task_reader
     def get_metadata(self, task: Task) -> ReturnDict:
         """
         get game content metadata buffer
@@ -153,20 +306,32 @@ class EngineController:
         return ReturnDict(status=StatusCode.OK, content=meta_buffer)
 
     @engine_controller_exception_handler
-    def render_struct(self, task: Task, chapter_name: str = None) -> ReturnDict:
+    @task_reader
+    def render_struct(
+        self,
+        task: Task,
+        chapter_name: str = None,
+        offset: int = 0,
+        limit: Optional[int] = None,
+    ) -> ReturnDict:
         """
         Render and return the project struct
 
         @param chapter_name: filter by specific chapter
         @param task: current task
+        @param offset: skip the first frames of each chapter
+        @param limit: max amount of frames of each chapter, None for all
         @return: struct
 
         """
         engine = task.project_engine
-        struct = engine.render_struct(by_chapter=chapter_name)
+        struct = engine.render_struct(
+            by_chapter=chapter_name, offset=offset, limit=limit
+        )
         return ReturnDict(status=StatusCode.OK, content=struct)
 
     @engine_controller_exception_handler
+    @task_reader
     def get_chapters(self, task: Task) -> ReturnList:
         """
         get all chapters
@@ -179,6 +344,7 @@ class EngineController:
         return ReturnList(status=StatusCode.OK, content=engine.get_all_chapter())
 
     @engine_controller_exception_handler
+    @task_writer
     def add_chapter(self, task: Task, chapter_name: str) -> ReturnStatus:
         """
         add a chapter according to the chapter name given
@@ -194,6 +360,7 @@ class EngineController:
         return ReturnStatus(status=StatusCode.OK, msg="chapter added")
 
     @engine_controller_exception_handler
+    @task_writer
     def remove_chapter(self, task: Task, chapter_name: str) -> ReturnStatus:
         """
         remove the whole chapter include the frames under it
@@ -0,0 +1,224 @@
+import base64
+import binascii
+import json
+
+from functools import partial
+from typing import Iterator, Optional
+from fastapi import UploadFile
+from pydantic import ValidationError
+
+from module.gamesave_module import SaveModel
+from utils.exception import ControllerException
+from utils.exception_handler import exception_handler
+from utils.status import StatusCode
+
+from utils.return_type import ReturnList, ReturnDict
+
+from .project_controller import Task, task_reader
+
+gamesave_controller_exception_handler = partial(
+    exception_handler, module_name="GameSave Controller", debug=False
+)
+
+
+def _encode_state(state: Optional[bytes]) -> Optional[str]:
+    """
+    encode the state of save by base64
+
+    @param state: state of save
+    @return: encoded state
+    """
+    if state is None:
+        return None
+    return base64.b64encode(state).decode("ascii")
+
+
+def _decode_state(state: Optional[str]) -> Optional[bytes]:
+    """
+    decode the state of save encoded by base64
+
+    @param state: encoded state
+    @return: state of save
+    """
+    if state is None:
+        return None
+    try:
+        return base64.b64decode(state, validate=True)
+    except binascii.Error as e:
+        raise ControllerException(f"invalid state: {str(e)}") from e
+
+
+class GameSaveController:
+    """
+    class for router service, the game save is thread safe by its own
+    connection pool, so even the methods changing saves only hold the read
+    lock of task, which keeps the project from being removed in the middle
+    without waiting for the editing of the project
+
+    """
+
+    @gamesave_controller_exception_handler
+    @task_reader
+    def save(
+        self,
+        task: Task,
+        user: str,
+        slot: str,
+        frame: int,
+        state: Optional[str] = None,
+    ) -> ReturnDict:
+        """
+        save the progress of user into slot
+
+        @param task: current task information
+        @param user: user id
+        @param slot: slot name
+        @param frame: current progress, measured by frame number
+        @param state: state of game encoded by base64
+        @return: time of save
+
+        """
+        save_time = task.project_gamesave.save(user, slot, frame, _decode_state(state))
+        return ReturnDict(status=StatusCode.OK, content={"time": save_time})
+
+    @gamesave_controller_exception_handler
+    @task_reader
+    def get_saves(
+        self,
+        task: Task,
+        user: str,
+        slot: str,
+        amount: int = 20,
+        before: Optional[float] = None,
+    ) -> ReturnList:
+        """
+        get a page of the latest saves of user in slot
+
+        @param task: current task information
+        @param user: user id
+        @param slot: slot name
+        @param amount: max amount of saves in page
+        @param before: time of the last save of previous page
+        @return: list of save, latest first
+
+        """
+        if amount <= 0:
+            raise ControllerException(f"invalid amount {amount}")
+        saves = task.project_gamesave.get_saves(user, slot, amount, before)
+        for i in saves:
+            i["state"] = _encode_state(i["state"])
+        return ReturnList(status=StatusCode.OK, content=saves)
+
+    @gamesave_controller_exception_handler
+    @task_reader
+    def get_slots(self, task: Task, user: str) -> ReturnList:
+        """
+        get the slots of user
+
+        @param task: current task information
+        @param user: user id
+        @return: list of slot name
+
+        """
+        return ReturnList(
+            status=StatusCode.OK, content=task.project_gamesave.get_slots(user)
+        )
+
+    @gamesave_controller_exception_handler
+    @task_reader
+    def remove_save(
+        self, task: Task, user: str, slot: str, save_time: float
+    ) -> ReturnDict:
+        """
+        remove a save of user
+
+        @param task: current task information
+        @param user: user id
+        @param slot: slot name
+        @param save_time: time of save
+        @return: status code
+
+        """
+        if not task.project_gamesave.remove_save(user, slot, save_time):
+            return ReturnDict(status=StatusCode.FAIL, msg="no such save")
+        return ReturnDict(status=StatusCode.OK)
+
+    @gamesave_controller_exception_handler
+    @task_reader
+    def prune(
+        self,
+        task: Task,
+        user: str,
+        keep: Optional[int] = None,
+        before: Optional[float] = None,
+        slot: Optional[str] = None,
+    ) -> ReturnDict:
+        """
+        remove the old saves of user
+
+        @param task: current task information
+        @param user: user id
+        @param keep: keep the latest saves of each slot
+        @param before: remove the saves older than this time
+        @param slot: only prune this slot
+        @return: amount of saves removed
+
+        """
+        if keep is None and before is None:
+            raise ControllerException("either keep or before should be given")
+        if keep is not None and keep < 0:
+            raise ControllerException(f"invalid keep {keep}")
+        removed = task.project_gamesave.prune(user, keep, before, slot)
+        return ReturnDict(status=StatusCode.OK, content={"removed": removed})
+
+    def export_saves(self, task: Task, user: Optional[str] = None) -> Iterator[bytes]:
+        """
+        export the saves as json lines, the saves are read page by page
+        under the read lock, so the export does not block the task
+
+        @param task: current task information
+        @param user: user id, None for all users
+        @return: iterator of json line of save
+
+        """
+        saves = task.project_gamesave.export_saves(user)
+        while True:
+            with task.lock.read():
+                save = next(saves, None)
+            if save is None:
+                return
+            save["state"] = _encode_state(save["state"])
+            yield json.dumps(save).encode("utf-8") + b"\n"
+
+    @gamesave_controller_exception_handler
+    @task_reader
+    def import_saves(self, task: Task, file: UploadFile) -> ReturnDict:
+        """
+        import the saves exported before, one json save per line
+
+        @param task: current task information
+        @param file: file of json lines
+        @return: amount of saves imported
+
+        """
+
+        def parse() -> Iterator[dict]:
+            for line_no, line in enumerate(file.file, start=1):
+                if line.strip() == b"":
+                    continue
+                try:
+                    save = SaveModel.parse_raw(line)
+                except ValidationError as e:
+                    raise ControllerException(f"invalid save at line {line_no}") from e
+                if save.time is None:
+                    raise ControllerException(f"missing time at line {line_no}")
+                yield {
+                    "user": save.user,
+                    "slot": save.slot,
+                    "time": save.time,
+                    "frame": save.frame,
+                    "state": _decode_state(save.state),
+                }
+
+        imported = task.project_gamesave.import_saves(parse())
+        return ReturnDict(status=StatusCode.OK, content={"imported": imported})
@@ -1,18 +1,23 @@
+import os
 import time
 import secrets
+import threading
 
-from functools import partial
+from functools import partial, wraps
 
-from module.project_module import ProjectManager
+from module.project_module import ProjectManager, load_manifest
+from module.blob_module import BlobStore
 from module.gamesave_module import GameSave
+from module.thumbnail_module import ThumbnailCache
 from module.config_module import ConfigLoader
 from utils.exception import ControllerException
 from utils.exception_handler import exception_handler
 from utils.status import StatusCode
 from utils.file_utils import get_folders_in_folder, check_folder_valid
+from utils.rw_lock import ReadWriteLock
+from utils.return_type import ReturnList, ReturnDict
 
 from kernel.engine import Engine
-from utils.return_type import ReturnList, ReturnDict
 
 project_controller_exception_handler = partial(
     exception_handler, module_name="Project Controller", debug=False
@@ -30,14 +35,67 @@ class Task:
         project_manager: ProjectManager,
         project_engine: Engine,
         project_gamesave: GameSave,
+        project_thumbnail: ThumbnailCache,
         base_dir: str,
     ):
         self.project_name: str = project_manager.get_project_name()
         self.project_manager: ProjectManager = project_manager
         self.project_engine: Engine = project_engine
         self.project_gamesave: GameSave = project_gamesave
+        self.project_thumbnail: ThumbnailCache = project_thumbnail
         self.time_start: float = time.time()
         self.base_dir: str = base_dir
+        self.lock: ReadWriteLock = ReadWriteLock()  # guard the project of task
+
+
+def _get_task(args: tuple, kwargs: dict) -> Task:
+    """
+    find the task in the arguments of controller method
+
+    @param args: positional arguments, without self
+    @param kwargs: keyword arguments
+    @return: the task
+
+    """
+    if "task" in kwargs:
+        return kwargs["task"]
+    return args[0]
+
+
+def task_reader(func):
+    """
+    decorator for controller method only reading the task, the method
+    should take the task as the first argument
+
+    @param func: function to be decorated
+
+    """
+
+    @wraps(func)
+    def wrapper(self, *args, **kwargs):
+        with _get_task(args, kwargs).lock.read():
+            return func(self, *args, **kwargs)
+
+    wrapper.task_access = "read"  # TaskDispatcher waits for the task in event loop
+    return wrapper
+
+
+def task_writer(func):
+    """
+    decorator for controller method changing the task, the method
+    should take the task as the first argument
+
+    @param func: function to be decorated
+
+    """
+
+    @wraps(func)
+    def wrapper(self, *args, **kwargs):
+        with _get_task(args, kwargs).lock.write():
+            return func(self, *args, **kwargs)
+
+    wrapper.task_access = "write"  # TaskDispatcher waits for the task in event loop
+    return wrapper
 
 
 class ProjectController:
@@ -58,6 +116,14 @@ class ProjectController:
         self.cors_info: dict = config_loader.cors()
 
         self.__tasks: dict[str, Task] = {}
+        self.__tasks_lock = threading.Lock()  # guard the task list
+
+        # resources content shared by all projects, optional
+        blob_config = config_loader.blob_store()
+        self.__blob_store: BlobStore | None = None
+        if blob_config["enable"].lower() == "true":
+            self.__blob_store = BlobStore(blob_config["store_dir"])
+        self.__manifest_name: str = blob_config["manifest_name"]
 
     def __new_task(self, base_dir: str) -> str:
         """
@@ -68,31 +134,44 @@ class ProjectController:
 
         """
         base_dir = base_dir.lower()
-        for task_id, task in self.__tasks.items():
-            if task.base_dir == base_dir:
-                return task_id
+        with self.__tasks_lock:
+            for task_id, task in self.__tasks.items():
+                if task.base_dir == base_dir:
+                    return task_id
 
-        token_length = int(self.__project_config["token_length"])
-        token = secrets.token_urlsafe(token_length)
-        while token in self.__tasks:
+            token_length = int(self.__project_config["token_length"])
             token = secrets.token_urlsafe(token_length)
+            while token in self.__tasks:
+                token = secrets.token_urlsafe(token_length)
 
-        project_manager = ProjectManager(
-            project_name=base_dir, config_dir=self.__config_dir
-        )
-        project_engine = Engine(
-            project_dir=project_manager.get_project_dir(), config_dir=self.__config_dir
-        )
-        project_gamesave = GameSave(
-            project_dir=project_manager.get_project_dir(), config_dir=self.__config_dir
-        )
-        self.__tasks[token] = Task(
-            project_manager=project_manager,
-            project_engine=project_engine,
-            project_gamesave=project_gamesave,
-            base_dir=base_dir,
-        )
-        return token
+            project_manager = ProjectManager(
+                project_name=base_dir,
+                config_dir=self.__config_dir,
+                blob_store=self.__blob_store,
+            )
+            project_engine = Engine(
+                project_dir=project_manager.get_project_dir(),
+                config_dir=self.__config_dir,
+            )
+            project_manager.add_resource_listener(
+                project_engine.invalidate_resource_cache
+            )
+            project_gamesave = GameSave(
+                project_dir=project_manager.get_project_dir(),
+                config_dir=self.__config_dir,
+            )
+            project_thumbnail = ThumbnailCache(
+                project_dir=project_manager.get_project_dir(),
+                config_dir=self.__config_dir,
+            )
+            self.__tasks[token] = Task(
+                project_manager=project_manager,
+                project_engine=project_engine,
+                project_gamesave=project_gamesave,
+                project_thumbnail=project_thumbnail,
+                base_dir=base_dir,
+            )
+            return token
 
     @project_controller_exception_handler
     def init_project(self, base_dir: str) -> ReturnDict:
@@ -135,15 +214,17 @@ class ProjectController:
         @return: dictionary contain status information
 
         """
-        if task_id not in self.__tasks:
-            raise ControllerException(f"cannot find task id '{task_id}'")
+        with self.__tasks_lock:
+            if task_id not in self.__tasks:
+                raise ControllerException(f"cannot find task id '{task_id}'")
+            task = self.__tasks.pop(task_id)
 
-        # close gamesave service
-        self.__tasks[task_id].project_gamesave.close()
+        # wait for the running operations on the task
+        with task.lock.write():
+            # close gamesave service
+            task.project_gamesave.close()
 
-        # remove task
-        task_last_time = time.time() - self.__tasks[task_id].time_start
-        self.__tasks.pop(task_id)
+        task_last_time = time.time() - task.time_start
         return ReturnDict(
             status=StatusCode.OK,
             content={"task_id": task_id, "time_last": task_last_time},
@@ -174,26 +255,68 @@ class ProjectController:
         @return: dictionary contain status information
 
         """
-        if task_id not in self.__tasks:
-            raise ControllerException(f"cannot find task id '{task_id}'")
+        with self.__tasks_lock:
+            if task_id not in self.__tasks:
+                raise ControllerException(f"cannot find task id '{task_id}'")
+            task = self.__tasks.pop(task_id)
+
+        # wait for the running operations on the task, never under the lock of
+        # task list, since the operations may take the lock of task list
+        with task.lock.write():
+            # close gamesave service
+            task.project_gamesave.close()
+
+            # remove project
+            status = task.project_manager.delete_project()
+
+        if not status:
+            # the project is kept, so is the task
+            with self.__tasks_lock:
+                self.__tasks.setdefault(task_id, task)
+            raise ControllerException(f"remove project id:{task_id} fails")
+
+        self.collect_blobs()
+        task_last_time = time.time() - task.time_start
+        return ReturnDict(
+            status=StatusCode.OK,
+            msg="ok",
+            content={"task_id": task_id, "time_last": task_last_time},
+        )
 
-        # close gamesave service
-        self.__tasks[task_id].project_gamesave.close()
+    def collect_blobs(self) -> int:
+        """
+        remove the resources content no longer used by any project
 
-        # remove project
-        project_manager = self.__tasks[task_id].project_manager
-        status = project_manager.delete_project()
-
-        if status:
-            task_last_time = time.time() - self.__tasks[task_id].time_start
-            self.__tasks.pop(task_id)
-            return ReturnDict(
-                status=StatusCode.OK,
-                msg="ok",
-                content={"task_id": task_id, "time_last": task_last_time},
-            )
+        @return: amount of blobs removed
 
-        raise ControllerException(f"remove project id:{task_id} fails")
+        """
+        if self.__blob_store is None:
+            return 0
+
+        def live_digests() -> set[str]:
+            # called under the lock of store, so no blob is being recorded,
+            # the lock of store is always taken before the lock of tasks
+            with self.__tasks_lock:
+                managers = [task.project_manager for task in self.__tasks.values()]
+            digests = set()
+            opened = set()
+            for project_manager in managers:
+                digests |= project_manager.get_blob_digests()
+                opened.add(project_manager.get_project_name())
+
+            # projects not opened by any task
+            projects_base = self.__project_config["projects_base"]
+            for project_name in get_folders_in_folder(projects_base):
+                if project_name in opened:
+                    continue
+                manifest = load_manifest(
+                    os.path.join(projects_base, project_name, self.__manifest_name)
+                )
+                for items in manifest.values():
+                    digests |= set(items.values())
+            return digests
+
+        return self.__blob_store.collect(live_digests)
 
     def check_task_exist(self, task_id: str) -> bool:
         """
@@ -216,10 +339,7 @@ class ProjectController:
         @return: corresponding task
 
         """
-        if not self.check_task_exist(task_id):
-            return None
-
-        return self.__tasks[task_id]
+        return self.__tasks.get(task_id)
 
     def get_task_id_by_project_name(self, project_name: str):
         """
@@ -1,18 +1,21 @@
+import hashlib
 import os
+import tempfile
 
+from concurrent.futures import ThreadPoolExecutor
 from functools import partial
 from fastapi import UploadFile
 
-from module.project_module import ResourcesType
+from module.project_module import ProjectManager, ResourcesType, ResourceQueryModel
 from module.config_module import ConfigLoader
-from utils.exception import ControllerException
+from utils.exception import ControllerException, ThumbnailError
 from utils.exception_handler import exception_handler
 from utils.status import StatusCode
 from utils.file_utils import check_file_valid
 
 from utils.return_type import ReturnList, ReturnDict
 
-from .project_controller import Task
+from .project_controller import Task, task_reader, task_writer
 
 resource_controller_exception_handler = partial(
     exception_handler, module_name="Resources Controller", debug=False
@@ -32,8 +35,10 @@ class ResourceController:
         """
         config_loader = ConfigLoader(config_dir=config_dir)
         self.__resources_config: dict = config_loader.resources()
+        self.__thumbnail_config: dict = config_loader.thumbnail()
 
     @resource_controller_exception_handler
+    @task_reader
     def get_resource_name(
         self,
         task: Task,
@@ -55,12 +60,44 @@ class ResourceController:
         )
         return ReturnList(status=StatusCode.OK, msg="ok", content=resources)
 
+    @resource_controller_exception_handler
+    @task_reader
+    def query_resources(
+        self,
+        task: Task,
+        rtype: ResourcesType,
+        query: ResourceQueryModel,
+    ) -> ReturnDict:
+        """
+        query resources by name from the index, ordered by name
+
+        @param task: current task information
+        @param rtype: type of resources to fetch
+        @param query: name and page of resources to query
+        @return: total amount of matched resources, and the matched page
+
+        """
+        if query.offset < 0 or (query.limit is not None and query.limit < 0):
+            raise ControllerException("offset and limit should not be negative")
+
+        result = task.project_manager.query_resources_by_rtype(
+            rtype,
+            prefix=query.prefix,
+            contains=query.contains,
+            offset=query.offset,
+            limit=query.limit,
+            with_meta=query.meta,
+        )
+        return ReturnDict(status=StatusCode.OK, msg="ok", content=result)
+
     @resource_controller_exception_handler
     def upload_file(
         self, task: Task, rtype: ResourcesType, file: UploadFile
     ) -> ReturnDict:
         """
-        upload a single file into the rtype directory
+        upload a single file into the rtype directory, the file is streamed
+        into a hidden temporary file and only renamed to its name once complete,
+        the task is locked only for the rename
 
         @param task: current task information
         @param rtype: resources type
@@ -69,37 +106,25 @@ class ResourceController:
 
         """
         project_manager = task.project_manager
-        max_file_size = int(self.__resources_config["max_size"])
-        suffix = os.path.splitext(file.filename)[-1].lower()
-        to_path = project_manager.get_dir_by_rtype(rtype)
+        to_path = self.__get_upload_dir(task, rtype)
 
-        if to_path == "":
-            raise ControllerException(f"no such rtype: {rtype}")
-
-        if not self.__check_resource_suffix(rtype, suffix):
+        if not self.__check_upload_suffix(rtype, file.filename):
+            file.file.close()
             raise ControllerException(
                 f"resources {file.filename} cannot be uploaded due to suffix not support"
             )
 
-        file_content = file.file.read()
-        file_size = len(file_content)
+        received = self.__receive_file(file, to_path)
+        with task.lock.write():
+            result = self.__place_file(project_manager, rtype, file.filename, received)
+            if result.status == StatusCode.OK:
+                project_manager.notify_resource_changed(rtype)
 
-        if len(file_content) > max_file_size:
-            file.file.close()
-            raise ControllerException(f"file excess max size {str(max_file_size)}")
-        try:
-            with open(os.path.join(to_path, file.filename), "wb") as f:
-                f.write(file_content)
-        except Exception as e:
-            file.file.close()
-            raise ControllerException(
-                f"cannot write file {file.filename} due to {str(e)}"
-            ) from e
-        finally:
-            file.file.close()
+        if result.status != StatusCode.OK:
+            raise ControllerException(result.msg)
 
-        to_return = {"filename": file.filename, "directory": to_path, "size": file_size}
-        return ReturnDict(status=StatusCode.OK, msg="ok", content=to_return)
+        self.__prefetch_thumbnails(task, rtype, [result])
+        return result
 
     @resource_controller_exception_handler
     def upload_files(
@@ -109,33 +134,136 @@ class ResourceController:
         files: list[UploadFile],
     ) -> ReturnList:
         """
-        upload a lot of files
+        upload a lot of files, suffixes are checked before receiving any file,
+        then files are streamed into disk in parallel and renamed to their names
+        together holding the task lock once
 
         @param task: current task information
         @param rtype: resources type
         @param files: file to be uploaded
-        @return:
+        @return: list contain upload information for each file, by the same order
+
         """
-        to_return = []
-        status: StatusCode = StatusCode.FAIL  # at least one mission succeed
         project_manager = task.project_manager
+        to_path = self.__get_upload_dir(task, rtype)
+        to_return: list = [None] * len(files)
+
+        accepted = []
+        for i, file in enumerate(files):
+            if self.__check_upload_suffix(rtype, file.filename):
+                accepted.append(i)
+            else:
+                file.file.close()
+                to_return[i] = ReturnDict(
+                    status=StatusCode.FAIL,
+                    msg=f"resources {file.filename} cannot be uploaded due to suffix not support",
+                )
+
+        received = self.__receive_files(files, accepted, to_path, to_return)
+        with task.lock.write():
+            for i, received_file in received.items():
+                to_return[i] = self.__place_file(
+                    project_manager,
+                    rtype,
+                    files[i].filename,
+                    received_file,
+                    save_manifest=False,
+                )
+            project_manager.save_manifest()
+
+            succeed = sum(1 for i in to_return if i.status == StatusCode.OK)
+            if succeed != 0:
+                project_manager.notify_resource_changed(rtype)
+
+        if succeed == 0:
+            return ReturnList(
+                status=StatusCode.FAIL, msg="fail to upload files", content=to_return
+            )
+
+        self.__prefetch_thumbnails(task, rtype, to_return)
+        return ReturnList(
+            status=StatusCode.OK,
+            msg=f"successfully upload {succeed} of {len(files)} files",
+            content=to_return,
+        )
 
-        for file in files:
-            mission_status = self.upload_file(
-                project_manager=project_manager, rtype=rtype, file=file
+    def __receive_files(
+        self,
+        files: list[UploadFile],
+        accepted: list[int],
+        to_path: str,
+        to_return: list,
+    ) -> dict:
+        """
+        stream the accepted files into disk in parallel
+
+        @param files: files to be uploaded
+        @param accepted: index of the files to be received
+        @param to_path: directory to receive the files
+        @param to_return: upload information of each file, the failure of
+                          receiving is put into it
+        @return: {index of file: (temporary file, size, digest)}
+
+        """
+        received = {}
+        if len(accepted) == 0:
+            return received
+
+        upload_workers = int(self.__resources_config["upload_workers"])
+        with ThreadPoolExecutor(
+            max_workers=min(upload_workers, len(accepted))
+        ) as executor:
+            futures = {
+                i: executor.submit(self.__receive_file, files[i], to_path)
+                for i in accepted
+            }
+        for i, future in futures.items():
+            try:
+                received[i] = future.result()
+            except ControllerException as e:
+                to_return[i] = ReturnDict(status=StatusCode.FAIL, msg=str(e))
+        return received
+
+    @resource_controller_exception_handler
+    @task_writer
+    def upload_by_digest(
+        self, task: Task, rtype: ResourcesType, item_name: str, digest: str
+    ) -> ReturnDict:
+        """
+        add resources whose content is already in blob store without sending
+        the content, fail if the content is unknown so the file should be
+        uploaded instead
+
+        @param task: current task information
+        @param rtype: resources type
+        @param item_name: resource name
+        @param digest: sha256 digest of content
+        @return: diction contain upload file information
+
+        """
+        project_manager = task.project_manager
+        if not self.__check_upload_suffix(rtype, item_name):
+            raise ControllerException(
+                f"resources {item_name} cannot be uploaded due to suffix not support"
             )
-            if mission_status.status == StatusCode.OK:
-                status = StatusCode.OK
-            to_return.append(mission_status)
 
-        if status == StatusCode.FAIL:
-            msg = "fail to upload files"
-        else:
-            msg = "ok"
+        if not project_manager.link_resources(rtype, item_name, digest.lower()):
+            return ReturnDict(
+                status=StatusCode.FAIL, msg=f"content '{digest}' not found"
+            )
 
-        return ReturnList(status=status, msg=msg, content=to_return)
+        project_manager.notify_resource_changed(rtype)
+        to_return = {
+            "filename": item_name,
+            "directory": project_manager.get_dir_by_rtype(rtype),
+            "digest": digest.lower(),
+        }
+        result = ReturnDict(status=StatusCode.OK, msg="ok", content=to_return)
+        self.__prefetch_thumbnails(task, rtype, [result])
+        return result
 
     @resource_controller_exception_handler
+    @task_reader
     def get_resources(
         self, task: Task, rtype: ResourcesType, item_name: str
     ) -> ReturnList:
@@ -161,6 +289,45 @@ class ResourceController:
         )
 
     @resource_controller_exception_handler
+    @task_reader
+    def get_thumbnail(
+        self, task: Task, rtype: ResourcesType, item_name: str, size: int
+    ) -> ReturnList:
+        """
+        get the thumbnail of image resources, generate if not cached,
+        fall back to the resources itself if thumbnail not available
+
+        @param task: current task information
+        @param rtype: resource type
+        @param item_name: resource name
+        @param size: max width and height of thumbnail
+        @return: list contain status information
+
+        """
+        if rtype not in (ResourcesType.Background, ResourcesType.Character):
+            raise ControllerException(f"no thumbnail for resources type {rtype}")
+
+        resources_at = os.path.join(
+            task.project_manager.get_dir_by_rtype(rtype), item_name
+        )
+        if not check_file_valid(resources_at):
+            return ReturnList(
+                status=StatusCode.FAIL,
+                msg=f"fail to get resources because file '{resources_at}' is not valid",
+            )
+
+        if not task.project_thumbnail.available():
+            return ReturnList(
+                status=StatusCode.OK,
+                msg="thumbnail not available",
+                content=[resources_at],
+            )
+
+        thumbnail_at = task.project_thumbnail.get(rtype.value, resources_at, size)
+        return ReturnList(status=StatusCode.OK, msg="ok", content=[thumbnail_at])
+
+    @resource_controller_exception_handler
+    @task_writer
     def remove_resource(
         self, task: Task, rtype: ResourcesType, item_name: str
     ) -> ReturnList:
@@ -185,6 +352,7 @@ class ResourceController:
         return ReturnList(status=StatusCode.OK, msg="ok", content=[item_name])
 
     @resource_controller_exception_handler
+    @task_writer
     def rename_resource(
         self,
         task: Task,
@@ -215,6 +383,157 @@ class ResourceController:
             status=StatusCode.OK, msg="ok", content={"old": item_name, "new": new_name}
         )
 
+    def __prefetch_thumbnails(
+        self, task: Task, rtype: ResourcesType, results: list[ReturnDict]
+    ):
+        """
+        start generating thumbnails for the uploaded images
+
+        @param task: current task information
+        @param rtype: resources type
+        @param results: upload information of files
+
+        """
+        if rtype not in (ResourcesType.Background, ResourcesType.Character):
+            return
+
+        size = int(self.__thumbnail_config["prefetch_size"])
+        for result in results:
+            if result.status != StatusCode.OK:
+                continue
+            resources_at = os.path.join(
+                result.content["directory"],
+                os.path.basename(result.content["filename"]),
+            )
+            try:
+                task.project_thumbnail.prefetch(rtype.value, resources_at, size)
+            except ThumbnailError as e:
+                print(f"Resources Controller (ThumbnailError): {str(e)}")
+
+    @staticmethod
+    def __get_upload_dir(task: Task, rtype: ResourcesType) -> str:
+        """
+        get the directory to upload the rtype resources into
+
+        @param task: current task information
+        @param rtype: resources type
+        @return: directory of resources
+
+        """
+        to_path = task.project_manager.get_dir_by_rtype(rtype)
+        if to_path == "":
+            raise ControllerException(f"no such rtype: {rtype}")
+        return to_path
+
+    def __check_upload_suffix(self, rtype: ResourcesType, filename: str) -> bool:
+        """
+        check if the suffix of uploaded file supported
+
+        @param rtype: resources type
+        @param filename: name of the uploaded file
+        @return: check pass or not
+
+        """
+        suffix = os.path.splitext(filename)[-1].lower()
+        return self.__check_resource_suffix(rtype, suffix)
+
+    @staticmethod
+    def __place_file(
+        project_manager: ProjectManager,
+        rtype: ResourcesType,
+        filename: str,
+        received: tuple[str, int, str],
+        save_manifest: bool = True,
+    ) -> ReturnDict:
+        """
+        store the received temporary file as resources, should hold the task lock
+
+        @param project_manager: project manager of current task
+        @param rtype: resources type
+        @param filename: name of the uploaded file
+        @param received: temporary file, size and digest of the received file
+        @param save_manifest: write the manifest of blob store, or leave to caller
+        @return: diction contain upload file information
+
+        """
+        temp_dir, file_size, digest = received
+        try:
+            project_manager.store_resources(
+                rtype, filename, temp_dir, digest, save_manifest=save_manifest
+            )
+        except Exception as e:
+            if check_file_valid(temp_dir):
+                os.remove(temp_dir)
+            return ReturnDict(
+                status=StatusCode.FAIL,
+                msg=f"cannot write file {filename} due to {str(e)}",
+            )
+
+        to_return = {
+            "filename": filename,
+            "directory": project_manager.get_dir_by_rtype(rtype),
+            "size": file_size,
+            "digest": digest,
+        }
+        return ReturnDict(status=StatusCode.OK, msg="ok", content=to_return)
+
+    def __receive_file(self, file: UploadFile, to_path: str) -> tuple[str, int, str]:
+        """
+        stream the uploaded file chunk by chunk into a hidden temporary file
+        under the target directory, abort once it excess the max size, the
+        sha256 digest is computed on the way
+
+        @param file: file to be received
+        @param to_path: directory of the temporary file
+        @return: directory of the temporary file, size and digest of file
+
+        """
+        max_file_size = int(self.__resources_config["max_size"])
+        chunk_size = int(self.__resources_config["chunk_size"])
+        file_size = 0
+        digest = hashlib.sha256()
+
+        try:
+            fd, temp_dir = tempfile.mkstemp(prefix=".upload_", dir=to_path)
+        except Exception as e:
+            file.file.close()
+            raise ControllerException(
+                f"cannot write file {file.filename} due to {str(e)}"
+            ) from e
+
+        try:
+            with os.fdopen(fd, "wb") as f:
+                while chunk := file.file.read(chunk_size):
+                    file_size += len(chunk)
+                    if file_size > max_file_size:
+                        raise ControllerException(
+                            f"file excess max size {str(max_file_size)}"
+                        )
+                    f.write(chunk)
+                    digest.update(chunk)
+        except ControllerException:
+            os.remove(temp_dir)
+            raise
+        except Exception as e:
+            os.remove(temp_dir)
+            raise ControllerException(
+                f"cannot write file {file.filename} due to {str(e)}"
+            ) from e
+        finally:
+            file.file.close()
+
+        return temp_dir, file_size, digest.hexdigest()
+
+    def get_cache_control(self, rtype: ResourcesType) -> str:
+        """
+        get the Cache-Control policy for the rtype resources
+
+        @param rtype: resources type
+        @return: value of Cache-Control header
+
+        """
+        return self.__resources_config.get(f"{rtype.value}_cache_control", "no-cache")
+
     def __check_resource_suffix(self, rtype: ResourcesType, suffix: str) -> bool:
         """
         check the suffix of the resources
@@ -0,0 +1,167 @@
+"""
+helpers for applying frame operations, in batch or from journal
+
+"""
+from typing import Optional
+
+from utils.exception import EngineError
+from kernel.chapter import Chapter
+from kernel.frame import Frame, make_empty_frame
+from kernel.operation import FrameOperation, OperationType
+
+
+class Savepoint:
+    """
+    state of the engine before a batch, only the frames and chapters touched
+    by the batch are kept, so that a failed batch can be undone without
+    dropping the other changes since the last commit
+
+    """
+
+    def __init__(self, head: int, tail: int, next_fid: int, journal_len: int):
+        """
+        constructor for savepoint
+
+        @param head: the head of the frame list
+        @param tail: the tail of the frame list
+        @param next_fid: the next fid to be allocated
+        @param journal_len: amount of operations kept for journal
+
+        """
+        self.head: int = head
+        self.tail: int = tail
+        self.next_fid: int = next_fid
+        self.journal_len: int = journal_len
+
+        # {fid: (frame, prev fid, next fid, chapter name)}, None if created later
+        self.frames: dict[int, Optional[tuple]] = {}
+        self.chapters: dict[str, Chapter] = {}  # {chapter name: copy of chapter}
+
+    def keep_frame(self, fid: int, game_content: dict, fid_chapter: dict):
+        """
+        keep the frame as it is, the first time it is touched
+
+        @param fid: id of frame, can be a frame not created yet
+        @param game_content: game content of engine
+        @param fid_chapter: {fid: chapter name} of engine
+
+        """
+        if fid == Frame.VOID_FRAME_ID or fid in self.frames:
+            return
+        if fid not in game_content:
+            self.frames[fid] = None
+            return
+        frame = game_content[fid]
+        self.frames[fid] = (
+            frame,
+            frame.action.prev_f,
+            frame.action.next_f,
+            fid_chapter[fid],
+        )
+
+    def keep_chapter(self, chapter_name: str, chapter_meta: dict):
+        """
+        keep a copy of the chapter, the first time it is touched
+
+        @param chapter_name: name of chapter
+        @param chapter_meta: {chapter name: Chapter instance} of engine
+
+        """
+        if chapter_name not in self.chapters:
+            self.chapters[chapter_name] = chapter_meta[chapter_name].copy()
+
+    def restore(
+        self,
+        *,
+        game_content: dict,
+        all_fids: set,
+        fid_chapter: dict,
+        chapter_meta: dict,
+        serialized: dict,
+    ):
+        """
+        put the kept frames and chapters back into the engine
+
+        @param game_content: game content of engine
+        @param all_fids: fid set of engine
+        @param fid_chapter: {fid: chapter name} of engine
+        @param chapter_meta: {chapter name: Chapter instance} of engine
+        @param serialized: {fid: json of frame} of engine
+
+        """
+        for fid, kept in self.frames.items():
+            serialized.pop(fid, None)
+            if kept is None:
+                game_content.pop(fid, None)
+                all_fids.discard(fid)
+                fid_chapter.pop(fid, None)
+                continue
+            frame, prev_fid, next_fid, chapter_name = kept
+            frame.action.prev_f = prev_fid
+            frame.action.next_f = next_fid
+            game_content[fid] = frame
+            all_fids.add(fid)
+            fid_chapter[fid] = chapter_name
+        chapter_meta.update(self.chapters)
+
+
+def apply_operation(engine, operation: FrameOperation) -> int:
+    """
+    apply a single operation by the editing methods of engine, the frame
+    should have been checked already
+
+    @param engine: the engine to be edited
+    @param operation: operation to be applied
+    @return: fid affected by the operation
+
+    """
+    frame = operation.frame
+    if frame is None:
+        frame = make_empty_frame(operation.frame_name)
+
+    if operation.op == OperationType.APPEND:
+        return engine.append_frame(frame, operation.chapter, force=True)
+    if operation.op == OperationType.INSERT:
+        return engine.insert_frame(
+            frame, operation.after_fid, operation.chapter, force=True
+        )
+    if operation.op == OperationType.MODIFY:
+        engine.change_frame(operation.fid, frame)
+        return operation.fid
+    if operation.op == OperationType.REMOVE:
+        engine.remove_frame(operation.fid)
+        return operation.fid
+    if operation.op == OperationType.MOVE:
+        return engine.move_frame(operation.fid, operation.after_fid, operation.chapter)
+
+    raise EngineError(f"unknown operation '{operation.op}'")
+
+
+def replay_operation(engine, operation: tuple):
+    """
+    apply an operation kept by journal, the same way it was applied before
+    commit, the fid to be allocated should have been set already
+
+    @param engine: the engine to be edited
+    @param operation: (name, fid, after fid, chapter name, frame), the name is
+                      one of append, insert, change, remove, move, add_chapter
+                      and remove_chapter
+
+    """
+    name, fid, after_fid, chapter_name, frame = operation
+    if name == "append":
+        engine.append_frame(frame, chapter_name, force=True)
+    elif name == "insert":
+        engine.insert_frame(frame, after_fid, chapter_name, force=True)
+    elif name == "change":
+        engine.change_frame(fid, frame)
+    elif name == "remove":
+        engine.remove_frame(fid)
+    elif name == "move":
+        engine.move_frame(fid, after_fid, chapter_name)
+    elif name == "add_chapter":
+        engine.add_chapter(chapter_name)
+    elif name == "remove_chapter":
+        engine.remove_chapter(chapter_name)
+    else:
+        raise EngineError(f"unknown operation '{name}' in journal")
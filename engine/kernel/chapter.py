@@ -2,19 +2,80 @@
 define the class for Chapter, which is a special frame
 
 """
+from typing import Optional
 from kernel.frame import FrameInfo
 
 
 class Chapter:
     """
-    Chapter class, use to classified frames
+    Chapter class, use to classified frames, the order of frames is kept in
+    blocks of fids, so insert, remove and position lookup only touch a
+    single block plus the block list instead of the whole chapter
 
     """
 
+    BLOCK_SIZE = 512  # a block will be split once it grows over twice the size
+
     def __init__(self, chapter_name: str):
         self.chapter_name: str = chapter_name
         self.__frames_info: dict[int, FrameInfo] = {}
-        self.__fid_list: list[int] = []  # aim to maintain the order of the frames
+        self.__blocks: list[list[int]] = []  # aim to maintain the order of the frames
+        self.__block_of: dict[int, list[int]] = {}  # {fid: block contain the fid}
+
+    def __getstate__(self) -> dict:
+        # keep the same layout as the flat fid list used by the older kernel
+        return {
+            "chapter_name": self.chapter_name,
+            "_Chapter__frames_info": self.__frames_info,
+            "_Chapter__fid_list": self.get_all_fid(),
+        }
+
+    def __setstate__(self, state: dict):
+        self.chapter_name = state["chapter_name"]
+        self.__frames_info = state["_Chapter__frames_info"]
+        self.__blocks = []
+        self.__block_of = {}
+        fid_list = state["_Chapter__fid_list"]
+        for i in range(0, len(fid_list), self.BLOCK_SIZE):
+            self.__add_block(len(self.__blocks), fid_list[i : i + self.BLOCK_SIZE])
+
+    def copy(self) -> "Chapter":
+        """
+        copy the chapter, the frame infos are copied as well since their
+        meta is replaced once the frame is changed
+
+        @return: the copied chapter
+
+        """
+        chapter = Chapter(self.chapter_name)
+        for fid in self.get_all_fid():
+            chapter.append_frame_info(FrameInfo(fid, self.__frames_info[fid].meta))
+        return chapter
+
+    def __add_block(self, position: int, block: list[int]):
+        """
+        add a block into the block list
+
+        @param position: where to add the block
+        @param block: block of fids
+
+        """
+        self.__blocks.insert(position, block)
+        for fid in block:
+            self.__block_of[fid] = block
+
+    def __block_position(self, block: list[int]) -> int:
+        """
+        get the position of the block in block list
+
+        @param block: block of fids
+        @return: position of block
+
+        """
+        for position, cur_block in enumerate(self.__blocks):
+            if cur_block is block:
+                return position
+        return -1
 
     def append_frame_info(self, frame_info: FrameInfo):
         """
@@ -23,8 +84,38 @@ class Chapter:
         @param frame_info: the frame info to be appended
 
         """
+        if len(self.__blocks) == 0 or len(self.__blocks[-1]) >= self.BLOCK_SIZE:
+            self.__add_block(len(self.__blocks), [])
+
+        block = self.__blocks[-1]
+        block.append(frame_info.fid)
+        self.__block_of[frame_info.fid] = block
+        self.__frames_info[frame_info.fid] = frame_info
+
+    def insert_frame_info(self, frame_info: FrameInfo, after_fid: int):
+        """
+        insert the frame info after a specific frame id
+
+        @param frame_info: the frame info to be inserted
+        @param after_fid: insert after this fid, -1 for the head of chapter
+
+        """
+        if after_fid == -1:
+            if len(self.__blocks) == 0:
+                self.__add_block(0, [])
+            block = self.__blocks[0]
+            block.insert(0, frame_info.fid)
+        else:
+            block = self.__block_of[after_fid]
+            block.insert(block.index(after_fid) + 1, frame_info.fid)
+
+        self.__block_of[frame_info.fid] = block
         self.__frames_info[frame_info.fid] = frame_info
-        self.__fid_list.append(frame_info.fid)
+
+        if len(block) > 2 * self.BLOCK_SIZE:
+            half = block[self.BLOCK_SIZE :]
+            del block[self.BLOCK_SIZE :]
+            self.__add_block(self.__block_position(block) + 1, half)
 
     def get_all_fid(self) -> list[int]:
         """
@@ -33,7 +124,113 @@ class Chapter:
         @return: list of frame id
 
         """
-        return self.__fid_list
+        return [fid for block in self.__blocks for fid in block]
+
+    def get_fids(
+        self, offset: int = 0, limit: Optional[int] = None, after_fid: int = None
+    ) -> list[int]:
+        """
+        get a window of frame ids, only the blocks inside the window are copied
+
+        @param offset: skip the first frames of the window
+        @param limit: max amount of frames, None for all
+        @param after_fid: the window starts after this frame, None for the head
+        @return: list of frame id
+
+        """
+        start = offset
+        if after_fid is not None:
+            if after_fid not in self.__block_of:
+                return []
+            start += self.index_of(after_fid) + 1
+
+        out = []
+        for block in self.__blocks:
+            if start >= len(block):
+                start -= len(block)
+                continue
+            out.extend(block[start:])
+            start = 0
+            if limit is not None and len(out) >= limit:
+                return out[:limit]
+        return out
+
+    def get_frame_names(
+        self, offset: int = 0, limit: Optional[int] = None, after_fid: int = None
+    ) -> list[str]:
+        """
+        get the names of a window of frames from the frame info, without
+        touching the frames
+
+        @param offset: skip the first frames of the window
+        @param limit: max amount of frames, None for all
+        @param after_fid: the window starts after this frame, None for the head
+        @return: list of frame name
+
+        """
+        return [
+            self.__frames_info[fid].meta.name
+            for fid in self.get_fids(offset, limit, after_fid)
+        ]
+
+    def get_frame_info(self, fid: int) -> FrameInfo:
+        """
+        get the frame info by fid
+
+        @param fid: frame id
+        @return: the frame info, or None if not in chapter
+
+        """
+        return self.__frames_info.get(fid)
+
+    def has_fid(self, fid: int) -> bool:
+        """
+        check if the frame is in the chapter
+
+        @param fid: frame id
+        @return: in chapter or not
+
+        """
+        return fid in self.__block_of
+
+    def index_of(self, fid: int) -> int:
+        """
+        get the position of the frame in the chapter
+
+        @param fid: frame id
+        @return: the position, or -1 if not in chapter
+
+        """
+        if fid not in self.__block_of:
+            return -1
+
+        block = self.__block_of[fid]
+        index = 0
+        for cur_block in self.__blocks:
+            if cur_block is block:
+                return index + block.index(fid)
+            index += len(cur_block)
+        return -1
+
+    def length(self) -> int:
+        """
+        get the amount of frames in the chapter
+
+        @return: amount of frames
+
+        """
+        return len(self.__block_of)
+
+    def get_head_fid(self) -> int:
+        """
+        get the head of the frame info
+
+        @return: the frame info in the beginning of chapter
+
+        """
+        if len(self.__blocks) == 0:
+            return -1
+        return self.__blocks[0][0]
 
     def get_tail_fid(self) -> int:
         """
@@ -42,9 +239,9 @@ class Chapter:
         @return: the frame info in the end of chapter
 
         """
-        if len(self.__fid_list) == 0:
+        if len(self.__blocks) == 0:
             return -1
-        return self.__fid_list[-1]
+        return self.__blocks[-1][-1]
 
     def remove_fid(self, fid: int) -> int:
         """
@@ -53,9 +250,12 @@ class Chapter:
         @return: the removed fid, or -1 if failed
 
         """
-        if len(self.__frames_info) == 0 or fid not in self.__fid_list:
+        if fid not in self.__block_of:
             return -1
 
+        block = self.__block_of.pop(fid)
+        block.remove(fid)
+        if len(block) == 0:
+            self.__blocks.pop(self.__block_position(block))
         self.__frames_info.pop(fid)
-        self.__fid_list.remove(fid)
         return fid
@@ -4,13 +4,16 @@ action component for frame
 
 from typing import Optional
 from kernel.component.branch import BranchTree
+from .slotted import Slotted
 
 
-class Action:
+class Action(Slotted):
     """
     Frame attribute, guild the next step after current frame
     """
 
+    __slots__ = ("prev_f", "next_f", "branch")
+
     def __init__(
         self, next_f_id: int, prev_f_id: int, branch: Optional[BranchTree] = None
     ):
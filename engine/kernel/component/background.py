@@ -10,6 +10,8 @@ class Background(Image):
 
     """
 
+    __slots__ = ("res_name",)
+
     def __init__(
         self, res_name: str, x: float = 0, y: float = 0, width: float = 0, height: float = 0, **kwargs
     ):
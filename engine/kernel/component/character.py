@@ -11,6 +11,8 @@ class Character(Image):
 
     """
 
+    __slots__ = ("res_name",)
+
     def __init__(
         self,
         res_name: Optional[str],
@@ -4,13 +4,16 @@ dialogue component for frame
 
 from typing import Optional
 from .character import Character
+from .slotted import Slotted
 
 
-class Dialogue:
+class Dialogue(Slotted):
     """
     dialogue component in frame
     """
 
+    __slots__ = ("dialogue", "character")
+
     def __init__(self, dialogue: str, character: Optional[Character] = None):
         """
         constructor for character
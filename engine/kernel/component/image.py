@@ -3,14 +3,17 @@ Image class, define some image attribute
 
 """
 from pydantic import BaseModel
+from .slotted import Slotted
 
 
-class Image:
+class Image(Slotted):
     """
     coordinate of visual novel component
 
     """
 
+    __slots__ = ("x", "y", "width", "height")
+
     def __init__(self, x: float = 0, y: float = 0, width: float = 0, height: float = 0):
         self.x: float = x
         self.y: float = y
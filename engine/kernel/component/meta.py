@@ -2,14 +2,17 @@
 frame meta data
 
 """
+from .slotted import Slotted
 
 
-class FrameMeta:
+class FrameMeta(Slotted):
     """
     metadata of the frame
 
     """
 
+    __slots__ = ("name",)
+
     def __init__(self, name: str = "default"):
         """
         constructor for meta, if not given, set to default
@@ -4,6 +4,7 @@ music component for frame
 
 from enum import Enum
 from typing import Optional
+from .slotted import Slotted
 
 
 class MusicSignal(Enum):
@@ -17,11 +18,13 @@ class MusicSignal(Enum):
     PLAY = 4
 
 
-class Music:
+class Music(Slotted):
     """
     music component in frame
     """
 
+    __slots__ = ("res_name", "signal")
+
     def __init__(
         self,
         res_name: Optional[str] = None,
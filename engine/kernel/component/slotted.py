@@ -0,0 +1,69 @@
+"""
+base class for the components stored in game file
+
+"""
+
+_slots_of: dict[type, tuple[str, ...]] = {}  # {class: all slots along the mro}
+
+
+class Slotted:
+    """
+    base class of slotted component, the attributes are kept in slots instead
+    of a per instance dict, and pickled as a tuple of values by the order of
+    slots instead of a dict of attributes, which saves both memory and the
+    size of game file
+
+    the components pickled as dict (i.e. game file of kernel 1.1.x, when the
+    attributes were kept in dict) are still loaded, new slots should only be
+    appended to the most derived class so the tuples pickled before still
+    line up
+
+    """
+
+    __slots__ = ()
+
+    @classmethod
+    def _all_slots(cls) -> tuple[str, ...]:
+        """
+        get the slots declared by the class and its bases, bases first
+
+        @return: name of slots
+
+        """
+        slots = _slots_of.get(cls)
+        if slots is None:
+            slots = tuple(
+                name
+                for klass in reversed(cls.__mro__)
+                for name in klass.__dict__.get("__slots__", ())
+            )
+            _slots_of[cls] = slots
+        return slots
+
+    def __getstate__(self) -> tuple:
+        """
+        get the attributes to be pickled
+
+        @return: value of attributes by the order of slots
+
+        """
+        return tuple(getattr(self, name, None) for name in self._all_slots())
+
+    def __setstate__(self, state):
+        """
+        restore the attributes from pickle, the state is either the tuple of
+        values, or the dict of attributes pickled by older kernel, attributes
+        no longer used are dropped
+
+        @param state: pickled state
+
+        """
+        slots = self._all_slots()
+        if isinstance(state, dict):
+            for name, value in state.items():
+                if name in slots:
+                    setattr(self, name, value)
+            return
+
+        for name, value in zip(slots, state):
+            setattr(self, name, value)
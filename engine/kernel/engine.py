@@ -15,13 +15,20 @@ from module.config_module import ConfigLoader
 from utils.file_utils import check_file_valid, check_folder_valid, abs_dir
 from utils.status import StatusCode
 from utils.exception import EngineError
-from kernel.frame import Frame, FrameChecker, FrameInfo
+from kernel.frame import (
+    Frame,
+    FrameChecker,
+    FrameInfo,
+    frame_to_json,
+)
 from kernel.chapter import Chapter
+from kernel.operation import FrameOperation
+from kernel.batch import Savepoint, apply_operation, replay_operation
 import kernel.engine_io as eng_io
 
 # the version of the kernel
 ENGINE_NAME = "YuiEngine"
-ENGINE_VERSION = "1.1.3"
+ENGINE_VERSION = "1.2.0"
 ENGINE_MINIMAL_COMPATIBLE = "1.1.3"
 
 
@@ -50,9 +57,22 @@ class Engine:
         # variables that need to update once change
         self.__game_content: dict[int, Frame] = {}  # game content
         self.__chapter_meta: dict[str, Chapter] = {}  # {chapter name: Chapter instance}
+        self.__fid_chapter: dict[int, str] = {}  # {fid: chapter name contain it}
         self.__head: int = Frame.VOID_FRAME_ID  # the head of the frame list
         self.__tail: int = Frame.VOID_FRAME_ID  # the tail of the frame list
         self.__all_fids: set[int] = set()  # all fids in set
+        self.__next_fid: int = 0  # the next fid to be allocated
+
+        # {fid: json of frame}, dropped once the frame is changed or removed
+        self.__serialized: dict[int, bytes] = {}
+
+        # operations since the last commit, used by journal mode
+        self.__journal_ops: list[tuple] = []
+        self.__journal_len: int = 0  # amount of records in journal file
+        self.__outdated: bool = False  # game file written by another kernel
+
+        # state before the running batch, used to undo the batch if it fails
+        self.__savepoint: Optional[Savepoint] = None
 
         if not check_folder_valid(project_dir):
             raise EngineError(f"project {project_dir} not exist")
@@ -73,6 +93,18 @@ class Engine:
             game_file_name = self.__config.engine()["default_game_file"]
         self.__game_file_dir = abs_dir(project_dir, game_file_name)
 
+        self.__journal_enabled = (
+            self.__engine_config.get("journal", "false").lower() == "true"
+        )
+        self.__journal_dir = self.__game_file_dir + self.__engine_config.get(
+            "journal_suffix", ".journal"
+        )
+        self.__compact_threshold = int(
+            self.__engine_config.get("compact_threshold", "1000")
+        )
+
+        self.__validate_workers = int(self.__engine_config.get("validate_workers", "8"))
+
         loader = self.__engine_config["loader"]
         dumper = self.__engine_config["dumper"]
         if hasattr(eng_io, loader) and hasattr(eng_io, dumper):
@@ -85,6 +117,23 @@ class Engine:
             # if the local game file already exist, load its information
             self.__load_local_file()
 
+    def __reset(self):
+        """
+        reset to an empty game content
+
+        """
+        self.__release_content()
+        self.__metadata_buffer = {}
+        self.__game_content = {}
+        self.__chapter_meta = {}
+        self.__fid_chapter = {}
+        self.__head = Frame.VOID_FRAME_ID
+        self.__tail = Frame.VOID_FRAME_ID
+        self.__all_fids = set()
+        self.__next_fid = 0
+        self.__serialized = {}
+        self.__journal_ops = []
+
     def __load_local_file(self):
         try:
             game_content_raw = self.__loader(self.__game_file_dir)
@@ -109,17 +158,117 @@ class Engine:
                 f"do not support the game file version ({cur_engine_version})"
             )
 
-        if cur_engine_version != ENGINE_VERSION:
+        # rewrite the whole game file in the current layout on next commit
+        self.__outdated = cur_engine_version != ENGINE_VERSION
+        if self.__outdated:
             print(
                 f"WARNING: detect kernel version ({ENGINE_VERSION}) "
                 f"mismatched with game file ({cur_engine_version})"
             )
 
+        self.__release_content()
         self.__game_content: dict[int, Frame] = game_content_raw[1]
         self.__chapter_meta: dict[str, Chapter] = game_content_raw[2]
         self.__head: int = self.__metadata_buffer["head"]
         self.__tail: int = self.__metadata_buffer["tail"]
+
+        if version.parse(cur_engine_version) < version.parse("1.2.0"):
+            # game file from older kernel, never reuse the fids in it
+            self.__metadata_buffer["next_fid"] = (
+                max(self.__game_content.keys(), default=-1) + 1
+            )
+            self.__metadata_buffer["generation"] = 0
+
+        self.__build_index()
+
+        # replay the changes committed after the last snapshot, the records
+        # of an older snapshot are left if compaction is interrupted
+        try:
+            records = eng_io.journal_loader(self.__journal_dir)
+        except Exception as e:
+            raise EngineError(f"fail to load journal due to {str(e)}") from e
+        generation = self.__metadata_buffer["generation"]
+        for record in records:
+            if record["metadata"]["generation"] == generation:
+                self.__replay(record)
+        self.__journal_len = len(records)
+
+        self.__serialized = {}
+        self.__journal_ops = []
+
+    def __release_content(self):
+        """
+        release the memory map held by the game content loaded lazily,
+        called before the game content is replaced
+
+        """
+        if isinstance(self.__game_content, eng_io.LazyFrameTable):
+            self.__game_content.release()
+
+    def __build_index(self):
+        """
+        build the fid set and the {fid: chapter name} index from the loaded
+        game content
+
+        """
         self.__all_fids: set[int] = set(self.__game_content.keys())
+        self.__fid_chapter: dict[int, str] = {}
+        for chapter_name, chapter in self.__chapter_meta.items():
+            for fid in chapter.get_all_fid():
+                self.__fid_chapter[fid] = chapter_name
+        self.__next_fid = self.__metadata_buffer["next_fid"]
+
+    def __replay(self, record: dict):
+        """
+        apply a journal record onto the loaded game content
+
+        @param record: delta record produced by commit
+
+        """
+        for operation in record["ops"]:
+            if operation[0] in ("append", "insert"):
+                # allocate the same fid as before
+                self.__next_fid = operation[1]
+            replay_operation(self, operation)
+
+        self.__metadata_buffer = record["metadata"]
+        self.__head = self.__metadata_buffer["head"]
+        self.__tail = self.__metadata_buffer["tail"]
+        self.__next_fid = self.__metadata_buffer["next_fid"]
+
+    def __log(
+        self,
+        name: str,
+        fid: Optional[int] = None,
+        after_fid: Optional[int] = None,
+        chapter_name: Optional[str] = None,
+        frame: Optional[Frame] = None,
+    ):
+        """
+        keep an operation to be written into journal on next commit, so the
+        size of a record grows with the edits instead of the chapters
+
+        @param name: name of operation, see `replay_operation`
+        @param fid: frame id
+        @param after_fid: the frame before, for insert and move
+        @param chapter_name: chapter name
+        @param frame: the frame appended, inserted or changed
+
+        """
+        if self.__journal_enabled:
+            self.__journal_ops.append((name, fid, after_fid, chapter_name, frame))
+
+    def __make_record(self) -> dict:
+        """
+        make the delta record contain all the operations since last commit
+
+        @return: delta record
+
+        """
+        return {
+            "metadata": dict(self.__metadata_buffer),
+            "ops": self.__journal_ops,
+        }
 
     def __update_metadata(self):
         """
@@ -133,89 +282,114 @@ class Engine:
         self.__metadata_buffer["total_frame_len"] = len(self.__game_content.keys())
         self.__metadata_buffer["head"] = self.__head
         self.__metadata_buffer["tail"] = self.__tail
+        self.__metadata_buffer["next_fid"] = self.__next_fid
 
-    def __append(self, frame: Frame) -> int:
+    def __allocate_fid(self) -> int:
         """
-        append a frame into the game content
+        allocate a new frame id, fids are never reused even after the frame
+        is removed, since game saves refer to frames by fid
 
-        @param frame: frame to be added
-        @return the frame id
+        @return: the new frame id
 
         """
+        fid = self.__next_fid
+        self.__next_fid += 1
+        self.__keep_frame(fid)
+        return fid
 
-        # generate the fid
-        if len(self.__all_fids) == 0:
-            fid = 0
-        else:
-            fid = max(self.__all_fids) + 1
+    def __keep_frame(self, fid: int):
+        """
+        keep the frame before it is touched by the running batch
 
-        frame.fid = fid
+        @param fid: id of frame, can be a frame not created yet
 
-        # change the current last frame's next frame pointer
-        if self.__head != Frame.VOID_FRAME_ID:
-            self.__game_content[self.__tail].action.next_f = fid
-        else:
+        """
+        if self.__savepoint is not None:
+            self.__savepoint.keep_frame(fid, self.__game_content, self.__fid_chapter)
+
+    def __keep_chapter(self, chapter_name: str):
+        """
+        keep the chapter before it is touched by the running batch
+
+        @param chapter_name: name of chapter
+
+        """
+        if self.__savepoint is not None:
+            self.__savepoint.keep_chapter(chapter_name, self.__chapter_meta)
+
+    def __link(self, frame: Frame, prev_fid: int):
+        """
+        link the frame into the frame list after a specific frame id
+
+        @param frame: frame to be linked, fid should be set already
+        @param prev_fid: link after this frame, VOID_FRAME_ID for the head
+
+        """
+        fid = frame.fid
+        self.__keep_frame(prev_fid)
+
+        if prev_fid == Frame.VOID_FRAME_ID:
+            next_fid = self.__head
             self.__head = fid
+        else:
+            prev_frame = self.__game_content[prev_fid]
+            next_fid = prev_frame.action.next_f
+            prev_frame.action.next_f = fid
 
-        # update the current frame
-        frame.action.prev_f = self.__tail
+        self.__keep_frame(next_fid)
+        if next_fid == Frame.VOID_FRAME_ID:
+            self.__tail = fid
+        else:
+            self.__game_content[next_fid].action.prev_f = fid
 
-        # update activated variables
-        self.__game_content[fid] = frame
+        frame.action.prev_f = prev_fid
+        frame.action.next_f = next_fid
 
-        self.__all_fids.add(fid)
+    def __unlink(self, fid: int):
+        """
+        unlink the frame from the frame list, the frame stay in game content
 
-        self.__tail = fid
+        @param fid: id of frame
 
-        return fid
+        """
+        cur_frame = self.__game_content[fid]
+        prev_fid = cur_frame.action.prev_f
+        next_fid = cur_frame.action.next_f
+        self.__keep_frame(fid)
+        self.__keep_frame(prev_fid)
+        self.__keep_frame(next_fid)
+
+        if prev_fid == Frame.VOID_FRAME_ID:
+            self.__head = next_fid
+        else:
+            self.__game_content[prev_fid].action.next_f = next_fid
+
+        if next_fid == Frame.VOID_FRAME_ID:
+            self.__tail = prev_fid
+        else:
+            self.__game_content[next_fid].action.prev_f = prev_fid
 
     def __insert(self, frame: Frame, after_fid: int) -> int:
         """
         Insert a frame into the game content after a specific frame id
 
-        @param after_fid: frame id after which the new frame should be inserted
+        @param after_fid: frame id after which the new frame should be inserted,
+                          -1 for the end of the frame list
         @param frame: frame to be inserted
         @return the inserted frame id
         """
-
-        if after_fid == -1:
-            return self.__append(frame)
-
-        if after_fid not in self.__game_content:
+        if after_fid == Frame.VOID_FRAME_ID:
+            after_fid = self.__tail
+        elif after_fid not in self.__game_content:
             raise EngineError(
                 f"Frame with id {after_fid} not found in the game content"
             )
 
-        # Generate the new frame id
-        new_fid = max(self.__all_fids) + 1
-        frame.fid = new_fid
-
-        # Find the frame after which the new frame will be inserted
-        after_frame = self.__game_content[after_fid]
-
-        # Update the next and previous frame pointers of the new frame
-        frame.action.prev_f = after_fid
-        frame.action.next_f = after_frame.action.next_f
-
-        # Update the next frame pointer of the frame after which the new frame is inserted
-        after_frame.action.next_f = new_fid
-
-        # Update the previous frame pointer of the frame that comes after the new frame
-        if frame.action.next_f != Frame.VOID_FRAME_ID:
-            next_frame = self.__game_content[frame.action.next_f]
-            next_frame.action.prev_f = new_fid
-
-        # Update the game content
-        self.__game_content[new_fid] = frame
-
-        # Update the list of all frame ids
-        self.__all_fids.add(new_fid)
-
-        # Update the tail of the linked list, if necessary
-        if self.__tail == after_fid:
-            self.__tail = new_fid
-
-        return new_fid
+        frame.fid = self.__allocate_fid()
+        self.__game_content[frame.fid] = frame
+        self.__all_fids.add(frame.fid)
+        self.__link(frame, after_fid)
+        return frame.fid
 
     def __remove(self, fid: int):
         """
@@ -224,25 +398,12 @@ class Engine:
         @param fid: id of frame
 
         """
-        cur_frame = self.__game_content[fid]
-
-        if fid != self.__head:
-            self.__game_content[
-                cur_frame.action.prev_f
-            ].action.next_f = cur_frame.action.next_f
-        else:
-            self.__head = cur_frame.action.next_f
-
-        if fid != self.__tail:
-            self.__game_content[
-                cur_frame.action.next_f
-            ].action.prev_f = cur_frame.action.prev_f
-        else:
-            self.__tail = cur_frame.action.prev_f
+        self.__unlink(fid)
 
         # update game content and metadata
         self.__game_content.pop(fid)
         self.__all_fids.remove(fid)
+        self.__serialized.pop(fid, None)
 
     def append_frame(self, frame: Frame, to_chapter: str, force: bool = False) -> int:
         """
@@ -265,14 +426,128 @@ class Engine:
                 raise EngineError(f"Frame invalid: {check_output[1]}")
 
         # append to the game content
+        self.__keep_chapter(to_chapter)
         tail_id = self.__chapter_meta[to_chapter].get_tail_fid()
         fid = self.__insert(frame, after_fid=tail_id)
 
         # update frame meta and chapter info
         self.__chapter_meta[to_chapter].append_frame_info(FrameInfo(fid, frame.meta))
+        self.__fid_chapter[fid] = to_chapter
+        self.__log("append", fid, chapter_name=to_chapter, frame=frame)
 
         return fid
 
+    def insert_frame(
+        self,
+        frame: Frame,
+        after_fid: int,
+        to_chapter: Optional[str] = None,
+        force: bool = False,
+    ) -> int:
+        """
+        insert frame after a specific frame, into the chapter of that frame
+
+        @param frame: frame to be inserted
+        @param after_fid: insert after this frame, -1 for the head of to_chapter
+        @param to_chapter: insert into this chapter, required if after_fid is -1
+        @param force: force push mode, ignore checking frame valid
+        @return: frame id
+
+        """
+        to_chapter = self.__resolve_chapter(after_fid, to_chapter)
+
+        if not force:
+            check_output = self.__frame_checker.check(frame)
+            if not check_output[0]:
+                raise EngineError(f"Frame invalid: {check_output[1]}")
+
+        self.__keep_chapter(to_chapter)
+        frame.fid = self.__allocate_fid()
+        self.__game_content[frame.fid] = frame
+        self.__all_fids.add(frame.fid)
+        self.__link(frame, self.__link_position(to_chapter, after_fid))
+
+        chapter = self.__chapter_meta[to_chapter]
+        chapter.insert_frame_info(FrameInfo(frame.fid, frame.meta), after_fid)
+        self.__fid_chapter[frame.fid] = to_chapter
+        self.__log("insert", frame.fid, after_fid, to_chapter, frame)
+
+        return frame.fid
+
+    def move_frame(
+        self, fid: int, after_fid: int, to_chapter: Optional[str] = None
+    ) -> int:
+        """
+        move the frame after a specific frame, the frame keeps its fid
+        so that game saves still refer to it
+
+        @param fid: the frame to be moved
+        @param after_fid: move after this frame, -1 for the head of to_chapter
+        @param to_chapter: move into this chapter, required if after_fid is -1
+        @return: frame id
+
+        """
+        if fid not in self.__fid_chapter:
+            raise EngineError(f"fid '{fid}' no found")
+        if fid == after_fid:
+            raise EngineError("cannot move a frame after itself")
+        to_chapter = self.__resolve_chapter(after_fid, to_chapter)
+
+        self.__keep_chapter(self.__fid_chapter[fid])
+        self.__keep_chapter(to_chapter)
+        from_chapter = self.__chapter_meta[self.__fid_chapter[fid]]
+        frame_info = from_chapter.get_frame_info(fid)
+        from_chapter.remove_fid(fid)
+        self.__unlink(fid)
+
+        self.__link(
+            self.__game_content[fid], self.__link_position(to_chapter, after_fid)
+        )
+        self.__chapter_meta[to_chapter].insert_frame_info(frame_info, after_fid)
+        self.__fid_chapter[fid] = to_chapter
+        self.__log("move", fid, after_fid, to_chapter)
+
+        return fid
+
+    def __resolve_chapter(self, after_fid: int, to_chapter: Optional[str]) -> str:
+        """
+        get the chapter to put a frame in when it comes after a specific frame
+
+        @param after_fid: the frame before, -1 for the head of to_chapter
+        @param to_chapter: the chapter given by caller, can be none if after_fid given
+        @return: the chapter name
+
+        """
+        if after_fid == Frame.VOID_FRAME_ID:
+            if to_chapter not in self.__chapter_meta:
+                raise EngineError(f"Chapter '{to_chapter}' no found")
+            return to_chapter
+
+        if after_fid not in self.__fid_chapter:
+            raise EngineError(f"fid '{after_fid}' no found")
+        if to_chapter is not None and to_chapter != self.__fid_chapter[after_fid]:
+            raise EngineError(f"fid '{after_fid}' not in chapter '{to_chapter}'")
+        return self.__fid_chapter[after_fid]
+
+    def __link_position(self, to_chapter: str, after_fid: int) -> int:
+        """
+        get the frame to link after in the frame list
+
+        @param to_chapter: the chapter to put the frame in
+        @param after_fid: the frame before in chapter, -1 for the head of chapter
+        @return: frame id to link after
+
+        """
+        if after_fid != Frame.VOID_FRAME_ID:
+            return after_fid
+
+        chapter = self.__chapter_meta[to_chapter]
+        if chapter.length() == 0:
+            return self.__tail
+
+        # link before the current head of the chapter
+        return self.__game_content[chapter.get_head_fid()].action.prev_f
+
     def remove_frame(self, fid: int):
         """
         remove the frame from game content
@@ -283,17 +558,21 @@ class Engine:
         if not self.check_frame_exist(fid):
             raise EngineError("remove fail, frame not exist")
 
+        self.__keep_chapter(self.__fid_chapter[fid])
         self.__remove(fid)
 
         # update chapter data
-        for chapter in self.__chapter_meta.values():
-            if chapter.remove_fid(fid) != -1:
+        chapter_name = self.__fid_chapter.pop(fid, None)
+        if chapter_name is not None:
+            if self.__chapter_meta[chapter_name].remove_fid(fid) != -1:
+                self.__log("remove", fid)
                 return
         raise EngineError("kernel error when remove frame, contact developer for help")
 
     def change_frame(self, fid: int, frame: Frame):
         """
-        change the frame id by new frame
+        change the frame id by new frame, the new frame takes over the
+        position (fid and action) of the old one
 
         @param fid: the id of the frame
         @param frame: added frame
@@ -302,7 +581,95 @@ class Engine:
         if not self.check_frame_exist(fid):
             raise EngineError(f"fid '{fid}' no found")
 
+        self.__keep_frame(fid)
+        self.__keep_chapter(self.__fid_chapter[fid])
+        frame.fid = fid
+        frame.action = self.__game_content[fid].action
         self.__game_content[fid] = frame
+        self.__serialized.pop(fid, None)
+
+        # keep the frame meta in chapter up to date
+        chapter_name = self.__fid_chapter[fid]
+        self.__chapter_meta[chapter_name].get_frame_info(fid).meta = frame.meta
+        self.__log("change", fid, frame=frame)
+
+    def apply_batch(
+        self, operations: list[FrameOperation], force: bool = False
+    ) -> list[int]:
+        """
+        apply a list of operations as a unit, all the frames are checked
+        before anything is changed, and if any operation fails the frames
+        and chapters touched by the batch are restored, the other changes
+        since the last commit are kept
+
+        @param operations: operations to be applied by order
+        @param force: force push mode, ignore checking frame valid
+        @return: fid corresponding to each operation
+
+        """
+        if not force:
+            for index, operation in enumerate(operations):
+                if operation.frame is None:
+                    continue
+                check_output = self.__frame_checker.check(operation.frame)
+                if not check_output[0]:
+                    raise EngineError(
+                        f"Frame invalid in operation {index}: {check_output[1]}"
+                    )
+
+        fids = []
+        savepoint = Savepoint(
+            self.__head, self.__tail, self.__next_fid, len(self.__journal_ops)
+        )
+        self.__savepoint = savepoint
+        try:
+            for operation in operations:
+                fids.append(apply_operation(self, operation))
+        except Exception as e:
+            # only undo the frames and chapters touched by the batch
+            savepoint.restore(
+                game_content=self.__game_content,
+                all_fids=self.__all_fids,
+                fid_chapter=self.__fid_chapter,
+                chapter_meta=self.__chapter_meta,
+                serialized=self.__serialized,
+            )
+            self.__head = savepoint.head
+            self.__tail = savepoint.tail
+            self.__next_fid = savepoint.next_fid
+            del self.__journal_ops[savepoint.journal_len :]
+            raise EngineError(
+                f"batch aborted at operation {len(fids)} due to: {str(e)}"
+            ) from e
+        finally:
+            self.__savepoint = None
+        return fids
+
+    def validate_all(self) -> dict:
+        """
+        check all frames in game content
+
+        @return: report contain the amount of frames and {fid: error message}
+
+        """
+        errors = self.__frame_checker.check_all(
+            self.__game_content.values(), max_workers=self.__validate_workers
+        )
+        return {
+            "total": len(self.__game_content),
+            "invalid": len(errors),
+            "errors": errors,
+        }
+
+    def invalidate_resource_cache(self, category: Optional[str] = None):
+        """
+        drop the resource names cached by frame checker, called once
+        the resources of the project changed
+
+        @param category: category changed, i.e. background_dir, none for all
+
+        """
+        self.__frame_checker.invalidate(category)
 
     def check_frame_exist(self, fid: int) -> bool:
         """
@@ -327,6 +694,22 @@ class Engine:
 
         return self.__game_content[fid]
 
+    def get_frame_json(self, fid: int) -> bytes:
+        """
+        get the json of frame model by frame id, the json is cached until
+        the frame is changed, removed or rolled back, so the frame should
+        only be changed by `change_frame`
+
+        @param fid: frame id
+        @return: json of frame model
+
+        """
+        serialized = self.__serialized.get(fid)
+        if serialized is None:
+            serialized = frame_to_json(self.get_frame(fid))
+            self.__serialized[fid] = serialized
+        return serialized
+
     def length(self) -> int:
         """
         get the total length of the game content
@@ -363,57 +746,154 @@ class Engine:
 
     def commit(self) -> StatusCode:
         """
-        commit all the change to the local game file
+        commit all the change to the local game file, under journal mode
+        only the change since last commit will be appended to the journal,
+        and the journal will be compacted into the game file once it grows
+        over the threshold
 
         @return: commit status
 
         """
         self.__update_metadata()
-        game_content_raw = [
-            self.__metadata_buffer,
-            self.__game_content,
-            self.__chapter_meta,
-        ]
+
+        if (
+            self.__journal_enabled
+            and not self.__outdated
+            and self.__journal_len < self.__compact_threshold
+            and check_file_valid(self.__game_file_dir)
+        ):
+            try:
+                eng_io.journal_appender(self.__make_record(), self.__journal_dir)
+            except Exception as e:
+                raise EngineError(f"fail to write journal due to: {str(e)}") from e
+            self.__journal_len += 1
+        else:
+            self.__compact()
+
+        self.__journal_ops = []
+        return StatusCode.OK
+
+    def __compact(self):
+        """
+        dump the whole game content into game file and clear the journal,
+        the snapshot gets a new generation so that the records left in
+        journal are skipped if the journal fails to be cleared
+
+        """
+        metadata = dict(self.__metadata_buffer)
+        metadata["generation"] = metadata.get("generation", 0) + 1
+        game_content_raw = [metadata, self.__game_content, self.__chapter_meta]
         try:
             self.__dumper(game_content_raw, self.__game_file_dir)
+            self.__metadata_buffer = metadata
+            eng_io.journal_remover(self.__journal_dir)
         except Exception as e:
             raise EngineError(f"fail to dump game file due to: {str(e)}") from e
-        return StatusCode.OK
+        self.__journal_len = 0
+        self.__outdated = False
 
     def rollback(self):
         """
         rollback to the last modified status
 
         """
-        try:
-            self.__load_local_file()
-        except Exception as e:
-            print(f"something wrong when rollback: {str(e)}")
+        if not check_file_valid(self.__game_file_dir):
+            # never committed, rollback to an empty game content
+            self.__reset()
+            return
 
-        print("rollback ok!")
+        self.__load_local_file()
 
-    def render_struct(self, by_chapter: Optional[str] = None) -> dict:
+    def render_struct(
+        self,
+        by_chapter: Optional[str] = None,
+        offset: int = 0,
+        limit: Optional[int] = None,
+    ) -> dict:
         """
         render the game content struct, if chapter set to be none,
         return the whole struct, or will only render the struct under
         the specified chapter
 
+        @param by_chapter: filter by specific chapter
+        @param offset: skip the first frames of each chapter
+        @param limit: max amount of frames of each chapter, None for all
         @return: the struct for game content
 
         """
+        self.__check_window(offset, limit)
         if by_chapter is None:
             out = {}
             for chapter_name, chapter_info in self.__chapter_meta.items():
-                out[chapter_name] = chapter_info.get_all_fid()
+                out[chapter_name] = chapter_info.get_fids(offset, limit)
             return out
 
         if by_chapter not in self.__chapter_meta.keys():
             raise EngineError(f"chapter with name '{by_chapter}' not exist")
         out = {}
         chapter_info = self.__chapter_meta[by_chapter]
-        out[by_chapter] = chapter_info.get_all_fid()
+        out[by_chapter] = chapter_info.get_fids(offset, limit)
         return out
 
+    @staticmethod
+    def __check_window(offset: int, limit: Optional[int]):
+        """
+        check the window of frames to fetch
+
+        @param offset: skip the first frames of the window
+        @param limit: max amount of frames, None for all
+
+        """
+        if offset < 0 or (limit is not None and limit < 0):
+            raise EngineError("offset and limit should not be negative")
+
+    def get_chapter_fids(
+        self,
+        chapter_name: str,
+        offset: int = 0,
+        limit: Optional[int] = None,
+        after_fid: Optional[int] = None,
+    ) -> list[int]:
+        """
+        get a window of ordered frame ids in the chapter
+
+        @param chapter_name: the name for the chapter
+        @param offset: skip the first frames of the window
+        @param limit: max amount of frames, None for all
+        @param after_fid: cursor, the window starts after this frame
+        @return: list of frame id
+
+        """
+        self.__check_window(offset, limit)
+        chapter = self.get_chapter(chapter_name)
+        if after_fid is not None and not chapter.has_fid(after_fid):
+            raise EngineError(f"frame '{after_fid}' not in chapter '{chapter_name}'")
+        return chapter.get_fids(offset, limit, after_fid)
+
+    def get_chapter_frame_names(
+        self,
+        chapter_name: str,
+        offset: int = 0,
+        limit: Optional[int] = None,
+        after_fid: Optional[int] = None,
+    ) -> list[str]:
+        """
+        get the names of a window of frames in the chapter, read from the
+        frame info kept by chapter so frames are not loaded
+
+        @param chapter_name: the name for the chapter
+        @param offset: skip the first frames of the window
+        @param limit: max amount of frames, None for all
+        @param after_fid: cursor, the window starts after this frame
+        @return: list of frame name
+
+        """
+        self.__check_window(offset, limit)
+        chapter = self.get_chapter(chapter_name)
+        if after_fid is not None and not chapter.has_fid(after_fid):
+            raise EngineError(f"frame '{after_fid}' not in chapter '{chapter_name}'")
+        return chapter.get_frame_names(offset, limit, after_fid)
+
     def get_all_chapter(self) -> list:
         """
         get all chapters
@@ -446,6 +926,7 @@ class Engine:
             raise EngineError(f"chapter '{chapter_name}' already exist")
 
         self.__chapter_meta[chapter_name] = Chapter(chapter_name)
+        self.__log("add_chapter", chapter_name=chapter_name)
 
     def remove_chapter(self, chapter_name):
         """
@@ -458,11 +939,13 @@ class Engine:
         if chapter_name not in self.__chapter_meta:
             raise EngineError(f"chapter name {chapter_name} not exist")
 
-        fids = self.__chapter_meta[chapter_name].get_all_fid()
-        for i in fids:
-            self.remove_frame(i)
+        # the chapter is dropped as a whole, only unlink the frames
+        for fid in self.__chapter_meta[chapter_name].get_all_fid():
+            self.__remove(fid)
+            self.__fid_chapter.pop(fid)
 
         self.__chapter_meta.pop(chapter_name)
+        self.__log("remove_chapter", chapter_name=chapter_name)
 
     def get_frame_name(self, fid: int):
         """
@@ -475,6 +958,29 @@ class Engine:
         frame = self.get_frame(fid)
         return frame.meta.name
 
+    def get_frame_chapter(self, fid: int) -> str:
+        """
+        get the name of the chapter which contain the frame
+
+        @param fid: the frame id
+        @return: the chapter name
+
+        """
+        if fid not in self.__fid_chapter:
+            raise EngineError(f"the fid '{fid}' not exist")
+        return self.__fid_chapter[fid]
+
+    def get_frame_index(self, fid: int) -> int:
+        """
+        get the position of the frame in its chapter
+
+        @param fid: the frame id
+        @return: the position in chapter
+
+        """
+        chapter_name = self.get_frame_chapter(fid)
+        return self.__chapter_meta[chapter_name].index_of(fid)
+
     def get_frame_ids(self) -> set:
         """
         get all fids
@@ -3,7 +3,17 @@ IO for kernel
 
 """
 
+import mmap
+import os
 import pickle
+import struct
+import threading
+from collections.abc import MutableMapping
+
+# layout of indexed game file:
+# [magic][frame 0][frame 1]...[index][trailer: magic, index offset, index length]
+INDEXED_MAGIC = b"YUIIDX01"
+INDEXED_TRAILER = struct.Struct("<8sQQ")
 
 
 def pickle_loader(file_dir: str):
@@ -29,3 +39,257 @@ def pickle_dumper(game_content_raw: list, file_dir: str):
     """
     with open(file_dir, "wb") as file_stream:
         pickle.dump(game_content_raw, file_stream)
+
+
+def journal_appender(record: dict, file_dir: str):
+    """
+    append a single delta record to the end of the journal file,
+    the journal will be created if not exist
+
+    @param record: delta record to be appended
+    @param file_dir: the directory of journal file
+
+    """
+    with open(file_dir, "ab") as file_stream:
+        pickle.dump(record, file_stream)
+        file_stream.flush()
+
+
+def journal_loader(file_dir: str) -> list:
+    """
+    load all delta records in journal file by order, a broken record at
+    the end of the journal (i.e. interrupted append) will be ignored
+
+    @param file_dir: the directory of journal file
+    @return: list of records, empty if journal not exist
+
+    """
+    records = []
+    if not os.path.isfile(file_dir):
+        return records
+
+    with open(file_dir, "rb") as file_stream:
+        while True:
+            try:
+                records.append(pickle.load(file_stream))
+            except EOFError:
+                break
+            except pickle.UnpicklingError:
+                print(f"WARNING: ignore broken record at the end of '{file_dir}'")
+                break
+    return records
+
+
+def journal_remover(file_dir: str):
+    """
+    remove the journal file, do nothing if not exist
+
+    @param file_dir: the directory of journal file
+
+    """
+    if os.path.isfile(file_dir):
+        os.remove(file_dir)
+
+
+class LazyFrameTable(MutableMapping):
+    """
+    frame table backed by the memory map of an indexed game file,
+    a frame will only be decoded the first time it is accessed, readers
+    sharing the table may decode concurrently
+
+    """
+
+    def __init__(self, buffer, offsets: dict):
+        """
+        constructor for lazy frame table
+
+        @param buffer: memory map of the game file
+        @param offsets: {fid: (offset, length)} of the encoded frames
+
+        """
+        self.__buffer = buffer
+        self.__offsets: dict = offsets
+        self.__decoded: dict = {}
+        self.__decode_lock = threading.Lock()
+
+    def __getitem__(self, fid):
+        if fid in self.__decoded:
+            return self.__decoded[fid]
+
+        with self.__decode_lock:
+            # might be decoded by another reader while waiting
+            if fid in self.__decoded:
+                return self.__decoded[fid]
+            if fid not in self.__offsets:
+                raise KeyError(fid)
+
+            offset, length = self.__offsets[fid]
+            frame = pickle.loads(self.__buffer[offset : offset + length])
+            self.__decoded[fid] = frame
+            self.__offsets.pop(fid)
+        return frame
+
+    def __setitem__(self, fid, frame):
+        self.__offsets.pop(fid, None)
+        self.__decoded[fid] = frame
+
+    def __delitem__(self, fid):
+        if fid in self.__decoded:
+            self.__decoded.pop(fid)
+        elif fid in self.__offsets:
+            self.__offsets.pop(fid)
+        else:
+            raise KeyError(fid)
+
+    def __contains__(self, fid) -> bool:
+        return fid in self.__decoded or fid in self.__offsets
+
+    def __iter__(self):
+        yield from list(self.__decoded.keys())
+        yield from list(self.__offsets.keys())
+
+    def __len__(self) -> int:
+        return len(self.__decoded) + len(self.__offsets)
+
+    def __reduce__(self):
+        # pickle as a normal dictionary, used by the other dumpers
+        return dict, (dict(self.items()),)
+
+    def is_decoded(self, fid: int) -> bool:
+        """
+        check if the frame has been decoded
+
+        @param fid: frame id
+        @return: decoded or not
+
+        """
+        return fid in self.__decoded
+
+    def get_encoded(self, fid: int):
+        """
+        get the encoded frame without decoding it
+
+        @param fid: frame id
+        @return: encoded frame, or None if already decoded
+
+        """
+        if fid not in self.__offsets:
+            return None
+        offset, length = self.__offsets[fid]
+        return self.__buffer[offset : offset + length]
+
+    def release(self):
+        """
+        close the memory map, the encoded frames cannot be accessed until rebind
+
+        """
+        self.__buffer.close()
+
+    def rebind(self, buffer, offsets: dict):
+        """
+        point the encoded frames to a new memory map
+
+        @param buffer: new memory map
+        @param offsets: {fid: (offset, length)} in the new memory map
+
+        """
+        self.__buffer = buffer
+        self.__offsets = {fid: offsets[fid] for fid in self.__offsets}
+
+
+def _map_file(file_dir: str):
+    """
+    map the file into memory as read only
+
+    @param file_dir: the directory of file
+    @return: memory map
+
+    """
+    with open(file_dir, "rb") as file_stream:
+        return mmap.mmap(file_stream.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+def _read_index(buffer) -> dict:
+    """
+    read the index of the indexed game file
+
+    @param buffer: memory map of the game file
+    @return: index, or None if the file is not an indexed game file
+
+    """
+    if len(buffer) < len(INDEXED_MAGIC) + INDEXED_TRAILER.size:
+        return None
+    if buffer[: len(INDEXED_MAGIC)] != INDEXED_MAGIC:
+        return None
+
+    magic, index_offset, index_length = INDEXED_TRAILER.unpack(
+        buffer[-INDEXED_TRAILER.size :]
+    )
+    if magic != INDEXED_MAGIC:
+        raise ValueError("game file is truncated")
+    return pickle.loads(buffer[index_offset : index_offset + index_length])
+
+
+def indexed_loader(file_dir: str):
+    """
+    load the game content from indexed game file, frames are decoded lazily,
+    fall back to pickle_loader if the file is in legacy format
+
+    @param file_dir: the directory of file
+    @return: raw game content
+
+    """
+    buffer = _map_file(file_dir)
+    index = _read_index(buffer)
+    if index is None:
+        buffer.close()
+        return pickle_loader(file_dir)
+
+    return [
+        index["metadata"],
+        LazyFrameTable(buffer, index["offsets"]),
+        index["chapters"],
+    ]
+
+
+def indexed_dumper(game_content_raw: list, file_dir: str):
+    """
+    dump the game content into indexed game file, frames which have not been
+    decoded are copied as is
+
+    @param game_content_raw: raw game content
+    @param file_dir: the directory of file
+
+    """
+    metadata, game_content, chapters = game_content_raw
+    is_lazy = isinstance(game_content, LazyFrameTable)
+
+    offsets = {}
+    temp_dir = file_dir + ".tmp"
+    with open(temp_dir, "wb") as file_stream:
+        file_stream.write(INDEXED_MAGIC)
+        for fid in game_content:
+            encoded = game_content.get_encoded(fid) if is_lazy else None
+            if encoded is None:
+                encoded = pickle.dumps(game_content[fid])
+            offsets[fid] = (file_stream.tell(), len(encoded))
+            file_stream.write(encoded)
+
+        index = pickle.dumps(
+            {"metadata": metadata, "chapters": chapters, "offsets": offsets}
+        )
+        index_offset = file_stream.tell()
+        file_stream.write(index)
+        file_stream.write(INDEXED_TRAILER.pack(INDEXED_MAGIC, index_offset, len(index)))
+
+    if not is_lazy:
+        os.replace(temp_dir, file_dir)
+        return
+
+    # the old memory map has to be released before replacing on some platforms
+    game_content.release()
+    try:
+        os.replace(temp_dir, file_dir)
+    finally:
+        buffer = _map_file(file_dir)
+        game_content.rebind(buffer, _read_index(buffer)["offsets"])
@@ -1,8 +1,10 @@
 """
 frame component for frame
 """
+import json
 import os
-from typing import Optional
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Iterable, Optional
 from pydantic import BaseModel
 
 from module.config_module import ConfigLoader
@@ -14,15 +16,18 @@ from kernel.component.music import Music, MusicSignal
 from kernel.component.action import Action
 from kernel.component.meta import FrameMeta
 from kernel.component.image import ImageModel
+from kernel.component.slotted import Slotted
 
-from utils.file_utils import check_file_valid, abs_dir
+from utils.file_utils import check_file_valid, abs_dir, get_files_in_folder
 
 
-class BasicFrame:
+class BasicFrame(Slotted):
     """
     base modal for frame
     """
 
+    __slots__ = ("fid", "action")
+
     VOID_FRAME_ID = -1  # indicate no frame
 
     def __init__(self, fid: int, action: Optional[Action] = None):
@@ -33,12 +38,14 @@ class BasicFrame:
         self.action = action
 
 
-class FrameInfo:
+class FrameInfo(Slotted):
     """
     contain the frame information, include fid and meta
 
     """
 
+    __slots__ = ("fid", "meta")
+
     def __init__(self, fid: int, meta: FrameMeta):
         self.fid: int = fid
         self.meta: FrameMeta = meta
@@ -49,6 +56,8 @@ class Frame(BasicFrame):
     a normal frame
     """
 
+    __slots__ = ("meta", "background", "character", "music", "dialog")
+
     def __init__(
         self,
         fid: int,
@@ -81,21 +90,60 @@ class Frame(BasicFrame):
 
 class FrameChecker:
     """
-    frame checker class
+    frame checker class, the names of resources are cached by category,
+    call invalidate once the resources directory changed
 
     """
 
     def __init__(self, project_dir: str, config: ConfigLoader):
         self.__project_dir = project_dir
-        self.__bg_base_dir = os.path.join(
-            self.__project_dir, config.resources()["background_dir"]
-        )
-        self.__music_base_dir = os.path.join(
-            self.__project_dir, config.resources()["music_dir"]
-        )
-        self.__chara_base_dir = os.path.join(
-            self.__project_dir, config.resources()["character_dir"]
-        )
+        self.__base_dirs: dict[str, str] = {}  # {category: resources directory}
+        for category in ["background_dir", "music_dir", "character_dir"]:
+            self.__base_dirs[category] = os.path.join(
+                self.__project_dir, config.resources()[category]
+            )
+        self.__resources_cache: dict[str, set[str]] = {}  # {category: names}
+
+    def invalidate(self, category: Optional[str] = None):
+        """
+        drop the cached resource names
+
+        @param category: category to drop, i.e. background_dir, none for all
+
+        """
+        if category is None:
+            self.__resources_cache = {}
+        else:
+            self.__resources_cache.pop(category, None)
+
+    def __list_resources(self, category: str) -> set[str]:
+        """
+        get the names of resources in category, cached
+
+        @param category: resource category, i.e. background_dir
+        @return: resource names
+
+        """
+        if category not in self.__resources_cache:
+            self.__resources_cache[category] = set(
+                get_files_in_folder(self.__base_dirs[category])
+            )
+        return self.__resources_cache[category]
+
+    def __check_resource(self, category: str, res_name: str) -> bool:
+        """
+        check if the resource exist in category
+
+        @param category: resource category, i.e. background_dir
+        @param res_name: resource name
+        @return: exist or not
+
+        """
+        if "/" in res_name or os.sep in res_name:
+            # not a direct child of the resources directory, cannot use cache
+            return check_file_valid(abs_dir(self.__base_dirs[category], res_name))
+
+        return res_name in self.__list_resources(category)
 
     def check(self, frame: BasicFrame) -> list[bool, Optional[str]]:
         """
@@ -112,14 +160,80 @@ class FrameChecker:
 
         return [False, None]
 
-    def __check_frame(self, frame: Frame) -> list[bool, Optional[str]]:
+    def check_all(
+        self, frames: Iterable[BasicFrame], max_workers: int = 8
+    ) -> dict[int, str]:
+        """
+        check a lot of frames at once, each resource is only looked up once
+        and the lookups are done in a thread pool
+
+        @param frames: frames to be checked
+        @param max_workers: max amount of threads to look up resources
+        @return: {fid: error message} of invalid frames
+
+        """
+        frames = list(frames)
+        resources = set()
+        for frame in frames:
+            if isinstance(frame, Frame):
+                resources.update(self.__resources_of(frame))
+
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            categories = {category for category, _ in resources}
+            listed = dict(zip(categories, pool.map(self.__list_resources, categories)))
+            to_stat = [i for i in resources if "/" in i[1] or os.sep in i[1]]
+            stated = pool.map(lambda i: self.__check_resource(*i), to_stat)
+            found = dict(zip(to_stat, stated))
+
+        for category, res_name in resources:
+            if (category, res_name) not in found:
+                found[(category, res_name)] = res_name in listed[category]
+
+        errors = {}
+        for frame in frames:
+            if isinstance(frame, Frame):
+                status = self.__check_frame(frame, lambda *i: found[i])
+            else:
+                status = self.check(frame)
+            if not status[0]:
+                errors[frame.fid] = status[1]
+        return errors
+
+    @staticmethod
+    def __resources_of(frame: Frame) -> list[tuple[str, str]]:
+        """
+        get all resources referred by frame
+
+        @param frame: frame to check
+        @return: list of (category, resource name)
+
+        """
+        resources = [("background_dir", frame.background.res_name)]
+        for character in frame.character:
+            if character.res_name is not None:
+                resources.append(("character_dir", character.res_name))
+        if frame.music.res_name is not None:
+            resources.append(("music_dir", frame.music.res_name))
+        character = frame.dialog.character
+        if character is not None and character.res_name is not None:
+            resources.append(("character_dir", character.res_name))
+        return resources
+
+    def __check_frame(
+        self,
+        frame: Frame,
+        check_resource: Optional[Callable[[str, str], bool]] = None,
+    ) -> list[bool, Optional[str]]:
         """
         Frame Checker
 
         @param frame: frame to check
+        @param check_resource: how to check if a resource exist, default by cache
         @return: status
 
         """
+        if check_resource is None:
+            check_resource = self.__check_resource
         bg_res = frame.background.res_name
         music_res = frame.music.res_name
         music_status = frame.music.signal
@@ -129,27 +243,22 @@ class FrameChecker:
             return [False, "music resources have to specified when status set to play"]
 
         # check if input resources valid or not
-        if not check_file_valid(abs_dir(self.__bg_base_dir, bg_res)):
+        if not check_resource("background_dir", bg_res):
             return [False, f"Background resource '{bg_res}' cannot find"]
 
         for character in frame.character:
             chara_res = character.res_name
             if chara_res is not None:
-                if not check_file_valid(abs_dir(self.__chara_base_dir, chara_res)):
+                if not check_resource("character_dir", chara_res):
                     return [False, f"Character resource '{chara_res}' cannot find"]
 
         if music_res is not None:
-            if not check_file_valid(abs_dir(self.__music_base_dir, music_res)):
-                return [False, f"Music resource '{bg_res}' cannot find"]
-
-        if music_res and music_status == MusicSignal.PLAY:
-            if not check_file_valid(abs_dir(self.__music_base_dir, music_res)):
-                return [False, f"Music resources '{music_res}' cannot find"]
+            if not check_resource("music_dir", music_res):
+                return [False, f"Music resource '{music_res}' cannot find"]
 
-        if dialogue_character is not None:
-            if not check_file_valid(
-                abs_dir(self.__chara_base_dir, dialogue_character.res_name)
-            ):
+        # character without resource is voice over
+        if dialogue_character is not None and dialogue_character.res_name is not None:
+            if not check_resource("character_dir", dialogue_character.res_name):
                 return [
                     False,
                     f"Character resource {dialogue_character.res_name} cannot find",
@@ -208,11 +317,11 @@ def frame_to_model(frame: Frame):
 
     """
     background = frame.background.res_name
-    background_attr = ImageModel(**frame.background.__dict__)
+    background_attr = ImageModel(**_image_to_dict(frame.background))
 
     chara = {}
     for cur_chara in frame.character:
-        cur_chara_attr = ImageModel(**cur_chara.__dict__)
+        cur_chara_attr = ImageModel(**_image_to_dict(cur_chara))
         chara[cur_chara.res_name] = cur_chara_attr
 
     music_signal = frame.music.signal
@@ -237,6 +346,61 @@ def frame_to_model(frame: Frame):
     )
 
 
+def _image_to_dict(image) -> dict:
+    """
+    get the attribute of image as the fields of image model
+
+    @param image: background or character
+    @return: dict of image attribute
+
+    """
+    return {
+        "x": float(image.x),
+        "y": float(image.y),
+        "width": float(image.width),
+        "height": float(image.height),
+    }
+
+
+def frame_to_dict(frame: Frame) -> dict:
+    """
+    convert frame to the dict of frame model, same as
+    `frame_to_model(frame).dict()` but skip the validation of pydantic,
+    used when a lot of frames are sent at once
+
+    @param frame: the frame to be convert
+    @return: dict of frame model
+
+    """
+    dialog_character = frame.dialog.character
+    return {
+        "background": frame.background.res_name,
+        "background_attr": _image_to_dict(frame.background),
+        "character": {i.res_name: _image_to_dict(i) for i in frame.character},
+        "music": frame.music.res_name,
+        "music_signal": frame.music.signal,
+        "dialog": frame.dialog.dialogue,
+        "dialog_character": (
+            None if dialog_character is None else dialog_character.res_name
+        ),
+        "name": frame.meta.name,
+    }
+
+
+def frame_to_json(frame: Frame) -> bytes:
+    """
+    convert frame to the json of frame model, encoded the same way as the
+    reply of fastapi
+
+    @param frame: the frame to be convert
+    @return: json of frame model
+
+    """
+    frame_dict = frame_to_dict(frame)
+    frame_dict["music_signal"] = frame_dict["music_signal"].value
+    return json.dumps(frame_dict, ensure_ascii=False, separators=(",", ":")).encode()
+
+
 def make_empty_frame(frame_name: str):
     """
     make an empty frame
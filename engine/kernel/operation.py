@@ -0,0 +1,89 @@
+"""
+define the operations used to edit frames in batch
+
+"""
+from enum import Enum
+from typing import Optional
+from pydantic import BaseModel
+
+from kernel.frame import Frame, BasicFrame, FrameModel
+
+
+class OperationType(str, Enum):
+    """
+    Operation Type Enumerator
+
+    """
+
+    APPEND = "append"
+    INSERT = "insert"
+    MODIFY = "modify"
+    REMOVE = "remove"
+    MOVE = "move"
+
+
+class FrameOperation:
+    """
+    a single operation on frame
+
+    """
+
+    def __init__(
+        self,
+        op: OperationType,
+        *,
+        fid: int = BasicFrame.VOID_FRAME_ID,
+        chapter: Optional[str] = None,
+        after_fid: int = BasicFrame.VOID_FRAME_ID,
+        frame: Optional[Frame] = None,
+        frame_name: str = "default",
+    ):
+        """
+        constructor for frame operation, the fields other than the type are
+        keyword only
+
+        @param op: operation type
+        @param fid: target frame, for modify, remove and move
+        @param chapter: target chapter, for append, insert and move
+        @param after_fid: put after this frame, for insert and move
+        @param frame: the frame content, for append, insert and modify,
+                      leave none to use an empty frame named frame_name
+        @param frame_name: name of the empty frame
+
+        """
+        self.op: OperationType = op
+        self.fid: int = fid
+        self.chapter: Optional[str] = chapter
+        self.after_fid: int = after_fid
+        self.frame: Optional[Frame] = frame
+        self.frame_name: str = frame_name
+
+
+class FrameOperationModel(BaseModel):
+    """
+    class for frame operation model
+
+    """
+
+    op: OperationType
+    fid: int = BasicFrame.VOID_FRAME_ID
+    chapter: Optional[str]
+    after_fid: int = BasicFrame.VOID_FRAME_ID
+    frame: Optional[FrameModel]
+    frame_name: str = "default"
+
+    def to_operation(self) -> FrameOperation:
+        """
+        convert the operation model to operation instance
+
+        @return: operation instance
+
+        """
+        return FrameOperation(
+            op=self.op,
+            fid=self.fid,
+            chapter=self.chapter,
+            after_fid=self.after_fid,
+            frame=None if self.frame is None else self.frame.to_frame(),
+            frame_name=self.frame_name,
+        )
@@ -0,0 +1,180 @@
+"""
+Content addressed blob store, keep a single copy of identical resources
+shared by all projects
+"""
+import errno
+import hashlib
+import os
+import shutil
+import threading
+from typing import Callable
+
+from utils import file_utils
+from utils.exception import BlobStoreError
+
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+def file_digest(file_dir: str) -> str:
+    """
+    sha256 digest of file content
+
+    @param file_dir: path of file
+    @return: hex digest
+
+    """
+    digest = hashlib.sha256()
+    with open(file_dir, "rb") as f:
+        while chunk := f.read(HASH_CHUNK_SIZE):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _link_or_copy(src_dir: str, to_dir: str):
+    """
+    hard link the file, copy if the target is on another file system
+
+    @param src_dir: source file
+    @param to_dir: target file, must not exist
+
+    """
+    try:
+        os.link(src_dir, to_dir)
+    except OSError as e:
+        if e.errno not in (errno.EXDEV, errno.EPERM, errno.EMLINK):
+            raise
+        shutil.copyfile(src_dir, to_dir)
+
+
+class BlobStore:
+    """
+    blob store, the blob is named by the sha256 digest of its content and
+    linked into projects by hard link (or copied across file systems), the
+    manifests of projects tell which blobs are still in use
+
+    the store is shared by all the tasks, putting, linking and collecting
+    blobs are serialized by the lock of store, which should also be held
+    while a project records the blob in its manifest, see `lock`
+
+    """
+
+    def __init__(self, store_dir: str):
+        """
+        constructor for blob store
+
+        @param store_dir: directory of the store
+
+        """
+        self.__store_dir = store_dir
+        self.__lock = threading.RLock()  # guard the blobs and the manifests
+        if not file_utils.check_folder_valid(store_dir):
+            os.makedirs(store_dir)
+
+    def lock(self) -> threading.RLock:
+        """
+        get the lock of store, hold it while linking a blob and recording it
+        in the manifest, so the blob is not collected in between
+
+            with store.lock():
+                digest = store.put(...)
+                store.link(digest, ...)
+                manifest[...] = digest
+
+        @return: reentrant lock of store
+
+        """
+        return self.__lock
+
+    @staticmethod
+    def __check_digest(digest: str):
+        """
+        check the digest is a sha256 hex digest, so it is safe to be a path
+
+        @param digest: digest of blob
+
+        """
+        if len(digest) != 64 or any(i not in "0123456789abcdef" for i in digest):
+            raise BlobStoreError(f"invalid digest '{digest}'")
+
+    def get_blob_dir(self, digest: str) -> str:
+        """
+        get the path of blob
+
+        @param digest: digest of blob
+        @return: path of blob
+
+        """
+        self.__check_digest(digest)
+        return os.path.join(self.__store_dir, digest[:2], digest)
+
+    def has(self, digest: str) -> bool:
+        """
+        check if the blob is in store
+
+        @param digest: digest of blob
+        @return: in store or not
+
+        """
+        return file_utils.check_file_valid(self.get_blob_dir(digest))
+
+    def put(self, file_dir: str, digest: str = None) -> str:
+        """
+        move the file into store, the file is dropped if the same content
+        is already stored
+
+        @param file_dir: file to be stored, consumed by the store
+        @param digest: digest of file content if already known
+        @return: digest of blob
+
+        """
+        if digest is None:
+            digest = file_digest(file_dir)
+        blob_dir = self.get_blob_dir(digest)
+
+        with self.__lock:
+            os.makedirs(os.path.dirname(blob_dir), exist_ok=True)
+            try:
+                _link_or_copy(file_dir, blob_dir)
+            except FileExistsError:
+                pass  # identical content stored by others
+        os.remove(file_dir)
+        return digest
+
+    def link(self, digest: str, to_dir: str):
+        """
+        link the blob to the given path, replace the existing file
+
+        @param digest: digest of blob
+        @param to_dir: where to place the blob
+
+        """
+        temp_dir = os.path.join(
+            os.path.dirname(to_dir),
+            f".link_{digest[:16]}_{os.getpid()}_{threading.get_ident()}",
+        )
+        with self.__lock:
+            if not self.has(digest):
+                raise BlobStoreError(f"blob '{digest}' not found")
+            _link_or_copy(self.get_blob_dir(digest), temp_dir)
+        os.replace(temp_dir, to_dir)
+
+    def collect(self, live_digests: Callable[[], set[str]]) -> int:
+        """
+        remove the blobs not recorded in the manifest of any project, the
+        link count is not used since a copied blob has no other link
+
+        @param live_digests: get the digests recorded by all the projects,
+                             called with the lock of store held
+        @return: amount of blobs removed
+
+        """
+        removed = 0
+        with self.__lock:
+            live = live_digests()
+            for folder in file_utils.get_folders_in_folder(self.__store_dir):
+                folder_dir = os.path.join(self.__store_dir, folder)
+                for blob in file_utils.get_files_in_folder(folder_dir):
+                    if blob not in live:
+                        os.remove(os.path.join(folder_dir, blob))
+                        removed += 1
+        return removed
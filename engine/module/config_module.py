@@ -50,6 +50,22 @@ class ConfigLoader:
         """
         return dict(self.config["Resources"])
 
+    def blob_store(self) -> dict:
+        """
+        get blob store config
+
+        @return: blob store config
+        """
+        return dict(self.config["BlobStore"])
+
+    def thumbnail(self) -> dict:
+        """
+        get thumbnail config
+
+        @return: thumbnail config
+        """
+        return dict(self.config["Thumbnail"])
+
     def project(self) -> dict:
         """
         get project config
@@ -74,6 +90,14 @@ class ConfigLoader:
         """
         return dict(self.config["CORS"])
 
+    def server(self) -> dict:
+        """
+        get server config
+
+        @return: server config
+        """
+        return dict(self.config["Server"])
+
     def get_all_section(self) -> list:
         """
         get all sections in config file
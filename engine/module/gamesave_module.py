@@ -1,12 +1,23 @@
 """
 API module for game slot control
 """
+import itertools
 import os
+import queue
+import threading
 import time
+from contextlib import contextmanager
+from typing import Iterable, Iterator, Optional
 
-from utils.db_utils import DBManager
+from pydantic import BaseModel
+
+from utils.db_pool import ConnectionPool, acquire_pool, release_pool
+from utils.db_utils import DBManager, quote_table
+from utils.exception import GameSlotError
 from .config_module import ConfigLoader
 
+DEFAULT_USER = ""  # owner of the saves of the single slot api
+
 
 def get_cur_time():
     """
@@ -27,9 +38,191 @@ def parse_data(data: dict):
     return str(data)
 
 
+class SaveModel(BaseModel):
+    """
+    class for a save of user, the state is encoded by base64
+
+    """
+
+    user: str
+    slot: str
+    frame: int
+    time: Optional[float]
+    state: Optional[str]
+
+
+class ProgressWriter:
+    """
+    write-behind queue of progress, the progress is queued in memory and
+    written by a background thread, which groups the queued progress into a
+    single transaction every flush interval or flush size of progress
+
+    the progress is written by the writer connection of the pool, so the
+    writer thread waits while a transaction of the pool is open
+
+    durability: a queued progress is not on disk until it is flushed, and is
+    lost if the process crashes before that, i.e. at most flush interval of
+    saves, `flush` and `close` return only after all the progress queued
+    before are committed, then it is as durable as the synchronous level of
+    database
+
+    failure: a progress failed to be written is reported to its user only,
+    by the next save or flush of the user, see `raise_error`
+
+    """
+
+    def __init__(
+        self,
+        pool: ConnectionPool,
+        statement: str,
+        flush_interval: float,
+        flush_size: int,
+    ):
+        """
+        constructor for progress writer, start the writer thread
+
+        @param pool: connection pool of database
+        @param statement: statement to insert a progress
+        @param flush_interval: max seconds a progress waits in queue
+        @param flush_size: max amount of progress in a transaction
+
+        """
+        self.__pool = pool
+        self.__statement = statement
+        self.__flush_interval = flush_interval
+        self.__flush_size = flush_size
+
+        self.__queue: queue.Queue = queue.Queue()
+        self.__errors: dict[str, Exception] = {}  # {user: first error not reported}
+        self.__errors_lock = threading.Lock()
+        self.__thread = threading.Thread(
+            target=self.__run, name="progress-writer", daemon=True
+        )
+        self.__thread.start()
+
+    def put(self, row: tuple):
+        """
+        queue a progress to be written, if a progress of the same user failed
+        to be written before, the error is raised instead
+
+        @param row: parameters of the insert statement, user first
+
+        """
+        self.raise_error(row[0])
+        self.__queue.put(row)
+
+    def __run(self):
+        """
+        the writer thread
+
+        """
+        running = True
+        while running:
+            batch = [self.__queue.get()]
+            deadline = time.monotonic() + self.__flush_interval
+            # a flush or stop request ends the batch at once
+            while len(batch) < self.__flush_size and isinstance(batch[-1], tuple):
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(self.__queue.get(timeout=timeout))
+                except queue.Empty:
+                    break
+
+            records = [i for i in batch if isinstance(i, tuple)]
+            if len(records) > 0:
+                self.__write(records)
+            for item in batch:
+                if item is None:
+                    running = False
+                elif isinstance(item, threading.Event):
+                    item.set()
+
+    def __write(self, records: list[tuple]):
+        """
+        write the progress in a single transaction, or one by one if the
+        transaction fails so a bad progress does not drop the others
+
+        @param records: list of parameters of the insert statement
+
+        """
+        try:
+            with self.__pool.writer() as dbman:
+                try:
+                    with dbman.transaction():
+                        dbman.executemany(self.__statement, records)
+                    return
+                except Exception:
+                    pass
+
+                for record in records:
+                    try:
+                        with dbman.transaction():
+                            dbman.execute(self.__statement, record)
+                    except Exception as e:
+                        self.__keep_error([record], e)
+        except Exception as e:
+            # fail to get the writer, i.e. the pool is closed
+            self.__keep_error(records, e)
+
+    def __keep_error(self, records: list[tuple], error: Exception):
+        """
+        keep the error for the users of the progress failed to be written,
+        only the first error of each user is kept until reported
+
+        @param records: list of parameters of the insert statement
+        @param error: the error occurred
+
+        """
+        with self.__errors_lock:
+            for record in records:
+                self.__errors.setdefault(record[0], error)
+
+    def raise_error(self, user: str):
+        """
+        raise the error of writing the progress of user, once only
+
+        @param user: user id
+
+        """
+        with self.__errors_lock:
+            error = self.__errors.pop(user, None)
+        if error is not None:
+            raise GameSlotError(f"fail to write progress: {str(error)}") from error
+
+    def flush(self):
+        """
+        wait until all the progress queued are committed
+
+        """
+        if self.__thread.is_alive():
+            flushed = threading.Event()
+            self.__queue.put(flushed)
+            flushed.wait()
+
+    def close(self):
+        """
+        write all the progress queued, and stop the writer thread, the errors
+        not reported to their users are printed
+
+        """
+        if self.__thread.is_alive():
+            self.__queue.put(None)
+            self.__thread.join()
+        with self.__errors_lock:
+            errors, self.__errors = self.__errors, {}
+        for user, error in errors.items():
+            print(f"WARNING: fail to write progress of user '{user}': {str(error)}")
+
+
 class GameSave:
     """
-    Game slot control service
+    Game slot control service, the saves of all users and slots are kept in
+    a single table of the project database, indexed by (user, slot, time),
+    the single slot api (i.e. dump_progress) works on the slot named by
+    config of the default user
+
     """
 
     def __init__(self, project_dir: str, config_dir: str):
@@ -40,28 +233,135 @@ class GameSave:
         @param config_dir: config directory
 
         """
-        config = ConfigLoader(config_dir)
+        config = ConfigLoader(config_dir).game_save()
 
-        slot_name = config.game_save()["slot_name"]
-        db_dir = os.path.join(project_dir, config.game_save()["db_name"])
+        slot_name = config["slot_name"]
+        db_dir = os.path.join(project_dir, config["db_name"])
 
-        self.__dbman = DBManager(db_dir)
+        db_config = {
+            "journal_mode": config.get("journal_mode", "WAL"),
+            "synchronous": config.get("synchronous", "NORMAL"),
+        }
+        # connections are shared by all the game saves of the database
+        self.__db_dir = db_dir
+        self.__pool = acquire_pool(
+            db_dir,
+            max_readers=int(config.get("pool_readers", "4")),
+            idle_timeout=float(config.get("pool_idle_timeout", "60")),
+            **db_config,
+        )
         self.__slot_name = slot_name
+        self.__table_name = config.get("save_table", "saves")
+        self.__table = quote_table(self.__table_name)
+        self.__insert = (
+            f"INSERT INTO {self.__table} (User, Slot, Time, Frame, State) "
+            f"VALUES (?, ?, ?, ?, ?)"
+        )
+
+        with self.__writing() as dbman:
+            self.__create_schema(dbman)
+            self.__migrate_slot(dbman)
+
+        # progress is written by background thread under write-behind mode
+        self.__writer: Optional[ProgressWriter] = None
+        if config.get("write_behind", "false").lower() == "true":
+            self.__writer = ProgressWriter(
+                self.__pool,
+                self.__insert,
+                flush_interval=int(config.get("flush_interval", "50")) / 1000,
+                flush_size=int(config.get("flush_size", "256")),
+            )
+
+    @contextmanager
+    def __writing(self) -> Iterator[DBManager]:
+        """
+        hold the writer connection of pool inside a transaction
+
+        @return: context manager of writer connection
+        """
+        with self.__pool.writer() as dbman:
+            with dbman.transaction():
+                yield dbman
+
+    def __create_schema(self, dbman: DBManager):
+        """
+        create the table of saves and its indexes if not exist
+
+        @param dbman: writer connection
+        """
+        dbman.execute(
+            f"""CREATE TABLE IF NOT EXISTS {self.__table}
+                (ID INTEGER PRIMARY KEY AUTOINCREMENT NOT NULL,
+                User TEXT NOT NULL,
+                Slot TEXT NOT NULL,
+                Time REAL NOT NULL,
+                Frame INTEGER NOT NULL,
+                State BLOB)"""
+        )
+        dbman.execute(
+            f"CREATE UNIQUE INDEX IF NOT EXISTS "
+            f"{quote_table(self.__table_name + '_user_slot_time')} "
+            f"ON {self.__table} (User, Slot, Time)"
+        )
+        dbman.execute(
+            f"CREATE INDEX IF NOT EXISTS "
+            f"{quote_table(self.__table_name + '_user_time')} "
+            f"ON {self.__table} (User, Time)"
+        )
+
+    def __migrate_slot(self, dbman: DBManager):
+        """
+        move the progress in the key-value slot table of older version into
+        the table of saves, as the saves of default user
+
+        @param dbman: writer connection
+        """
+        column_types = dbman.get_column_types(self.__slot_name)
+        if "Key" not in column_types or self.__slot_name == self.__table_name:
+            return
+
+        slot_table = quote_table(self.__slot_name)
+        dbman.execute(
+            f"INSERT OR IGNORE INTO {self.__table} (User, Slot, Time, Frame) "
+            f"SELECT ?, ?, CAST(Key AS REAL), CAST(Value AS INTEGER) "
+            f"FROM {slot_table}",
+            (DEFAULT_USER, self.__slot_name),
+        )
+        dbman.drop_table(self.__slot_name)
+
+    def flush(self, user: Optional[str] = None):
+        """
+        wait until the progress queued under write-behind mode are committed,
+        do nothing otherwise
+
+        @param user: raise the error of writing the progress of this user,
+                     None to only wait
+
+        """
+        if self.__writer is not None:
+            if self.__pool.owns_writer():
+                # the writer thread waits for the transaction to end
+                raise GameSlotError("cannot flush inside a transaction")
+            self.__writer.flush()
+            if user is not None:
+                self.__writer.raise_error(user)
 
     def reset(self):
         """
-        reset the kernel slot
+        reset the saves of all users
         """
-        self.__dbman.drop_table(self.__slot_name)
-        self.__dbman.create_table_if_not_exist(self.__slot_name)
-        self.__dbman.commit()
+        self.flush()
+        with self.__writing() as dbman:
+            dbman.drop_table(self.__table_name)
+            self.__create_schema(dbman)
 
     def drop(self):
         """
-        drop the slot
+        drop the saves of all users
         """
-        self.__dbman.drop_table(self.__slot_name)
-        self.__dbman.commit()
+        self.flush()
+        with self.__writing() as dbman:
+            dbman.drop_table(self.__table_name)
 
     def get_slot_name(self) -> str:
         """
@@ -71,19 +371,55 @@ class GameSave:
         """
         return self.__slot_name
 
+    def save(
+        self, user: str, slot: str, frame: int, state: Optional[bytes] = None
+    ) -> float:
+        """
+        save the progress of user into slot, under write-behind mode the
+        save is only queued, see `ProgressWriter`
+
+        @param user: user id
+        @param slot: slot name
+        @param frame: current progress, measured by frame number
+        @param state: state of game, i.e. variables
+        @return: save time
+        """
+        save_time = time.time()
+        row = (user, slot, save_time, int(frame), state)
+        if self.__writer is not None:
+            self.__writer.put(row)
+            return save_time
+
+        with self.__writing() as dbman:
+            dbman.execute(self.__insert, row)
+        return save_time
+
     def dump_progress(self, frame: int) -> str:
         """
-        dump the current game progress (measured by frame) into slot
+        dump the current game progress (measured by frame) into slot, under
+        write-behind mode the progress is only queued, see `ProgressWriter`
 
         @param frame: current progress, measured by frame number
         @return: progress create time
         """
-        cur_time = get_cur_time()
-        self.__dbman.push(
-            key=str(cur_time), value=str(frame), table_name=self.__slot_name
-        )
-        self.__dbman.commit()
-        return cur_time
+        return repr(self.save(DEFAULT_USER, self.__slot_name, frame))
+
+    def remove_save(self, user: str, slot: str, save_time: float) -> bool:
+        """
+        remove a save of user
+
+        @param user: user id
+        @param slot: slot name
+        @param save_time: time of save
+        @return: removed or not
+        """
+        self.flush()
+        with self.__writing() as dbman:
+            removed = dbman.execute(
+                f"DELETE FROM {self.__table} WHERE User = ? AND Slot = ? AND Time = ?",
+                (user, slot, float(save_time)),
+            )
+        return removed > 0
 
     def remove_progress(self, time_strap: str):
         """
@@ -91,28 +427,237 @@ class GameSave:
 
         @param time_strap: time to create progress
         """
-        self.__dbman.remove(time_strap, self.__slot_name)
-        self.__dbman.commit()
+        self.remove_save(DEFAULT_USER, self.__slot_name, float(time_strap))
+
+    def __page(
+        self,
+        user: str,
+        slot: str,
+        amount: int,
+        after: Optional[float],
+        newest_first: bool,
+    ) -> list[tuple]:
+        """
+        get a page of saves in slot by keyset of time
+
+        @param user: user id
+        @param slot: slot name
+        @param amount: max amount of saves in page
+        @param after: time of the last save of previous page, None for head
+        @param newest_first: ordered by time descend
+        @return: list of (time, frame, state)
+        """
+        arg_after = ""
+        params: tuple = (user, slot)
+        if after is not None:
+            arg_after = f"AND Time {'<' if newest_first else '>'} ?"
+            params += (float(after),)
+        with self.__pool.reader() as dbman:
+            return dbman.query(
+                f"SELECT Time, Frame, State FROM {self.__table} "
+                f"WHERE User = ? AND Slot = ? {arg_after} "
+                f"ORDER BY Time {'DESC' if newest_first else 'ASC'} LIMIT ?",
+                params + (amount,),
+            )
+
+    def get_saves(
+        self, user: str, slot: str, amount: int, before: Optional[float] = None
+    ) -> list[dict]:
+        """
+        get a page of the latest saves of user in slot, the next page starts
+        before the time of the last save in this page
+
+        @param user: user id
+        @param slot: slot name
+        @param amount: max amount of saves in page
+        @param before: time of the last save of previous page, None for the latest
+        @return: list of {"time": time, "frame": progress, "state": state}
+        """
+        self.flush()
+        page = self.__page(user, slot, amount, before, newest_first=True)
+        return [{"time": i[0], "frame": i[1], "state": i[2]} for i in page]
+
+    def get_slots(self, user: str) -> list[str]:
+        """
+        get the slots of user
+
+        @param user: user id
+        @return: list of slot name
+        """
+        self.flush()
+        with self.__pool.reader() as dbman:
+            rows = dbman.query(
+                f"SELECT DISTINCT Slot FROM {self.__table} WHERE User = ? ORDER BY Slot",
+                (user,),
+            )
+        return [i[0] for i in rows]
+
+    def prune(
+        self,
+        user: str,
+        keep: Optional[int] = None,
+        before: Optional[float] = None,
+        slot: Optional[str] = None,
+    ) -> int:
+        """
+        remove the old saves of user, in every slot or the given slot
+
+        @param user: user id
+        @param keep: keep the latest saves of each slot
+        @param before: remove the saves older than this time
+        @param slot: only prune this slot
+        @return: amount of saves removed
+        """
+        self.flush()
+        arg_slot = "" if slot is None else "AND Slot = ?"
+        params: tuple = (user,) if slot is None else (user, slot)
+        removed = 0
+        with self.__writing() as dbman:
+            if before is not None:
+                removed += dbman.execute(
+                    f"DELETE FROM {self.__table} "
+                    f"WHERE User = ? {arg_slot} AND Time < ?",
+                    params + (float(before),),
+                )
+            if keep is not None:
+                removed += dbman.execute(
+                    f"""DELETE FROM {self.__table} WHERE ID IN (
+                        SELECT ID FROM (
+                            SELECT ID, ROW_NUMBER() OVER (
+                                PARTITION BY Slot ORDER BY Time DESC
+                            ) AS Rank
+                            FROM {self.__table} WHERE User = ? {arg_slot}
+                        ) WHERE Rank > ?
+                    )""",
+                    params + (int(keep),),
+                )
+        return removed
+
+    def export_saves(
+        self, user: Optional[str] = None, page_size: int = 1024
+    ) -> Iterator[dict]:
+        """
+        iterate over all the saves, or the saves of user, page by page so
+        only a page of saves is kept in memory
+
+        @param user: user id, None for all users
+        @param page_size: amount of saves fetched at once
+        @return: iterator of {"user", "slot", "time", "frame", "state"}
+        """
+        self.flush()
+        arg_user = "" if user is None else "AND User = ?"
+        params: tuple = () if user is None else (user,)
+        after = 0
+        while True:
+            with self.__pool.reader() as dbman:
+                page = dbman.query(
+                    f"SELECT ID, User, Slot, Time, Frame, State FROM {self.__table} "
+                    f"WHERE ID > ? {arg_user} ORDER BY ID LIMIT ?",
+                    (after,) + params + (page_size,),
+                )
+            for row in page:
+                yield {
+                    "user": row[1],
+                    "slot": row[2],
+                    "time": row[3],
+                    "frame": row[4],
+                    "state": row[5],
+                }
+            if len(page) < page_size:
+                return
+            after = page[-1][0]
+
+    def import_saves(self, saves: Iterable[dict], batch_size: int = 1024) -> int:
+        """
+        import the saves exported before, each batch is written in a single
+        transaction, a save replaces the save of the same user, slot and time
+
+        @param saves: iterable of {"user", "slot", "time", "frame", "state"}
+        @param batch_size: amount of saves written at once
+        @return: amount of saves imported
+        """
+        self.flush()
+        statement = self.__insert.replace("INSERT", "INSERT OR REPLACE", 1)
+        rows = (
+            (i["user"], i["slot"], float(i["time"]), int(i["frame"]), i.get("state"))
+            for i in saves
+        )
+        imported = 0
+        while batch := list(itertools.islice(rows, batch_size)):
+            with self.__writing() as dbman:
+                dbman.executemany(statement, batch)
+            imported += len(batch)
+        return imported
 
     def get_all_progress(self) -> list:
         """
         return all user's progress in dictionary with key is time, value is corresponded progress
 
-        @return: list of {time: progress}
+        @return: list of {time: progress}, ordered by time
+        """
+        return list(self.iter_progress())
+
+    def iter_progress(
+        self, newest_first: bool = False, page_size: int = 256
+    ) -> Iterator[dict]:
+        """
+        iterate over the progress ordered by time, fetched page by page
+
+        @param newest_first: start from the latest progress
+        @param page_size: amount of progress fetched at once
+        @return: iterator of {"time": time, "frame": progress}
+        """
+        self.flush()
+        after = None
+        while True:
+            page = self.__page(
+                DEFAULT_USER, self.__slot_name, page_size, after, newest_first
+            )
+            for cur_time, frame, _ in page:
+                yield {"time": cur_time, "frame": frame}
+            if len(page) < page_size:
+                return
+            after = page[-1][0]
+
+    def get_latest_progress(
+        self, amount: int, before: Optional[float] = None
+    ) -> list[dict]:
+        """
+        get a page of the latest progress, the next page starts before the
+        time of the last progress in this page
+
+        @param amount: max amount of progress in page
+        @param before: time of the last progress of previous page, None for
+                       the latest
+        @return: list of {"time": time, "frame": progress}, latest first
+        """
+        saves = self.get_saves(DEFAULT_USER, self.__slot_name, amount, before)
+        return [{"time": i["time"], "frame": i["frame"]} for i in saves]
+
+    def transaction(self):
+        """
+        group the changes of slot into a single commit, i.e. many saves,
+        under write-behind mode the saves are grouped by the writer instead
+
+            with game_save.transaction():
+                game_save.dump_progress(...)
+
+        @return: context manager of transaction
         """
-        raw_data = self.__dbman.select(self.__slot_name)
-        data = []
-        for i in raw_data.items():
-            data.append({"time": i[0], "frame": i[1]})
-        return data
+        self.flush()
+        return self.__writing()
 
     def close(self):
         """
-        close the game slot service
+        close the game slot service, the progress queued are written first
 
         @return:
         """
-        self.__dbman.close()
+        try:
+            if self.__writer is not None:
+                self.__writer.close()
+        finally:
+            release_pool(self.__db_dir)
 
     def print(self, limit=-1):
         """
@@ -132,7 +677,7 @@ class GameSave:
                     if limit == 0:
                         break
                     limit -= 1
-                print(i["time"][:16] + " " * 10 + i["frame"])
+                print(str(i["time"])[:16] + " " * 10 + str(i["frame"]))
 
             if limit == 0:
                 print("...")
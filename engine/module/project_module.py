@@ -2,12 +2,37 @@
 Manage Project, provide service to manage project, include add, remove, edit
 """
 
+import contextlib
+import json
 import os.path
+from bisect import bisect_left
 from enum import Enum
+from typing import Callable, Optional
+from pydantic import BaseModel
 from utils.exception import ProjectManagerError
 from utils import file_utils
+from .blob_module import BlobStore, file_digest
 from .config_module import ConfigLoader
 
+try:
+    from PIL import Image
+except ImportError:  # image dimensions are not reported without pillow
+    Image = None
+
+
+def load_manifest(manifest_dir: str) -> dict[str, dict[str, str]]:
+    """
+    load the manifest of blobs used by a project
+
+    @param manifest_dir: directory of manifest
+    @return: {category: {resources name: digest of blob}}, empty if not exist
+
+    """
+    if not file_utils.check_file_valid(manifest_dir):
+        return {}
+    with open(manifest_dir, "r", encoding="utf-8") as f:
+        return json.load(f)
+
 
 class ResourcesType(str, Enum):
     """
@@ -20,17 +45,152 @@ class ResourcesType(str, Enum):
     Character = "character"
 
 
+class ResourceQueryModel(BaseModel):
+    """
+    class for the query of resources by name, ordered by name
+
+    """
+
+    prefix: str = ""  # resources name start with
+    contains: str = ""  # resources name contain
+    offset: int = 0  # skip the first matched resources
+    limit: Optional[int] = None  # max amount of resources, None for all
+    meta: bool = False  # return the size, mtime and dimensions of resources
+
+
+class ResourceIndex:
+    """
+    sorted index of resources under a single category, scanned once and
+    kept until invalidated, so queries never touch the file system
+
+    """
+
+    def __init__(self, res_dir: str):
+        """
+        constructor for resource index
+
+        @param res_dir: directory of the category
+
+        """
+        self.__res_dir = res_dir
+        self.__names: list[str] = []  # sorted resources names
+        self.__stats: dict[str, tuple[int, int]] = {}  # {name: (size, mtime_ns)}
+        self.__dimensions: dict[str, tuple[int, Optional[list]]] = {}
+        self.__valid = False
+
+    def invalidate(self):
+        """
+        drop the index, rebuilt on next query
+
+        """
+        self.__valid = False
+
+    def __build(self):
+        """
+        scan the directory of category
+
+        """
+        stats = {}
+        if file_utils.check_folder_valid(self.__res_dir):
+            with os.scandir(self.__res_dir) as entries:
+                for entry in entries:
+                    if entry.name.startswith(".") or not entry.is_file():
+                        continue
+                    stat_result = entry.stat()
+                    stats[entry.name] = (stat_result.st_size, stat_result.st_mtime_ns)
+
+        self.__names = sorted(stats)
+        self.__stats = stats
+        self.__valid = True
+
+    def __get_dimensions(self, name: str) -> Optional[list]:
+        """
+        get the width and height of image, cached by modify time
+
+        @param name: resources name
+        @return: [width, height], or None if not an image
+
+        """
+        mtime = self.__stats[name][1]
+        cached = self.__dimensions.get(name)
+        if cached is not None and cached[0] == mtime:
+            return cached[1]
+
+        dimensions = None
+        if Image is not None:
+            try:
+                with Image.open(os.path.join(self.__res_dir, name)) as image:
+                    dimensions = list(image.size)
+            except Exception:  # not an image, i.e. music
+                dimensions = None
+        self.__dimensions[name] = (mtime, dimensions)
+        return dimensions
+
+    def query(
+        self,
+        prefix: str = "",
+        contains: str = "",
+        offset: int = 0,
+        limit: Optional[int] = None,
+        with_meta: bool = False,
+    ) -> dict:
+        """
+        query resources by name, ordered by name
+
+        @param prefix: resources name start with
+        @param contains: resources name contain
+        @param offset: skip the first matched resources
+        @param limit: max amount of resources, None for all
+        @param with_meta: return the size, mtime and dimensions of resources
+        @return: total amount of matched resources, and the matched page
+
+        """
+        if not self.__valid:
+            self.__build()
+        names = self.__names
+
+        if len(prefix) != 0:
+            start = bisect_left(names, prefix)
+            end = start
+            while end < len(names) and names[end].startswith(prefix):
+                end += 1
+            names = names[start:end]
+        if len(contains) != 0:
+            names = [i for i in names if contains in i]
+
+        page = names[offset:] if limit is None else names[offset : offset + limit]
+        if with_meta:
+            items = [
+                {
+                    "name": i,
+                    "size": self.__stats[i][0],
+                    "mtime": self.__stats[i][1] / 1e9,
+                    "dimensions": self.__get_dimensions(i),
+                }
+                for i in page
+            ]
+        else:
+            items = page
+        return {"total": len(names), "items": items}
+
+
 class ProjectManager:
     """
     project manager class
     """
 
-    def __init__(self, project_name: str, config_dir: str):
+    def __init__(
+        self,
+        project_name: str,
+        config_dir: str,
+        blob_store: Optional[BlobStore] = None,
+    ):
         """
         constructor for project manager
 
         @param project_name: the name of the project
         @param config_dir: directory of config
+        @param blob_store: store resources content in blob store if given
 
         """
 
@@ -39,6 +199,7 @@ class ProjectManager:
         self.__config_res = config.resources()
         project_base_dir = config.project()["projects_base"]
         self.__base = os.path.join(project_base_dir, project_name)
+        self.__resource_listeners: list[Callable[[str], None]] = []
 
         if not file_utils.check_folder_valid(self.__base):
             os.makedirs(self.__base)
@@ -48,6 +209,148 @@ class ProjectManager:
             if not file_utils.check_folder_valid(res_path_abs):
                 os.makedirs(res_path_abs)
             self.__config_res[i] = res_path_abs
+        self.__indexes: dict[str, ResourceIndex] = {
+            i: ResourceIndex(self.__config_res[i])
+            for i in ["background_dir", "music_dir", "character_dir"]
+        }
+
+        # {category: {resources name: digest of blob}} for resources in blob store
+        self.__blob_store = blob_store
+        self.__manifest_dir = os.path.join(
+            self.__base, config.blob_store()["manifest_name"]
+        )
+        self.__manifest: dict[str, dict[str, str]] = {
+            i: {} for i in ["background_dir", "music_dir", "character_dir"]
+        }
+        if blob_store is not None:
+            self.__manifest.update(load_manifest(self.__manifest_dir))
+
+    @staticmethod
+    def __get_category(rtype: ResourcesType) -> str:
+        """
+        get the category of resources type
+
+        @param rtype: resources type
+        @return: category, i.e. background_dir
+
+        """
+        if rtype == ResourcesType.Background:
+            return "background_dir"
+        if rtype == ResourcesType.Music:
+            return "music_dir"
+        if rtype == ResourcesType.Character:
+            return "character_dir"
+
+        raise ProjectManagerError(f"cannot find rtype: '{rtype}'")
+
+    def __manifest_lock(self):
+        """
+        get the lock guarding the manifest, which is the lock of blob store
+        so a blob is never collected while being recorded
+
+        @return: context manager of lock
+        """
+        if self.__blob_store is None:
+            return contextlib.nullcontext()
+        return self.__blob_store.lock()
+
+    def save_manifest(self):
+        """
+        write the manifest of blobs used by the project
+
+        """
+        if self.__blob_store is None:
+            return
+
+        with self.__manifest_lock():
+            temp_dir = self.__manifest_dir + ".tmp"
+            with open(temp_dir, "w", encoding="utf-8") as f:
+                json.dump(self.__manifest, f)
+            os.replace(temp_dir, self.__manifest_dir)
+
+    def get_blob_digests(self) -> set[str]:
+        """
+        get the digests of all the blobs used by the project
+
+        @return: set of digest
+        """
+        with self.__manifest_lock():
+            return {
+                digest
+                for items in self.__manifest.values()
+                for digest in items.values()
+            }
+
+    def store_resources(
+        self,
+        rtype: ResourcesType,
+        res_name: str,
+        file_dir: str,
+        digest: Optional[str] = None,
+        save_manifest: bool = True,
+    ):
+        """
+        move the file into the project as resources, through the blob store
+        if enabled
+
+        @param rtype: resources type
+        @param res_name: resources name
+        @param file_dir: file to be stored, consumed by the project
+        @param digest: digest of file content if already known
+        @param save_manifest: write the manifest, or leave to caller
+
+        """
+        cat = self.__get_category(rtype)
+        res_name = os.path.basename(res_name)
+        res_abs_dir = os.path.join(self.__config_res[cat], res_name)
+
+        if self.__blob_store is None:
+            os.replace(file_dir, res_abs_dir)
+            return
+
+        if digest is None:
+            digest = file_digest(file_dir)  # outside the lock of store
+        with self.__manifest_lock():
+            digest = self.__blob_store.put(file_dir, digest)
+            self.__blob_store.link(digest, res_abs_dir)
+            self.__manifest[cat][res_name] = digest
+        if save_manifest:
+            self.save_manifest()
+
+    def link_resources(self, rtype: ResourcesType, res_name: str, digest: str) -> bool:
+        """
+        add resources by the digest of content already in blob store
+
+        @param rtype: resources type
+        @param res_name: resources name
+        @param digest: digest of blob
+        @return: false if blob not in store
+
+        """
+        if self.__blob_store is None:
+            raise ProjectManagerError("blob store is not enabled")
+        cat = self.__get_category(rtype)
+        res_name = os.path.basename(res_name)
+        with self.__manifest_lock():
+            if not self.__blob_store.has(digest):
+                return False
+            self.__blob_store.link(
+                digest, os.path.join(self.__config_res[cat], res_name)
+            )
+            self.__manifest[cat][res_name] = digest
+        self.save_manifest()
+        return True
+
+    def get_resources_digest(self, rtype: ResourcesType, res_name: str) -> str | None:
+        """
+        get the digest of resources stored in blob store
+
+        @param rtype: resources type
+        @param res_name: resources name
+        @return: digest, or None if not in blob store
+
+        """
+        return self.__manifest[self.__get_category(rtype)].get(res_name)
 
     def __get_general_res(self, cat: str, filter_by: str = "") -> list:
         """
@@ -58,10 +361,7 @@ class ProjectManager:
         @return: get all resources in specified category
 
         """
-        res = file_utils.get_files_in_folder(self.__config_res[cat])
-        if len(filter_by) != 0:
-            return [i for i in res if filter_by in i]
-        return res
+        return self.__indexes[cat].query(contains=filter_by)["items"]
 
     def __delete_general_res(self, cat: str, res_name: str) -> bool:
         """
@@ -77,7 +377,13 @@ class ProjectManager:
 
         if not file_utils.check_file_valid(res_abs_dir):
             return False
-        return file_utils.delete_file(res_abs_dir)
+        status = file_utils.delete_file(res_abs_dir)
+        with self.__manifest_lock():
+            removed = self.__manifest[cat].pop(res_name, None)
+        if removed is not None:
+            self.save_manifest()
+        self.__notify_resource_listeners(cat)
+        return status
 
     def __rename_general_res(self, cat: str, res_name: str, new_name: str) -> bool:
         """
@@ -95,7 +401,54 @@ class ProjectManager:
             return False
 
         res_abs_dir = os.path.join(base, res_name)
-        return file_utils.rename_file(file_dir=res_abs_dir, new_name=new_name)
+        status = file_utils.rename_file(file_dir=res_abs_dir, new_name=new_name)
+        with self.__manifest_lock():
+            moved = status and res_name in self.__manifest[cat]
+            if moved:
+                # content is unchanged, only the manifest entry is moved
+                self.__manifest[cat][new_name] = self.__manifest[cat].pop(res_name)
+        if moved:
+            self.save_manifest()
+        self.__notify_resource_listeners(cat)
+        return status
+
+    def __notify_resource_listeners(self, cat: str):
+        """
+        tell the listeners that resources under specific category changed
+
+        @param cat: specified category
+
+        """
+        self.__indexes[cat].invalidate()
+        for listener in self.__resource_listeners:
+            listener(cat)
+
+    def add_resource_listener(self, listener: Callable[[str], None]):
+        """
+        register a listener called with the category (i.e. background_dir)
+        whenever resources are uploaded, deleted or renamed
+
+        @param listener: the listener to be called
+
+        """
+        self.__resource_listeners.append(listener)
+
+    def notify_resource_changed(self, rtype: ResourcesType):
+        """
+        tell the listeners that resources with rtype changed, used when
+        resources are written outside project manager, i.e. upload
+
+        @param rtype: resources type
+
+        """
+        if rtype == ResourcesType.Background:
+            self.__notify_resource_listeners("background_dir")
+        elif rtype == ResourcesType.Music:
+            self.__notify_resource_listeners("music_dir")
+        elif rtype == ResourcesType.Character:
+            self.__notify_resource_listeners("character_dir")
+        else:
+            raise ProjectManagerError(f"cannot find rtype: '{rtype}'")
 
     def delete_project(self) -> bool:
         """
@@ -127,6 +480,36 @@ class ProjectManager:
 
         raise ProjectManagerError(f"cannot find rtype: '{rtype}'")
 
+    def query_resources_by_rtype(
+        self,
+        rtype: ResourcesType,
+        *,
+        prefix: str = "",
+        contains: str = "",
+        offset: int = 0,
+        limit: Optional[int] = None,
+        with_meta: bool = False,
+    ) -> dict:
+        """
+        query the resources by resource type, ordered by name
+
+        @param rtype: resource type
+        @param prefix: resources name start with
+        @param contains: resources name contain
+        @param offset: skip the first matched resources
+        @param limit: max amount of resources, None for all
+        @param with_meta: return the size, mtime and dimensions of resources
+        @return: total amount of matched resources, and the matched page
+
+        """
+        return self.__indexes[self.__get_category(rtype)].query(
+            prefix=prefix,
+            contains=contains,
+            offset=offset,
+            limit=limit,
+            with_meta=with_meta,
+        )
+
     def delete_resources_by_rtype(self, rtype: ResourcesType, file_name: str) -> bool:
         """
         delete resources by resources type
@@ -0,0 +1,264 @@
+"""
+Thumbnail cache, generate downscaled previews of image resources
+"""
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Optional
+
+from utils import file_utils
+from utils.exception import ThumbnailError
+from .config_module import ConfigLoader
+
+try:
+    from PIL import Image
+except ImportError:  # thumbnails are disabled without pillow
+    Image = None
+
+THUMBNAIL_SUFFIX = ".png"
+
+
+def _render_thumbnail(src_dir: str, to_dir: str, size: int) -> int:
+    """
+    downscale the image to fit in a size x size box, run in worker process
+
+    @param src_dir: source image
+    @param to_dir: where to save the thumbnail
+    @param size: max width and height of thumbnail
+    @return: size of thumbnail file
+
+    """
+    temp_dir = os.path.join(
+        os.path.dirname(to_dir), f".{os.path.basename(to_dir)}.{os.getpid()}"
+    )
+    with Image.open(src_dir) as image:
+        image.thumbnail((size, size))
+        if image.mode not in ("RGB", "RGBA", "L", "LA"):
+            image = image.convert("RGBA")
+        image.save(temp_dir, format="PNG")
+    os.replace(temp_dir, to_dir)
+    return os.path.getsize(to_dir)
+
+
+class ThumbnailCache:
+    """
+    cache of thumbnails stored under the resources directory of project,
+    keyed by (rtype, item name, modify time, size) so a rewritten resource
+    never hits the stale thumbnail, the least recently used thumbnails are
+    removed once the cache excess its disk quota
+
+    """
+
+    GET_ATTEMPTS = 3  # generate again if evicted before used, up to this times
+
+    __executor: Optional[ProcessPoolExecutor] = None  # shared by all projects
+    __executor_lock = threading.Lock()
+
+    def __init__(self, project_dir: str, config_dir: str):
+        """
+        constructor for thumbnail cache
+
+        @param project_dir: project directory
+        @param config_dir: config directory
+
+        """
+        config = ConfigLoader(config_dir).thumbnail()
+        self.__cache_dir = os.path.join(project_dir, config["thumbnail_dir"])
+        self.__sizes: list[int] = sorted(int(i) for i in config["sizes"].split(","))
+        self.__quota = int(config["quota"])
+        self.__workers = int(config["workers"])
+
+        self.__lock = threading.Lock()
+        self.__entries: OrderedDict[str, int] = OrderedDict()  # {name: file size}
+        self.__total: int = 0
+        self.__pending: dict[str, Future] = {}  # {name: thumbnail in generation}
+
+        if not file_utils.check_folder_valid(self.__cache_dir):
+            os.makedirs(self.__cache_dir)
+
+        # recover the order of usage from the modify time of thumbnails
+        cached = []
+        for name in file_utils.get_files_in_folder(self.__cache_dir):
+            stat_result = os.stat(os.path.join(self.__cache_dir, name))
+            cached.append((stat_result.st_mtime_ns, name, stat_result.st_size))
+        for _, name, file_size in sorted(cached):
+            self.__entries[name] = file_size
+            self.__total += file_size
+
+    @staticmethod
+    def available() -> bool:
+        """
+        check if thumbnails can be generated, i.e. pillow is installed
+
+        @return: available or not
+
+        """
+        return Image is not None
+
+    @classmethod
+    def __get_executor(cls, workers: int) -> ProcessPoolExecutor:
+        """
+        get the process pool shared by all projects, create on first use
+
+        @param workers: amount of worker processes
+        @return: the process pool
+
+        """
+        with cls.__executor_lock:
+            if cls.__executor is None:
+                cls.__executor = ProcessPoolExecutor(max_workers=workers)
+            return cls.__executor
+
+    @classmethod
+    def shutdown(cls):
+        """
+        stop the shared process pool
+
+        """
+        with cls.__executor_lock:
+            if cls.__executor is not None:
+                cls.__executor.shutdown(wait=True)
+                cls.__executor = None
+
+    def fit_size(self, size: int) -> int:
+        """
+        get the smallest supported size not less than the given size
+
+        @param size: requested size
+        @return: supported size
+
+        """
+        for i in self.__sizes:
+            if i >= size:
+                return i
+        return self.__sizes[-1]
+
+    @staticmethod
+    def __key(rtype: str, src_dir: str, size: int) -> str:
+        """
+        file name of the thumbnail for the current version of resource
+
+        @param rtype: resources type
+        @param src_dir: source image
+        @param size: size of thumbnail
+        @return: file name of thumbnail
+
+        """
+        stat_result = os.stat(src_dir)
+        raw = f"{rtype}/{os.path.basename(src_dir)}/{stat_result.st_mtime_ns}/{size}"
+        return hashlib.sha1(raw.encode()).hexdigest() + THUMBNAIL_SUFFIX
+
+    def __submit(self, rtype: str, src_dir: str, size: int) -> tuple[str, Future]:
+        """
+        find the thumbnail, or start generating it
+
+        @param rtype: resources type
+        @param src_dir: source image
+        @param size: size of thumbnail
+        @return: file name of thumbnail, and future finished once recorded
+
+        """
+        if not self.available():
+            raise ThumbnailError("thumbnail is not available without pillow")
+        if not file_utils.check_file_valid(src_dir):
+            raise ThumbnailError(f"image '{src_dir}' not found")
+
+        name = self.__key(rtype, src_dir, self.fit_size(size))
+        with self.__lock:
+            if name in self.__entries:
+                self.__entries.move_to_end(name)
+                future = Future()
+                future.set_result(None)
+                return name, future
+            if name in self.__pending:
+                return name, self.__pending[name]
+
+            recorded = Future()
+            self.__pending[name] = recorded
+            generation = self.__get_executor(self.__workers).submit(
+                _render_thumbnail,
+                src_dir,
+                os.path.join(self.__cache_dir, name),
+                self.fit_size(size),
+            )
+
+        generation.add_done_callback(lambda f: self.__finish(name, f, recorded))
+        return name, recorded
+
+    def __finish(self, name: str, generation: Future, recorded: Future):
+        """
+        record the generated thumbnail and evict thumbnails over quota
+
+        @param name: file name of thumbnail
+        @param generation: the finished generation
+        @param recorded: future to be finished once recorded
+
+        """
+        with self.__lock:
+            self.__pending.pop(name, None)
+            if generation.exception() is not None:
+                recorded.set_exception(generation.exception())
+                return
+
+            self.__entries[name] = generation.result()
+            self.__total += self.__entries[name]
+            while self.__total > self.__quota and len(self.__entries) > 1:
+                evicted, file_size = self.__entries.popitem(last=False)
+                self.__total -= file_size
+                file_utils.delete_file(os.path.join(self.__cache_dir, evicted))
+        recorded.set_result(None)
+
+    def prefetch(self, rtype: str, src_dir: str, size: int):
+        """
+        start generating the thumbnail without waiting, i.e. after upload
+
+        @param rtype: resources type
+        @param src_dir: source image
+        @param size: size of thumbnail
+
+        """
+        if self.available():
+            self.__submit(rtype, src_dir, size)
+
+    def get(self, rtype: str, src_dir: str, size: int) -> str:
+        """
+        get the thumbnail, generate if not cached or evicted before used
+
+        @param rtype: resources type
+        @param src_dir: source image
+        @param size: requested size of thumbnail
+        @return: directory of thumbnail
+
+        """
+        for _ in range(self.GET_ATTEMPTS):
+            name, future = self.__submit(rtype, src_dir, size)
+            try:
+                future.result()
+            except Exception as e:
+                raise ThumbnailError(
+                    f"cannot generate thumbnail due to {str(e)}"
+                ) from e
+
+            thumbnail_dir = os.path.join(self.__cache_dir, name)
+            with self.__lock:
+                # might be evicted by other thumbnails since generated
+                if name in self.__entries:
+                    os.utime(thumbnail_dir)  # keep the order of usage across restart
+                    return thumbnail_dir
+        raise ThumbnailError("thumbnail is evicted before used, quota is too small")
+
+    def usage(self) -> dict:
+        """
+        get the disk usage of cache
+
+        @return: amount and total size of thumbnails, and the quota
+
+        """
+        with self.__lock:
+            return {
+                "amount": len(self.__entries),
+                "total": self.__total,
+                "quota": self.__quota,
+            }
@@ -2,22 +2,31 @@
 router service main entry
 
 """
-from fastapi import FastAPI, UploadFile, HTTPException
+from typing import Optional
+
+from fastapi import FastAPI, UploadFile, HTTPException, Request, Depends
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, Response, StreamingResponse
 
-from module.project_module import ResourcesType
+from module.project_module import ResourcesType, ResourceQueryModel
+from module.config_module import ConfigLoader
+from module.thumbnail_module import ThumbnailCache
 
 from utils.status import StatusCode
 from utils.return_type import ReturnList, ReturnDict, ReturnStatus
+from utils.task_dispatcher import TaskDispatcher
+from utils.db_pool import pools_metrics
+from utils.http_utils import file_response
 
 from kernel.engine import ENGINE_NAME, ENGINE_VERSION
 from kernel.frame import FrameModel
+from kernel.operation import FrameOperationModel
 
 from controller.project_controller import ProjectController
 from controller.resource_controller import ResourceController
 from controller.server_controller import ServerController
 from controller.engine_controller import EngineController
+from controller.gamesave_controller import GameSaveController
 
 # from typing import Optional
 
@@ -28,8 +37,15 @@ project_utils = ProjectController(config_dir=CONFIG_DIR)
 resources_utils = ResourceController(config_dir=CONFIG_DIR)
 server_utils = ServerController(config_dir=CONFIG_DIR)
 engine_utils = EngineController(config_dir=CONFIG_DIR)
+gamesave_utils = GameSaveController()
 # end register controllers
 
+# blocking work is run in thread pool, grouped by task for metrics
+dispatcher = TaskDispatcher(
+    max_workers=int(ConfigLoader(CONFIG_DIR).server()["max_workers"])
+)
+PROJECT_KEY = "project"  # key for work changing the task list
+
 origins = project_utils.cors_info["origins"].split(",")
 
 app = FastAPI(
@@ -75,13 +91,38 @@ async def ok_image():
     return FileResponse("static/ok.webp")
 
 
+@app.on_event("shutdown")
+def shutdown_dispatcher():
+    """
+    wait for the blocking work before shutdown
+
+    """
+    dispatcher.shutdown()
+    ThumbnailCache.shutdown()
+
+
+@app.get("/server/metrics", tags=["server"])
+async def server_metrics() -> ReturnDict:
+    """
+    get the metrics of blocking work, `queue_depth` is the amount of
+    unfinished work for each task, `db_pools` is the connections opened for
+    each database
+
+    """
+    metrics = dispatcher.metrics()
+    metrics["db_pools"] = pools_metrics()
+    return ReturnDict(status=StatusCode.OK, content=metrics)
+
+
 @app.post("/init_project", tags=["project"])
 async def initialize_project(base_dir: str) -> ReturnDict:
     """
     initialize project, create new if given directory not exist
 
     """
-    result = project_utils.init_project(base_dir=base_dir)
+    result = await dispatcher.run(
+        PROJECT_KEY, project_utils.init_project, base_dir=base_dir
+    )
     return result
 
 
@@ -100,7 +141,7 @@ async def remove_task(task_id: str) -> ReturnDict:
     remove task by task id
 
     """
-    return project_utils.remove_task(task_id=task_id)
+    return await dispatcher.run(PROJECT_KEY, project_utils.remove_task, task_id=task_id)
 
 
 @app.post("/list_projects", tags=["project"])
@@ -109,7 +150,7 @@ async def list_project() -> ReturnList:
     list all projects
 
     """
-    return project_utils.list_projects()
+    return await dispatcher.run(None, project_utils.list_projects)
 
 
 @app.post("/remove_project_by_id", tags=["project"])
@@ -118,7 +159,9 @@ async def remove_project_by_id(task_id: str) -> ReturnDict:
     remove the project
 
     """
-    return project_utils.remove_project_dir(task_id=task_id)
+    return await dispatcher.run(
+        PROJECT_KEY, project_utils.remove_project_dir, task_id=task_id
+    )
 
 
 @app.post("/remove_project", tags=["project"])
@@ -129,29 +172,56 @@ async def remove_project(project_name: str) -> ReturnStatus:
     """
     task_id = project_utils.get_task_id_by_project_name(project_name)
     if task_id is not None:
-        project_utils.remove_task(task_id=task_id)
-    return server_utils.delete_project(project_name=project_name)
+        await dispatcher.run(PROJECT_KEY, project_utils.remove_task, task_id=task_id)
+    result = await dispatcher.run(
+        PROJECT_KEY, server_utils.delete_project, project_name=project_name
+    )
+    await dispatcher.run(PROJECT_KEY, project_utils.collect_blobs)
+    return result
 
 
 @app.get("/resources/{rtype}/{item_name}", tags=["resources"])
 async def get_resources(
-    task_id: str, rtype: ResourcesType, item_name: str
-) -> FileResponse:
+    task_id: str,
+    rtype: ResourcesType,
+    item_name: str,
+    request: Request,
+    size: Optional[int] = None,
+) -> Response:
     """
-    get resources file
+    get resources file, support conditional request by ETag or Last-Modified
+    and byte range request, set size to get the downscaled image
 
     """
     task = project_utils.get_task(task_id)
     if task is None:
         raise HTTPException(status_code=400, detail="task id invalid")
 
-    resource_at = resources_utils.get_resources(
-        task=task, rtype=rtype, item_name=item_name
-    )
+    if size is not None:
+        resource_at = await dispatcher.run(
+            task_id,
+            resources_utils.get_thumbnail,
+            task=task,
+            rtype=rtype,
+            item_name=item_name,
+            size=size,
+        )
+    else:
+        resource_at = await dispatcher.run(
+            task_id,
+            resources_utils.get_resources,
+            task=task,
+            rtype=rtype,
+            item_name=item_name,
+        )
     if resource_at.status == StatusCode.FAIL:
         raise HTTPException(status_code=404, detail="item not found")
 
-    return FileResponse(resource_at.content[0])
+    return file_response(
+        resource_at.content[0],
+        request.headers,
+        cache_control=resources_utils.get_cache_control(rtype),
+    )
 
 
 @app.post("/get_res", tags=["resources"])
@@ -166,12 +236,38 @@ async def get_resources_name(
     if task is None:
         return ReturnList(status=StatusCode.FAIL, msg="no such task id")
 
-    result = resources_utils.get_resource_name(
-        task=task, rtype=rtype, filter_str=filter_by
+    result = await dispatcher.run(
+        task_id,
+        resources_utils.get_resource_name,
+        task=task,
+        rtype=rtype,
+        filter_str=filter_by,
     )
     return result
 
 
+@app.post("/query_res", tags=["resources"])
+async def query_resources(
+    task_id: str, rtype: ResourcesType, query: ResourceQueryModel = Depends()
+) -> ReturnDict:
+    """
+    query resources by name prefix or substring page by page, set meta to
+    get size, mtime and dimensions of resources
+
+    """
+    task = project_utils.get_task(task_id)
+    if task is None:
+        return ReturnDict(status=StatusCode.FAIL, msg="no such task id")
+
+    return await dispatcher.run(
+        task_id,
+        resources_utils.query_resources,
+        task=task,
+        rtype=rtype,
+        query=query,
+    )
+
+
 @app.delete("/remove_res", tags=["resources"])
 async def remove_resource(
     task_id: str, rtype: ResourcesType, item_name: str
@@ -184,7 +280,13 @@ async def remove_resource(
     if task is None:
         return ReturnList(status=StatusCode.FAIL, msg="no such task id")
 
-    return resources_utils.remove_resource(task=task, rtype=rtype, item_name=item_name)
+    return await dispatcher.run(
+        task_id,
+        resources_utils.remove_resource,
+        task=task,
+        rtype=rtype,
+        item_name=item_name,
+    )
 
 
 @app.post("/rename_res", tags=["resources"])
@@ -199,7 +301,9 @@ async def rename_project(
     if task is None:
         return ReturnDict(status=StatusCode.FAIL, msg="no such task id")
 
-    return resources_utils.rename_resource(
+    return await dispatcher.run(
+        task_id,
+        resources_utils.rename_resource,
         task=task,
         rtype=rtype,
         item_name=item_name,
@@ -219,7 +323,32 @@ async def upload_file(
     if task is None:
         return ReturnDict(status=StatusCode.FAIL, msg="no such task id")
 
-    return resources_utils.upload_file(task=task, rtype=rtype, file=file)
+    return await dispatcher.run(
+        task_id, resources_utils.upload_file, task=task, rtype=rtype, file=file
+    )
+
+
+@app.post("/upload_by_digest", tags=["resources"])
+async def upload_by_digest(
+    task_id: str, rtype: ResourcesType, item_name: str, digest: str
+) -> ReturnDict:
+    """
+    add resources by sha256 digest of content already in blob store,
+    fail if the content is unknown so the file should be uploaded
+
+    """
+    task = project_utils.get_task(task_id)
+    if task is None:
+        return ReturnDict(status=StatusCode.FAIL, msg="no such task id")
+
+    return await dispatcher.run(
+        task_id,
+        resources_utils.upload_by_digest,
+        task=task,
+        rtype=rtype,
+        item_name=item_name,
+        digest=digest,
+    )
 
 
 @app.post("/upload_files", tags=["resources"])
@@ -234,33 +363,66 @@ async def upload_files(
     if task is None:
         return ReturnList(status=StatusCode.FAIL, msg="no such task id")
 
-    return resources_utils.upload_files(task=task, rtype=rtype, files=files)
+    return await dispatcher.run(
+        task_id, resources_utils.upload_files, task=task, rtype=rtype, files=files
+    )
 
 
 @app.post("/engine/get_frame_ids", tags=["kernel"])
-async def get_fids(task_id: str, chapter_name: str) -> ReturnList:
+async def get_fids(
+    task_id: str,
+    chapter_name: str,
+    offset: int = 0,
+    limit: Optional[int] = None,
+    after_fid: Optional[int] = None,
+) -> ReturnList:
     """
-    get fids corresponding to the task id
+    get fids corresponding to the task id, all by default, or a page of
+    `limit` fids skipping `offset` fids, starting after the cursor `after_fid`
+    (i.e. the last fid of previous page) if given
 
     """
     task = project_utils.get_task(task_id)
     if task is None:
         return ReturnList(status=StatusCode.FAIL, msg="no such task id")
 
-    return engine_utils.get_frame_ids(task, chapter_name)
+    return await dispatcher.run(
+        task_id,
+        engine_utils.get_frame_ids,
+        task,
+        chapter_name,
+        offset=offset,
+        limit=limit,
+        after_fid=after_fid,
+    )
 
 
 @app.post("/engine/get_frame_names", tags=["kernel"])
-async def get_frame_names(task_id: str, chapter_name: str) -> ReturnList:
+async def get_frame_names(
+    task_id: str,
+    chapter_name: str,
+    offset: int = 0,
+    limit: Optional[int] = None,
+    after_fid: Optional[int] = None,
+) -> ReturnList:
     """
-    return the list of name of current chapter name
+    return the list of name of current chapter name, paged the same way
+    as `/engine/get_frame_ids`
 
     """
     task = project_utils.get_task(task_id)
     if task is None:
         return ReturnList(status=StatusCode.FAIL, msg="no such task id")
 
-    return engine_utils.get_frame_names(task, chapter_name)
+    return await dispatcher.run(
+        task_id,
+        engine_utils.get_frame_names,
+        task,
+        chapter_name,
+        offset=offset,
+        limit=limit,
+        after_fid=after_fid,
+    )
 
 
 @app.delete("/engine/remove_frame", tags=["kernel"])
@@ -273,7 +435,7 @@ async def remove_frame(task_id: str, fid: int) -> ReturnList:
     if task is None:
         return ReturnList(status=StatusCode.FAIL, msg="no such task id")
 
-    return engine_utils.remove_frame(task, fid)
+    return await dispatcher.run(task_id, engine_utils.remove_frame, task, fid)
 
 
 @app.post("/engine/append_frame", tags=["kernel"])
@@ -292,7 +454,9 @@ async def append_frame(
     if task is None:
         return ReturnList(status=StatusCode.FAIL, msg="no such task id")
 
-    return engine_utils.append_frame(task, to_chapter, frame_name)
+    return await dispatcher.run(
+        task_id, engine_utils.append_frame, task, to_chapter, frame_name
+    )
 
 
 @app.post("/engine/modify_frame", tags=["kernel"])
@@ -316,7 +480,58 @@ async def modify_frame(
     if task is None:
         return ReturnStatus(status=StatusCode.FAIL, msg="no such task id")
 
-    return engine_utils.modify_frame(task, fid, frame_component_raw)
+    return await dispatcher.run(
+        task_id, engine_utils.modify_frame, task, fid, frame_component_raw
+    )
+
+
+@app.post("/engine/move_frame", tags=["kernel"])
+async def move_frame(
+    task_id: str, fid: int, after_fid: int = -1, to_chapter: str = None
+) -> ReturnList:
+    """
+    move the frame after `after_fid`, or to the head of `to_chapter` if
+    `after_fid` is -1, the frame keeps its fid
+
+    """
+    task = project_utils.get_task(task_id)
+    if task is None:
+        return ReturnList(status=StatusCode.FAIL, msg="no such task id")
+
+    return await dispatcher.run(
+        task_id, engine_utils.move_frame, task, fid, after_fid, to_chapter
+    )
+
+
+@app.post("/engine/batch", tags=["kernel"])
+async def apply_batch(
+    task_id: str, operations: list[FrameOperationModel], force: bool = False
+) -> ReturnList:
+    """
+    apply a list of frame operations as a unit and save the change once,
+    if any operation fails, none of them is applied
+
+    **op define:**
+
+    --------------------
+    append: append `frame` to the end of `chapter`
+    insert: insert `frame` after `after_fid`, or to the head of `chapter` if -1
+    modify: replace the content of `fid` by `frame`
+    remove: remove `fid`
+    move: move `fid` after `after_fid`, or to the head of `chapter` if -1
+    --------------------
+
+    leave `frame` empty to use an empty frame named `frame_name`, empty
+    frames are not checked
+
+    """
+    task = project_utils.get_task(task_id)
+    if task is None:
+        return ReturnList(status=StatusCode.FAIL, msg="no such task id")
+
+    return await dispatcher.run(
+        task_id, engine_utils.apply_batch, task, operations, force
+    )
 
 
 @app.post("/engine/get_frame", tags=["kernel"])
@@ -329,11 +544,65 @@ async def get_frame(task_id: str, fid: int) -> ReturnDict:
     if task is None:
         return ReturnDict(status=StatusCode.FAIL, msg="no such task id")
 
-    return engine_utils.get_frame(task=task, fid=fid)
+    reply = await dispatcher.run(
+        task_id, engine_utils.get_frame_json, task=task, fid=fid
+    )
+    return Response(content=reply, media_type="application/json")
+
+
+@app.post("/engine/get_frames", tags=["kernel"])
+async def get_frames(
+    task_id: str,
+    fids: Optional[list[int]] = None,
+    chapter: Optional[str] = None,
+    offset: int = 0,
+    limit: Optional[int] = None,
+) -> ReturnDict:
+    """
+    get many frames in one call
+
+    `fids:` optional, list of frame id in the body
+
+    `chapter`, `offset`, `limit:` optional, fetch a window of frames in the
+    chapter when fids not given
+
+    `content.frames` maps frame id to frame, `content.missing` lists the frame
+    id not found
+
+    """
+    task = project_utils.get_task(task_id)
+    if task is None:
+        return ReturnDict(status=StatusCode.FAIL, msg="no such task id")
+
+    return await dispatcher.run(
+        task_id,
+        engine_utils.get_frames,
+        task=task,
+        fids=fids,
+        chapter_name=chapter,
+        offset=offset,
+        limit=limit,
+    )
+
+
+@app.post("/engine/validate", tags=["kernel"])
+async def validate(task_id: str) -> ReturnDict:
+    """
+    check the resources referred by every frame in the project,
+    `content.errors` maps invalid frame id to the reason
+
+    """
+    task = project_utils.get_task(task_id)
+    if task is None:
+        return ReturnDict(status=StatusCode.FAIL, msg="no such task id")
+
+    return await dispatcher.run(task_id, engine_utils.validate, task=task)
 
 
 @app.post("/engine/get_struct", tags=["kernel"])
-async def get_struct(task_id: str, chapter: str = None) -> ReturnDict:
+async def get_struct(
+    task_id: str, chapter: str = None, offset: int = 0, limit: Optional[int] = None
+) -> ReturnDict:
     """
     `task_id:` id of the task
 
@@ -342,12 +611,21 @@ async def get_struct(task_id: str, chapter: str = None) -> ReturnDict:
     if given, return content contains all the frame id of the current chapter,
     if not , return 2d array of frame id of the project
 
+    `offset`, `limit:` optional, only return a window of frame id of each chapter
+
     """
     task = project_utils.get_task(task_id)
     if task is None:
         return ReturnDict(status=StatusCode.FAIL, msg="no such task id")
 
-    return engine_utils.render_struct(task=task, chapter_name=chapter)
+    return await dispatcher.run(
+        task_id,
+        engine_utils.render_struct,
+        task=task,
+        chapter_name=chapter,
+        offset=offset,
+        limit=limit,
+    )
 
 
 @app.post("/engine/get_chapters", tags=["kernel"])
@@ -360,7 +638,7 @@ async def get_chapters(task_id: str) -> ReturnList:
     if task is None:
         return ReturnList(status=StatusCode.FAIL, msg="no such task id")
 
-    return engine_utils.get_chapters(task=task)
+    return await dispatcher.run(task_id, engine_utils.get_chapters, task=task)
 
 
 @app.post("/engine/add_chapter", tags=["kernel"])
@@ -373,7 +651,9 @@ async def add_chapters(task_id: str, chapter_name: str) -> ReturnStatus:
     if task is None:
         return ReturnList(status=StatusCode.FAIL, msg="no such task id")
 
-    return engine_utils.add_chapter(task=task, chapter_name=chapter_name)
+    return await dispatcher.run(
+        task_id, engine_utils.add_chapter, task=task, chapter_name=chapter_name
+    )
 
 
 @app.delete("/engine/remove_chapter", tags=["kernel"])
@@ -386,7 +666,9 @@ async def remove_chapter(task_id: str, chapter_name: str = None) -> ReturnStatus
     if task is None:
         return ReturnDict(status=StatusCode.FAIL, msg="no such task id")
 
-    return engine_utils.remove_chapter(task, chapter_name)
+    return await dispatcher.run(
+        task_id, engine_utils.remove_chapter, task, chapter_name
+    )
 
 
 @app.post("/engine/engine_meta", tags=["meta"])
@@ -399,4 +681,160 @@ async def engine_meta(task_id: str) -> ReturnDict:
     if task is None:
         return ReturnDict(status=StatusCode.FAIL, msg="no such task id")
 
-    return engine_utils.get_engine_meta(task)
+    return await dispatcher.run(task_id, engine_utils.get_engine_meta, task)
+
+
+@app.post("/gamesave/save", tags=["gamesave"])
+async def save_game(
+    task_id: str, user: str, slot: str, frame: int, state: Optional[str] = None
+) -> ReturnDict:
+    """
+    save the progress of user into slot
+
+    `state:` optional, state of game encoded by base64
+
+    `content.time` is the time of save, which identifies the save in slot
+
+    """
+    task = project_utils.get_task(task_id)
+    if task is None:
+        return ReturnDict(status=StatusCode.FAIL, msg="no such task id")
+
+    return await dispatcher.run(
+        task_id,
+        gamesave_utils.save,
+        task=task,
+        user=user,
+        slot=slot,
+        frame=frame,
+        state=state,
+    )
+
+
+@app.post("/gamesave/list", tags=["gamesave"])
+async def list_saves(
+    task_id: str,
+    user: str,
+    slot: str,
+    amount: int = 20,
+    before: Optional[float] = None,
+) -> ReturnList:
+    """
+    get a page of the latest saves of user in slot, latest first
+
+    `before:` optional, time of the last save of previous page
+
+    """
+    task = project_utils.get_task(task_id)
+    if task is None:
+        return ReturnList(status=StatusCode.FAIL, msg="no such task id")
+
+    return await dispatcher.run(
+        task_id,
+        gamesave_utils.get_saves,
+        task=task,
+        user=user,
+        slot=slot,
+        amount=amount,
+        before=before,
+    )
+
+
+@app.post("/gamesave/slots", tags=["gamesave"])
+async def list_slots(task_id: str, user: str) -> ReturnList:
+    """
+    get the slots of user
+
+    """
+    task = project_utils.get_task(task_id)
+    if task is None:
+        return ReturnList(status=StatusCode.FAIL, msg="no such task id")
+
+    return await dispatcher.run(task_id, gamesave_utils.get_slots, task=task, user=user)
+
+
+@app.delete("/gamesave/remove", tags=["gamesave"])
+async def remove_save(task_id: str, user: str, slot: str, time: float) -> ReturnDict:
+    """
+    remove a save of user, identified by its time
+
+    """
+    task = project_utils.get_task(task_id)
+    if task is None:
+        return ReturnDict(status=StatusCode.FAIL, msg="no such task id")
+
+    return await dispatcher.run(
+        task_id,
+        gamesave_utils.remove_save,
+        task=task,
+        user=user,
+        slot=slot,
+        save_time=time,
+    )
+
+
+@app.delete("/gamesave/prune", tags=["gamesave"])
+async def prune_saves(
+    task_id: str,
+    user: str,
+    keep: Optional[int] = None,
+    before: Optional[float] = None,
+    slot: Optional[str] = None,
+) -> ReturnDict:
+    """
+    remove the old saves of user
+
+    `keep:` optional, keep the latest saves of each slot
+
+    `before:` optional, remove the saves older than this time
+
+    `slot:` optional, only prune this slot
+
+    """
+    task = project_utils.get_task(task_id)
+    if task is None:
+        return ReturnDict(status=StatusCode.FAIL, msg="no such task id")
+
+    return await dispatcher.run(
+        task_id,
+        gamesave_utils.prune,
+        task=task,
+        user=user,
+        keep=keep,
+        before=before,
+        slot=slot,
+    )
+
+
+@app.get("/gamesave/export", tags=["gamesave"])
+async def export_saves(task_id: str, user: Optional[str] = None):
+    """
+    export the saves as json lines, one save per line, streamed page by page
+
+    `user:` optional, only export the saves of user
+
+    """
+    task = project_utils.get_task(task_id)
+    if task is None:
+        return ReturnDict(status=StatusCode.FAIL, msg="no such task id")
+
+    return StreamingResponse(
+        gamesave_utils.export_saves(task=task, user=user),
+        media_type="application/x-ndjson",
+    )
+
+
+@app.post("/gamesave/import", tags=["gamesave"])
+async def import_saves(task_id: str, file: UploadFile) -> ReturnDict:
+    """
+    import the saves exported before, a save replaces the save of the same
+    user, slot and time
+
+    """
+    task = project_utils.get_task(task_id)
+    if task is None:
+        return ReturnDict(status=StatusCode.FAIL, msg="no such task id")
+
+    return await dispatcher.run(
+        task_id, gamesave_utils.import_saves, task=task, file=file
+    )
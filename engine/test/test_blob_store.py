@@ -0,0 +1,145 @@
+import sys
+
+sys.path.append("..")
+
+import configparser
+import errno
+import hashlib
+import os
+from unittest import TestCase
+from unittest.mock import patch
+from controller.project_controller import ProjectController
+from module.blob_module import BlobStore, file_digest
+from module.project_module import ProjectManager, ResourcesType
+from utils.exception import BlobStoreError
+from utils.file_utils import delete_folder
+
+
+class TestBlobStore(TestCase):
+    """
+    A test case class for testing the BlobStore class and its use in ProjectManager.
+    """
+
+    BASE_DIR = "./projects/test_blob"
+    STORE_DIR = "./projects/test_blob/.blobs"
+
+    def setUp(self):
+        """
+        Create a config with blob store enabled.
+        """
+        delete_folder(self.BASE_DIR)
+        os.makedirs(self.BASE_DIR)
+        config = configparser.ConfigParser()
+        config.read("../service.ini")
+        config["Project"]["projects_base"] = self.BASE_DIR
+        config["BlobStore"]["enable"] = "true"
+        config["BlobStore"]["store_dir"] = self.STORE_DIR
+        self.config_dir = os.path.join(self.BASE_DIR, "service.ini")
+        with open(self.config_dir, "w") as f:
+            config.write(f)
+        self.store = BlobStore(self.STORE_DIR)
+
+    def tearDown(self):
+        """
+        Remove the projects and store.
+        """
+        delete_folder(self.BASE_DIR)
+
+    def write_file(self, name: str, content: bytes) -> str:
+        """
+        Write a temporary file to be stored.
+        """
+        file_dir = os.path.join(self.BASE_DIR, name)
+        with open(file_dir, "wb") as f:
+            f.write(content)
+        return file_dir
+
+    def test_put(self):
+        """
+        Test case for putting and linking blobs.
+        It asserts that identical content is stored once and unused blobs are collected.
+        """
+        digest = self.store.put(self.write_file("a", b"sprite"))
+        self.assertEqual(digest, hashlib.sha256(b"sprite").hexdigest())
+        self.assertEqual(self.store.put(self.write_file("b", b"sprite")), digest)
+        self.assertFalse(os.path.exists(os.path.join(self.BASE_DIR, "b")))
+        self.assertTrue(self.store.has(digest))
+
+        to_dir = os.path.join(self.BASE_DIR, "linked.png")
+        self.store.link(digest, to_dir)
+        self.assertEqual(file_digest(to_dir), digest)
+        self.assertEqual(self.store.collect(lambda: {digest}), 0)
+
+        self.assertEqual(self.store.collect(set), 1)
+        self.assertFalse(self.store.has(digest))
+        self.assertTrue(os.path.isfile(to_dir))
+
+        with self.assertRaises(BlobStoreError):
+            self.store.link(digest, to_dir)
+        with self.assertRaises(BlobStoreError):
+            self.store.has("../../etc/passwd")
+
+    def test_project(self):
+        """
+        Test case for ProjectManager with blob store.
+        It asserts the sharing between projects, rename by manifest and link by digest.
+        """
+        project_a = ProjectManager("a", self.config_dir, self.store)
+        project_b = ProjectManager("b", self.config_dir, self.store)
+        rtype = ResourcesType.Character
+        digest = hashlib.sha256(b"sprite").hexdigest()
+
+        project_a.store_resources(rtype, "c.png", self.write_file("t1", b"sprite"))
+        project_b.store_resources(rtype, "d.png", self.write_file("t2", b"sprite"))
+        a_dir = os.path.join(project_a.get_dir_by_rtype(rtype), "c.png")
+        b_dir = os.path.join(project_b.get_dir_by_rtype(rtype), "d.png")
+        self.assertEqual(os.stat(a_dir).st_ino, os.stat(b_dir).st_ino)
+        self.assertEqual(project_a.get_resources_digest(rtype, "c.png"), digest)
+
+        self.assertTrue(project_a.rename_resources_by_rtype(rtype, "c.png", "e.png"))
+        self.assertIsNone(project_a.get_resources_digest(rtype, "c.png"))
+        self.assertEqual(project_a.get_resources_digest(rtype, "e.png"), digest)
+        self.assertEqual(project_a.get_resources_by_rtype(rtype), ["e.png"])
+
+        # the manifest is kept on disk
+        project_a = ProjectManager("a", self.config_dir, self.store)
+        self.assertEqual(project_a.get_resources_digest(rtype, "e.png"), digest)
+
+        self.assertTrue(
+            project_a.link_resources(ResourcesType.Background, "f.png", digest)
+        )
+        self.assertFalse(project_a.link_resources(rtype, "g.png", "0" * 64))
+
+        self.assertTrue(project_b.delete_resources_by_rtype(rtype, "d.png"))
+        self.assertIsNone(project_b.get_resources_digest(rtype, "d.png"))
+        self.assertEqual(project_b.get_blob_digests(), set())
+        self.assertEqual(project_a.get_blob_digests(), {digest})
+        self.assertEqual(self.store.collect(project_a.get_blob_digests), 0)
+        project_a.delete_project()
+        self.assertEqual(self.store.collect(project_b.get_blob_digests), 1)
+
+    def test_copied(self):
+        """
+        Test case for blobs copied instead of hard linked, i.e. across file systems.
+        It asserts that a blob recorded in a manifest is kept by the controller
+        though it has no other link, and collected once no project uses it.
+        """
+        controller = ProjectController(self.config_dir)
+        task_id = controller.init_project("a").content["task_id"]
+        project_a = controller.get_task(task_id).project_manager
+        rtype = ResourcesType.Character
+
+        with patch("os.link", side_effect=OSError(errno.EXDEV, "cross device")):
+            project_a.store_resources(rtype, "c.png", self.write_file("t1", b"copy"))
+        digest = project_a.get_resources_digest(rtype, "c.png")
+        self.assertEqual(os.stat(self.store.get_blob_dir(digest)).st_nlink, 1)
+        self.assertEqual(controller.collect_blobs(), 0)
+
+        # the manifest of a project not opened by any task is read from disk
+        controller.remove_task(task_id)
+        self.assertEqual(controller.collect_blobs(), 0)
+        self.assertTrue(self.store.has(digest))
+
+        task_id = controller.init_project("a").content["task_id"]
+        controller.remove_project_dir(task_id)
+        self.assertFalse(self.store.has(digest))
@@ -0,0 +1,118 @@
+import sys
+
+sys.path.append("..")
+
+import pickle
+from unittest import TestCase
+from kernel.chapter import Chapter
+from kernel.frame import FrameInfo
+from kernel.component.meta import FrameMeta
+
+
+class TestChapter(TestCase):
+    """
+    A test case class for testing the Chapter class.
+    """
+
+    def make_chapter(self, amount: int) -> Chapter:
+        """
+        Make a chapter with frames 0 ~ amount - 1 in order.
+        """
+        chapter = Chapter("test")
+        for fid in range(amount):
+            chapter.append_frame_info(FrameInfo(fid, FrameMeta(str(fid))))
+        return chapter
+
+    def test_append(self):
+        """
+        Test case for append_frame_info.
+        It appends over several blocks and asserts the order is kept.
+        """
+        amount = Chapter.BLOCK_SIZE * 3 + 7
+        chapter = self.make_chapter(amount)
+        self.assertEqual(chapter.get_all_fid(), list(range(amount)))
+        self.assertEqual(chapter.length(), amount)
+        self.assertEqual(chapter.get_head_fid(), 0)
+        self.assertEqual(chapter.get_tail_fid(), amount - 1)
+        self.assertEqual(chapter.get_frame_info(5).meta.name, "5")
+
+    def test_insert(self):
+        """
+        Test case for insert_frame_info.
+        It inserts at the head and repeatedly into one block to force a split,
+        and compares against a plain list.
+        """
+        chapter = self.make_chapter(10)
+        expected = list(range(10))
+        chapter.insert_frame_info(FrameInfo(100, FrameMeta()), -1)
+        expected.insert(0, 100)
+        for fid in range(101, 101 + Chapter.BLOCK_SIZE * 3):
+            chapter.insert_frame_info(FrameInfo(fid, FrameMeta()), 5)
+            expected.insert(expected.index(5) + 1, fid)
+        self.assertEqual(chapter.get_all_fid(), expected)
+        for fid in (100, 5, 101, 9, expected[-1]):
+            self.assertEqual(chapter.index_of(fid), expected.index(fid))
+
+    def test_remove(self):
+        """
+        Test case for remove_fid.
+        It removes frames from several blocks and asserts positions are updated.
+        """
+        amount = Chapter.BLOCK_SIZE * 2 + 3
+        chapter = self.make_chapter(amount)
+        expected = list(range(amount))
+        for fid in list(range(0, amount, 3)) + list(range(Chapter.BLOCK_SIZE)):
+            if fid in expected:
+                self.assertEqual(chapter.remove_fid(fid), fid)
+                expected.remove(fid)
+        self.assertEqual(chapter.remove_fid(0), -1)
+        self.assertEqual(chapter.get_all_fid(), expected)
+        self.assertEqual(chapter.index_of(expected[-1]), len(expected) - 1)
+        self.assertEqual(chapter.index_of(0), -1)
+        self.assertFalse(chapter.has_fid(0))
+
+        for fid in expected:
+            chapter.remove_fid(fid)
+        self.assertEqual(chapter.get_tail_fid(), -1)
+        self.assertEqual(chapter.get_all_fid(), [])
+
+    def test_pickle(self):
+        """
+        Test case for pickling the chapter.
+        It asserts that the pickled chapter keeps the layout used by the older
+        kernel and can be loaded back.
+        """
+        chapter = self.make_chapter(Chapter.BLOCK_SIZE + 1)
+        loaded = pickle.loads(pickle.dumps(chapter))
+        self.assertEqual(loaded.get_all_fid(), chapter.get_all_fid())
+        self.assertEqual(loaded.index_of(Chapter.BLOCK_SIZE), Chapter.BLOCK_SIZE)
+        self.assertEqual(
+            chapter.__getstate__()["_Chapter__fid_list"], chapter.get_all_fid()
+        )
+
+    def test_window(self):
+        """
+        Test case for get_fids and get_frame_names with a window.
+        It pages through several blocks by offset and by cursor and compares
+        against slices of the whole list.
+        """
+        amount = Chapter.BLOCK_SIZE * 3 + 7
+        chapter = self.make_chapter(amount)
+        expected = chapter.get_all_fid()
+        self.assertEqual(chapter.get_fids(), expected)
+        for offset in (0, 5, Chapter.BLOCK_SIZE, Chapter.BLOCK_SIZE * 3 + 5, amount):
+            self.assertEqual(
+                chapter.get_fids(offset, 10), expected[offset : offset + 10]
+            )
+
+        pages, after_fid = [], None
+        while page := chapter.get_fids(
+            limit=Chapter.BLOCK_SIZE - 1, after_fid=after_fid
+        ):
+            pages.extend(page)
+            after_fid = page[-1]
+        self.assertEqual(pages, expected)
+        self.assertEqual(chapter.get_fids(after_fid=amount), [])
+
+        self.assertEqual(chapter.get_frame_names(2, 3), ["2", "3", "4"])
+        self.assertEqual(chapter.get_frame_names(limit=2, after_fid=5), ["6", "7"])
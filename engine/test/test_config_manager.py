@@ -63,6 +63,14 @@ class TestConfigLoader(TestCase):
         game_version_config = self.config.version()
         self.assertEqual(game_version_config["name"], "VNEditor Service")
 
+    def test_server(self):
+        """
+        Test case for the server method of ConfigLoader.
+        It asserts that the 'max_workers' value in the server configuration is a positive number.
+        """
+        game_server_config = self.config.server()
+        self.assertGreater(int(game_server_config["max_workers"]), 0)
+
     def test_cors(self):
         """
         Test case for the cors method of ConfigLoader.
@@ -86,6 +86,74 @@ class TestDBManager(TestCase):
         self.db.push("key", "value", test_table_name)
         self.db.remove("key", test_table_name)
 
+    def test_quoted_value(self):
+        """
+        Test case for keys and values with quotes.
+        It asserts that they are stored as they are, as statements are
+        parameterized.
+        """
+        test_table_name = "test_table"
+        self.db.drop_table(test_table_name)
+        self.db.create_table_if_not_exist(test_table_name)
+        data = {'a"b': "it's", "x'); DROP TABLE test_table; --": '"'}
+        self.db.push_dict(data, test_table_name)
+        self.db.update('a"b', 'say "hi"', test_table_name)
+        self.db.commit()
+        self.assertDictEqual(
+            self.db.select(test_table_name),
+            {'a"b': 'say "hi"', "x'); DROP TABLE test_table; --": '"'},
+        )
+        with self.assertRaises(DBManagerError):
+            self.db.create_table_if_not_exist("t; DROP TABLE test_table")
+
+    def test_transaction(self):
+        """
+        Test case for the transaction method of DBManager.
+        It asserts that a failed transaction is rolled back as a whole, and a
+        failed nested transaction only drops its own change.
+        """
+        test_table_name = "test_table"
+        self.db.drop_table(test_table_name)
+        self.db.create_table_if_not_exist(test_table_name)
+        self.db.commit()
+
+        with self.assertRaises(DBManagerError):
+            with self.db.transaction():
+                self.db.push("a", "1", test_table_name)
+                self.db.push("a", "2", test_table_name)
+        self.assertDictEqual(self.db.select(test_table_name), {})
+
+        with self.db.transaction():
+            self.db.push("a", "1", test_table_name)
+            try:
+                with self.db.transaction():
+                    self.db.push("b", "2", test_table_name)
+                    self.db.push("a", "3", test_table_name)
+            except DBManagerError:
+                pass
+            self.db.push("c", "4", test_table_name)
+        self.db.rollback()  # nothing left to drop, all committed
+        self.assertDictEqual(self.db.select(test_table_name), {"a": "1", "c": "4"})
+
+    def test_select(self):
+        """
+        Test case for ordered, paginated and typed selects.
+        It asserts the order and offset of the typed rows.
+        """
+        test_table_name = "test_typed"
+        self.db.drop_table(test_table_name)
+        self.db.create_table_if_not_exist(test_table_name, "INTEGER", "REAL")
+        self.db.push_dict({i: i / 2 for i in range(10)}, test_table_name)
+        self.assertEqual(
+            list(self.db.select(test_table_name, True, amount=2, offset=1)),
+            [8, 7],
+        )
+        self.assertEqual(
+            list(self.db.select(test_table_name, order_by="Key", offset=8)), [8, 9]
+        )
+        with self.assertRaises(DBManagerError):
+            self.db.select(test_table_name, order_by="Key; DROP")
+
     def test_zexception(self):
         """
         Test case for handling exceptions in DBManager methods.
@@ -0,0 +1,197 @@
+import sys
+
+sys.path.append("..")
+
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from unittest import TestCase
+from module.gamesave_module import GameSave
+from utils.db_pool import ConnectionPool, acquire_pool, release_pool, pools_metrics
+from utils.exception import DBManagerError
+from utils.file_utils import delete_folder
+
+
+class TestConnectionPool(TestCase):
+    """
+    A test case class for testing the ConnectionPool class.
+    """
+
+    BASE_DIR = "./projects/test_db_pool"
+    DB_DIR = "./projects/test_db_pool/pool.db"
+
+    def setUp(self):
+        """
+        Create a database with a table.
+        """
+        delete_folder(self.BASE_DIR)
+        os.makedirs(self.BASE_DIR)
+        self.pool = ConnectionPool(self.DB_DIR, max_readers=2, wait_timeout=0.2)
+        with self.pool.writer() as db:
+            db.execute("CREATE TABLE t (V INTEGER)")
+            db.commit()
+
+    def tearDown(self):
+        """
+        Close the pool and remove the database.
+        """
+        self.pool.close()
+        delete_folder(self.BASE_DIR)
+
+    def count(self) -> int:
+        """
+        Count the rows from a reader of another thread.
+        """
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            return executor.submit(self.read_count).result()
+
+    def read_count(self) -> int:
+        """
+        Count the rows from a reader.
+        """
+        with self.pool.reader() as db:
+            return db.query("SELECT COUNT(*) FROM t")[0][0]
+
+    def test_writer(self):
+        """
+        Test case for the writer connection.
+        It asserts that the writer is held again by the same thread, and that
+        its changes are only seen by other threads after commit.
+        """
+        with self.pool.writer() as db:
+            with db.transaction():
+                db.execute("INSERT INTO t VALUES (1)")
+                with self.pool.writer() as inner:
+                    self.assertIs(inner, db)
+                self.assertEqual(self.read_count(), 1)
+                self.assertEqual(self.count(), 0)
+        self.assertEqual(self.count(), 1)
+
+        with self.pool.reader() as db:
+            with self.assertRaises(DBManagerError):
+                db.execute("INSERT INTO t VALUES (2)")
+
+    def test_wait(self):
+        """
+        Test case for waiting for a connection.
+        It asserts that the amount of readers is bounded, and that a writer
+        is held by one thread at a time.
+        """
+        holding = threading.Event()
+        release = threading.Event()
+
+        def hold():
+            with self.pool.reader(), self.pool.reader():
+                holding.set()
+                release.wait()
+
+        thread = threading.Thread(target=hold)
+        thread.start()
+        holding.wait()
+        self.assertEqual(self.pool.metrics()["readers_in_use"], 2)
+        with self.assertRaises(DBManagerError):
+            with self.pool.reader():
+                pass
+        release.set()
+        thread.join()
+        self.assertEqual(self.read_count(), 0)
+
+        with self.pool.writer():
+            with ThreadPoolExecutor(max_workers=1) as executor:
+                with self.assertRaises(DBManagerError):
+                    executor.submit(lambda: self.pool.writer().__enter__()).result()
+
+        metrics = self.pool.metrics()
+        self.assertEqual(metrics["readers_open"], 2)
+        self.assertEqual(metrics["opened"], 3)
+        self.assertGreater(metrics["waits"], 0)
+
+    def test_reap(self):
+        """
+        Test case for closing idle connections.
+        It asserts that only the connections idle longer than timeout are closed.
+        """
+        self.read_count()
+        self.assertEqual(self.pool.reap(), 0)
+        self.assertEqual(self.pool.metrics()["readers_open"], 1)
+
+        pool = ConnectionPool(self.DB_DIR, idle_timeout=0)
+        self.assertEqual(pool.metrics()["readers_open"], 0)
+        with pool.reader():
+            pass
+        with pool.writer():
+            pass  # the idle reader is closed when the writer is opened
+        self.assertEqual(pool.reap(), 1)
+        metrics = pool.metrics()
+        self.assertEqual(metrics["readers_open"], 0)
+        self.assertFalse(metrics["writer_open"])
+        self.assertEqual(metrics["reaped"], 2)
+        pool.close()
+
+        with self.assertRaises(DBManagerError):
+            with pool.reader():
+                pass
+
+    def test_shared(self):
+        """
+        Test case for sharing a pool by users of the same database.
+        It asserts that the pool is closed after the last user released it.
+        """
+        pool = acquire_pool(self.DB_DIR)
+        self.assertIs(acquire_pool(os.path.abspath(self.DB_DIR)), pool)
+        self.assertIn(os.path.realpath(self.DB_DIR), pools_metrics())
+        release_pool(self.DB_DIR)
+        with pool.reader():
+            pass
+        release_pool(self.DB_DIR)
+        self.assertNotIn(os.path.realpath(self.DB_DIR), pools_metrics())
+        with self.assertRaises(DBManagerError):
+            with pool.reader():
+                pass
+
+
+class TestGameSavePool(TestCase):
+    """
+    A test case class for using the GameSave class from many threads.
+    """
+
+    PROJECT_DIR = "./projects/test_gamesave_pool"
+
+    def setUp(self):
+        """
+        Create an empty project directory.
+        """
+        delete_folder(self.PROJECT_DIR)
+        os.makedirs(self.PROJECT_DIR)
+
+    def tearDown(self):
+        """
+        Remove the project directory.
+        """
+        delete_folder(self.PROJECT_DIR)
+
+    def test_threads(self):
+        """
+        Test case for saving and reading from a thread pool.
+        It asserts that two game saves of the same project share connections,
+        and that the saves made by every thread are kept.
+        """
+        game_save = GameSave(project_dir=self.PROJECT_DIR, config_dir="../service.ini")
+        other = GameSave(project_dir=self.PROJECT_DIR, config_dir="../service.ini")
+
+        def play(user: int):
+            for frame in range(20):
+                game_save.save(str(user), "a", frame)
+                other.get_saves(str(user), "a", 5)
+            return len(other.get_saves(str(user), "a", 100))
+
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            self.assertEqual(list(executor.map(play, range(16))), [20] * 16)
+
+        db_dir = os.path.realpath(os.path.join(self.PROJECT_DIR, "gamesave.db"))
+        metrics = pools_metrics()[db_dir]
+        self.assertLessEqual(metrics["readers_open"], 4)
+        self.assertEqual(metrics["opened"], metrics["readers_open"] + 1)
+        game_save.close()
+        other.close()
+        self.assertNotIn(db_dir, pools_metrics())
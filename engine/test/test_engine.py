@@ -3,13 +3,19 @@ import sys
 sys.path.append("..")
 
 from unittest import TestCase
-from kernel.engine import Engine
+from unittest.mock import patch
+from kernel.engine import Engine, ENGINE_VERSION
+from kernel.component.slotted import Slotted
+import kernel.engine_io as eng_io
 
+import json
 import random
 from kernel.component.branch import BranchTree
 from kernel.frame import *
 from utils.file_utils import delete_folder
 from kernel.frame import make_frame
+from kernel.operation import FrameOperation, OperationType
+from utils.exception import EngineError
 
 
 class TestEngine(TestCase):
@@ -62,6 +68,7 @@ class TestEngine(TestCase):
                 meta=meta,
             )
             model = frame_to_model(frame)
+            self.assertEqual(frame_to_dict(frame), model.dict())
             self.assertNotEqual(frame, None)
             self.assertNotEqual(model.to_frame(), None)
             if i % 10 == 0:
@@ -116,3 +123,495 @@ class TestEngine(TestCase):
             engine.render_struct("not exist chapter")
 
         engine.commit()
+
+
+class TestEngineJournal(TestCase):
+    """
+    A test case class for testing the journal mode of the Engine class.
+    """
+
+    PROJECT_DIR = "../projects/test_journal/"
+    CONFIG_DIR = "../projects/test_journal/service.ini"
+
+    def setUp(self):
+        """
+        Create an empty project with a config turning on the journal.
+        """
+        delete_folder(self.PROJECT_DIR)
+        os.mkdir(self.PROJECT_DIR)
+        config = ConfigLoader("../service.ini").config
+        config["Engine"]["journal"] = "true"
+        with open(self.CONFIG_DIR, "w", encoding="UTF-8") as config_file:
+            config.write(config_file)
+
+    def test_commit_replay(self):
+        """
+        Test case for committing through the journal.
+        It commits several changes and asserts that a new engine loaded from
+        the snapshot and the journal sees the same content.
+        """
+        engine = Engine(project_dir=self.PROJECT_DIR, config_dir=self.CONFIG_DIR)
+        engine.add_chapter("a")
+        engine.commit()
+        self.assertFalse(os.path.isfile(self.PROJECT_DIR + "GameFile.vne.journal"))
+
+        fids = [
+            engine.append_frame(make_empty_frame(str(i)), "a", force=True)
+            for i in range(5)
+        ]
+        engine.commit()
+        engine.remove_frame(fids[2])
+        engine.change_frame(fids[0], make_empty_frame("changed"))
+        engine.add_chapter("b")
+        engine.commit()
+        self.assertTrue(os.path.isfile(self.PROJECT_DIR + "GameFile.vne.journal"))
+
+        loaded = Engine(project_dir=self.PROJECT_DIR, config_dir=self.CONFIG_DIR)
+        self.assertEqual(loaded.render_struct(), engine.render_struct())
+        self.assertEqual(loaded.get_frame_ids(), engine.get_frame_ids())
+        self.assertEqual(loaded.get_frame_name(fids[0]), "changed")
+        self.assertEqual(loaded.get_frame_chapter(fids[1]), "a")
+        self.assertEqual(loaded.get_frame_index(fids[3]), 2)
+        self.assertEqual(
+            loaded.get_metadata_buffer()["head"], engine.get_metadata_buffer()["head"]
+        )
+
+    def test_record_size(self):
+        """
+        Test case for the size of journal records.
+        It asserts that a record holds the operation instead of the chapter,
+        so an edit in a long chapter appends about the size of a frame.
+        """
+        engine = Engine(project_dir=self.PROJECT_DIR, config_dir=self.CONFIG_DIR)
+        engine.add_chapter("a")
+        for i in range(5000):
+            engine.append_frame(make_empty_frame(str(i)), "a", force=True)
+        engine.commit()
+
+        journal_dir = self.PROJECT_DIR + "GameFile.vne.journal"
+        engine.change_frame(2500, make_empty_frame("changed"))
+        engine.commit()
+        change_size = os.path.getsize(journal_dir)
+        engine.move_frame(10, 4000)
+        engine.remove_frame(20)
+        engine.insert_frame(make_empty_frame("inserted"), 30, force=True)
+        engine.commit()
+        self.assertLess(change_size, 2048)
+        self.assertLess(os.path.getsize(journal_dir) - change_size, 2048)
+
+        loaded = Engine(project_dir=self.PROJECT_DIR, config_dir=self.CONFIG_DIR)
+        self.assertEqual(loaded.render_struct(), engine.render_struct())
+        self.assertEqual(loaded.get_frame_name(2500), "changed")
+        self.assertEqual(walk_frames(loaded), walk_frames(engine))
+
+    def test_fid_not_reused(self):
+        """
+        Test case for allocating frame ids.
+        It asserts that the fid of a removed frame is not reused, even after
+        the engine is reloaded from the game file.
+        """
+        engine = Engine(project_dir=self.PROJECT_DIR, config_dir=self.CONFIG_DIR)
+        engine.add_chapter("a")
+        fid = engine.append_frame(make_empty_frame("removed"), "a", force=True)
+        engine.remove_frame(fid)
+        engine.commit()
+
+        loaded = Engine(project_dir=self.PROJECT_DIR, config_dir=self.CONFIG_DIR)
+        self.assertEqual(loaded.get_metadata_buffer()["next_fid"], fid + 1)
+        self.assertEqual(
+            loaded.append_frame(make_empty_frame("new"), "a", force=True), fid + 1
+        )
+
+    def test_rollback(self):
+        """
+        Test case for rolling back under journal mode.
+        It asserts that uncommitted changes are dropped by rollback.
+        """
+        engine = Engine(project_dir=self.PROJECT_DIR, config_dir=self.CONFIG_DIR)
+        engine.add_chapter("a")
+        engine.commit()
+        fid = engine.append_frame(make_empty_frame("kept"), "a", force=True)
+        engine.commit()
+        engine.append_frame(make_empty_frame("dropped"), "a", force=True)
+        engine.rollback()
+        self.assertEqual(engine.render_struct(), {"a": [fid]})
+
+    def test_compact(self):
+        """
+        Test case for journal compaction.
+        It commits more times than the threshold and asserts that the journal
+        is folded back into the game file.
+        """
+        engine = Engine(project_dir=self.PROJECT_DIR, config_dir=self.CONFIG_DIR)
+        engine.add_chapter("a")
+        engine.commit()
+        threshold = int(ConfigLoader("../service.ini").engine()["compact_threshold"])
+        for i in range(threshold + 1):
+            engine.append_frame(make_empty_frame(str(i)), "a", force=True)
+            engine.commit()
+        self.assertFalse(os.path.isfile(self.PROJECT_DIR + "GameFile.vne.journal"))
+
+        loaded = Engine(project_dir=self.PROJECT_DIR, config_dir=self.CONFIG_DIR)
+        self.assertEqual(loaded.length(), threshold + 1)
+
+    def test_stale_journal(self):
+        """
+        Test case for a compaction interrupted after the game file is dumped
+        but before the journal is removed.
+        It asserts that the records left in journal are not replayed onto the
+        new game file, while the records appended after it are.
+        """
+        journal_dir = self.PROJECT_DIR + "GameFile.vne.journal"
+        engine = Engine(project_dir=self.PROJECT_DIR, config_dir=self.CONFIG_DIR)
+        engine.add_chapter("a")
+        engine.commit()
+        fid = engine.append_frame(make_empty_frame("a"), "a", force=True)
+        engine.commit()
+        with open(journal_dir, "rb") as f:
+            stale = f.read()
+
+        threshold = int(ConfigLoader("../service.ini").engine()["compact_threshold"])
+        for i in range(threshold):
+            engine.append_frame(make_empty_frame(str(i)), "a", force=True)
+            engine.commit()
+        self.assertFalse(os.path.isfile(journal_dir))
+        with open(journal_dir, "wb") as f:
+            f.write(stale)
+
+        loaded = Engine(project_dir=self.PROJECT_DIR, config_dir=self.CONFIG_DIR)
+        self.assertEqual(loaded.render_struct(), engine.render_struct())
+        self.assertEqual(walk_frames(loaded), walk_frames(engine))
+
+        loaded.change_frame(fid, make_empty_frame("changed"))
+        loaded.commit()
+        loaded = Engine(project_dir=self.PROJECT_DIR, config_dir=self.CONFIG_DIR)
+        self.assertEqual(loaded.get_frame_name(fid), "changed")
+        self.assertEqual(walk_frames(loaded), walk_frames(engine))
+
+    def test_migrate(self):
+        """
+        Test case for loading a game file of the older kernel, where the
+        components were pickled as dict.
+        It asserts that the frames are loaded and the game file is rewritten
+        as a whole on the next commit.
+        """
+        legacy = lambda self: {i: getattr(self, i) for i in self._all_slots()}
+        with patch.object(Slotted, "__getstate__", legacy), patch(
+            "kernel.engine.ENGINE_VERSION", "1.1.3"
+        ):
+            engine = Engine(project_dir=self.PROJECT_DIR, config_dir=self.CONFIG_DIR)
+            engine.add_chapter("a")
+            frame = make_empty_frame("old")
+            frame.character = [Character("c.png", x=3)]
+            engine.append_frame(frame, "a", force=True)
+            engine.commit()
+
+        loaded = Engine(project_dir=self.PROJECT_DIR, config_dir=self.CONFIG_DIR)
+        self.assertEqual(loaded.get_frame_name(0), "old")
+        self.assertEqual(loaded.get_frame(0).character[0].x, 3)
+        self.assertEqual(loaded.get_frame(0).action.next_f, Frame.VOID_FRAME_ID)
+
+        loaded.append_frame(make_empty_frame("new"), "a", force=True)
+        loaded.commit()
+        self.assertFalse(os.path.isfile(self.PROJECT_DIR + "GameFile.vne.journal"))
+        loaded = Engine(project_dir=self.PROJECT_DIR, config_dir=self.CONFIG_DIR)
+        self.assertEqual(loaded.get_metadata_buffer()["engine_version"], ENGINE_VERSION)
+        self.assertEqual(loaded.get_chapter_frame_names("a"), ["old", "new"])
+
+
+class TestEngineIndexedFile(TestCase):
+    """
+    A test case class for testing the Engine class with the indexed game file.
+    """
+
+    PROJECT_DIR = "../projects/test_indexed/"
+    CONFIG_DIR = "../projects/test_indexed/service.ini"
+
+    def setUp(self):
+        """
+        Create an empty project with a config using the indexed loader/dumper.
+        """
+        delete_folder(self.PROJECT_DIR)
+        os.mkdir(self.PROJECT_DIR)
+        config = ConfigLoader("../service.ini").config
+        config["Engine"]["loader"] = "indexed_loader"
+        config["Engine"]["dumper"] = "indexed_dumper"
+        config["Engine"]["journal"] = "false"
+        with open(self.CONFIG_DIR, "w", encoding="UTF-8") as config_file:
+            config.write(config_file)
+
+    def test_load_and_commit(self):
+        """
+        Test case for committing and reloading the indexed game file.
+        It asserts that a reloaded engine sees the same content and keeps
+        working after committing over its own game file.
+        """
+        engine = Engine(project_dir=self.PROJECT_DIR, config_dir=self.CONFIG_DIR)
+        engine.add_chapter("a")
+        fids = [
+            engine.append_frame(make_empty_frame(str(i)), "a", force=True)
+            for i in range(20)
+        ]
+        engine.commit()
+
+        loaded = Engine(project_dir=self.PROJECT_DIR, config_dir=self.CONFIG_DIR)
+        self.assertEqual(loaded.render_struct(), engine.render_struct())
+        self.assertEqual(loaded.get_frame_name(fids[3]), "3")
+        loaded.remove_frame(fids[5])
+        loaded.append_frame(make_empty_frame("new"), "a", force=True)
+        loaded.commit()
+        self.assertEqual(loaded.get_frame_name(fids[19]), "19")
+
+        reloaded = Engine(project_dir=self.PROJECT_DIR, config_dir=self.CONFIG_DIR)
+        self.assertEqual(reloaded.render_struct(), loaded.render_struct())
+        self.assertEqual(reloaded.length(), 20)
+
+        # the memory map of the replaced game content is released
+        with patch.object(eng_io.LazyFrameTable, "release", autospec=True) as release:
+            reloaded.remove_frame(fids[0])
+            reloaded.rollback()
+            release.assert_called_once()
+        self.assertEqual(reloaded.length(), 20)
+
+
+def walk_frames(engine: Engine) -> list:
+    """
+    Walk the linked frame list from its head, checking both directions.
+
+    @param engine: engine to walk
+    @return: fids by the order of the frame list
+    """
+    heads = [
+        i
+        for i in engine.get_frame_ids()
+        if engine.get_frame(i).action.prev_f == Frame.VOID_FRAME_ID
+    ]
+    if len(heads) == 0:
+        return []
+    assert len(heads) == 1, f"more than one head: {heads}"
+
+    order = [heads[0]]
+    while engine.get_frame(order[-1]).action.next_f != Frame.VOID_FRAME_ID:
+        next_fid = engine.get_frame(order[-1]).action.next_f
+        assert engine.get_frame(next_fid).action.prev_f == order[-1]
+        order.append(next_fid)
+    assert len(order) == engine.length(), "frame list is broken"
+    return order
+
+
+class TestEngineBatch(TestCase):
+    """
+    A test case class for testing the batch operations of the Engine class.
+    """
+
+    PROJECT_DIR = "../projects/test_batch/"
+
+    def setUp(self):
+        """
+        Create a project with two chapters of three frames each.
+        """
+        delete_folder(self.PROJECT_DIR)
+        os.mkdir(self.PROJECT_DIR)
+        self.engine = Engine(project_dir=self.PROJECT_DIR, config_dir="../service.ini")
+        self.engine.add_chapter("a")
+        self.engine.add_chapter("b")
+        for chapter in ("a", "b"):
+            for i in range(3):
+                self.engine.append_frame(
+                    make_empty_frame(f"{chapter}{i}"), chapter, force=True
+                )
+        self.engine.commit()
+
+    def test_apply_batch(self):
+        """
+        Test case for apply_batch.
+        It applies every kind of operation and asserts the struct, the frame
+        names and the linked frame list.
+        """
+        engine = self.engine
+        fids = engine.apply_batch(
+            [
+                FrameOperation(OperationType.APPEND, chapter="a", frame_name="new"),
+                FrameOperation(OperationType.INSERT, chapter="b", frame_name="head"),
+                FrameOperation(OperationType.INSERT, after_fid=0, frame_name="mid"),
+                FrameOperation(
+                    OperationType.MODIFY, fid=4, frame=make_empty_frame("changed")
+                ),
+                FrameOperation(OperationType.REMOVE, fid=5),
+            ],
+            force=True,
+        )
+        self.assertEqual(fids, [6, 7, 8, 4, 5])
+        self.assertEqual(engine.render_struct(), {"a": [0, 8, 1, 2, 6], "b": [7, 3, 4]})
+        self.assertEqual(engine.get_frame_name(4), "changed")
+        self.assertEqual(engine.get_chapter("b").get_frame_info(4).meta.name, "changed")
+        self.assertEqual(walk_frames(engine), [0, 8, 1, 2, 6, 7, 3, 4])
+
+        engine.commit()
+        loaded = Engine(project_dir=self.PROJECT_DIR, config_dir="../service.ini")
+        self.assertEqual(walk_frames(loaded), [0, 8, 1, 2, 6, 7, 3, 4])
+
+    def test_move_frame(self):
+        """
+        Test case for move_frame.
+        It moves frames inside a chapter, across chapters, to the head and
+        into an empty chapter, and asserts fids are kept and the frame list
+        stays consistent.
+        """
+        engine = self.engine
+        engine.add_chapter("c")
+        self.assertEqual(engine.move_frame(0, 2), 0)
+        self.assertEqual(engine.render_struct("a"), {"a": [1, 2, 0]})
+        engine.move_frame(3, -1, "a")
+        engine.move_frame(1, 5)
+        engine.move_frame(4, -1, "c")
+        self.assertEqual(
+            engine.render_struct(), {"a": [3, 2, 0], "b": [5, 1], "c": [4]}
+        )
+        self.assertEqual(engine.get_frame_chapter(1), "b")
+        self.assertEqual(engine.get_frame_index(0), 2)
+        self.assertEqual(engine.get_frame_name(4), "b1")
+        walk_frames(engine)
+
+        with self.assertRaises(EngineError):
+            engine.move_frame(2, 2)
+        with self.assertRaises(EngineError):
+            engine.move_frame(2, 0, "b")
+
+        engine.apply_batch([FrameOperation(OperationType.MOVE, fid=5, after_fid=4)])
+        self.assertEqual(engine.render_struct("c"), {"c": [4, 5]})
+
+        engine.commit()
+        loaded = Engine(project_dir=self.PROJECT_DIR, config_dir="../service.ini")
+        self.assertEqual(loaded.render_struct(), engine.render_struct())
+        self.assertEqual(walk_frames(loaded), walk_frames(engine))
+
+    def test_window(self):
+        """
+        Test case for fetching a window of frames in a chapter.
+        It asserts the windows of fids, names and struct, and the errors of
+        a bad cursor or window.
+        """
+        engine = self.engine
+        self.assertEqual(engine.get_chapter_fids("b", offset=1), [4, 5])
+        self.assertEqual(engine.get_chapter_fids("b", limit=2, after_fid=3), [4, 5])
+        self.assertEqual(engine.get_chapter_frame_names("a", 1, 1), ["a1"])
+        self.assertEqual(engine.render_struct(offset=2, limit=1), {"a": [2], "b": [5]})
+        self.assertEqual(engine.render_struct("a", limit=0), {"a": []})
+
+        with self.assertRaises(EngineError):
+            engine.get_chapter_fids("a", after_fid=3)
+        with self.assertRaises(EngineError):
+            engine.get_chapter_frame_names("a", offset=-1)
+
+    def test_frame_json(self):
+        """
+        Test case for the cached json of frames.
+        It asserts that the json is reused until the frame is changed, removed
+        or rolled back.
+        """
+        engine = self.engine
+        cached = engine.get_frame_json(1)
+        self.assertEqual(json.loads(cached)["name"], "a1")
+        self.assertIs(engine.get_frame_json(1), cached)
+
+        engine.change_frame(1, make_empty_frame("changed"))
+        self.assertEqual(json.loads(engine.get_frame_json(1))["name"], "changed")
+        engine.rollback()
+        self.assertEqual(json.loads(engine.get_frame_json(1))["name"], "a1")
+
+        engine.apply_batch(
+            [FrameOperation(OperationType.MODIFY, fid=2, frame_name="batch")]
+        )
+        self.assertEqual(json.loads(engine.get_frame_json(2))["name"], "batch")
+        engine.remove_frame(2)
+        with self.assertRaises(EngineError):
+            engine.get_frame_json(2)
+
+    def test_batch_atomic(self):
+        """
+        Test case for a failing batch.
+        It asserts that nothing is applied when one operation fails, and that
+        the changes made before the batch are kept.
+        """
+        engine = self.engine
+        struct = engine.render_struct()
+        with self.assertRaises(EngineError):
+            engine.apply_batch(
+                [
+                    FrameOperation(OperationType.APPEND, chapter="a"),
+                    FrameOperation(OperationType.REMOVE, fid=100),
+                ]
+            )
+        self.assertEqual(engine.render_struct(), struct)
+        self.assertEqual(walk_frames(engine), [0, 1, 2, 3, 4, 5])
+
+        engine.change_frame(4, make_empty_frame("changed"))
+        engine.append_frame(make_empty_frame("b3"), "b", force=True)
+        struct = engine.render_struct()
+        with self.assertRaises(EngineError):
+            engine.apply_batch(
+                [
+                    FrameOperation(OperationType.MODIFY, fid=4, frame_name="batch"),
+                    FrameOperation(OperationType.MOVE, fid=0, after_fid=5),
+                    FrameOperation(OperationType.REMOVE, fid=6),
+                    FrameOperation(OperationType.INSERT, after_fid=1),
+                    FrameOperation(OperationType.REMOVE, fid=100),
+                ]
+            )
+        self.assertEqual(engine.render_struct(), struct)
+        self.assertEqual(walk_frames(engine), [0, 1, 2, 3, 4, 5, 6])
+        self.assertEqual(engine.get_frame_name(4), "changed")
+        self.assertEqual(
+            engine.get_chapter("b").get_frame_names(), ["b0", "changed", "b2", "b3"]
+        )
+        self.assertEqual(engine.get_frame_chapter(0), "a")
+        self.assertEqual(
+            engine.append_frame(make_empty_frame("a3"), "a", force=True), 7
+        )
+
+    def test_batch_uncommitted(self):
+        """
+        Test case for a failing batch in a project never committed.
+        It asserts that the frames added before the batch are kept, and that
+        rollback raises if the game file cannot be loaded.
+        """
+        delete_folder(self.PROJECT_DIR)
+        os.mkdir(self.PROJECT_DIR)
+        engine = Engine(project_dir=self.PROJECT_DIR, config_dir="../service.ini")
+        engine.add_chapter("a")
+        engine.append_frame(make_empty_frame("a0"), "a", force=True)
+        with self.assertRaises(EngineError):
+            engine.apply_batch(
+                [
+                    FrameOperation(OperationType.INSERT, after_fid=0),
+                    FrameOperation(OperationType.MOVE, fid=0, after_fid=0),
+                ]
+            )
+        self.assertEqual(engine.render_struct(), {"a": [0]})
+        self.assertEqual(walk_frames(engine), [0])
+
+        engine.commit()
+        game_file = os.path.join(self.PROJECT_DIR, "GameFile.vne")
+        with open(game_file, "wb") as file:
+            file.write(b"broken")
+        with self.assertRaises(EngineError):
+            engine.rollback()
+
+    def test_batch_check(self):
+        """
+        Test case for checking frames in batch.
+        It asserts that an invalid frame rejects the whole batch.
+        """
+        engine = self.engine
+        struct = engine.render_struct()
+        with self.assertRaises(EngineError):
+            engine.apply_batch(
+                [
+                    FrameOperation(OperationType.REMOVE, fid=0),
+                    FrameOperation(
+                        OperationType.MODIFY, fid=1, frame=make_empty_frame("bad")
+                    ),
+                ]
+            )
+        self.assertEqual(engine.render_struct(), struct)
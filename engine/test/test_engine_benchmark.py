@@ -0,0 +1,304 @@
+import sys
+
+sys.path.append("..")
+
+import copy
+import json
+import logging
+import os
+import pickle
+import tracemalloc
+import time
+from unittest import TestCase
+from unittest.mock import patch
+from fastapi.encoders import jsonable_encoder
+import controller.engine_controller as engine_controller_module
+import kernel.engine as engine_module
+import kernel.frame as frame_module
+from controller.engine_controller import EngineController
+from controller.project_controller import ProjectController
+from kernel.component.character import Character
+from kernel.component.slotted import Slotted
+from kernel.engine import Engine
+from kernel.frame import make_empty_frame
+from utils.file_utils import delete_folder
+
+LOGGER = logging.getLogger(__name__)
+
+
+def count_calls(func, *args) -> int:
+    """
+    Count the calls made while running the function, builtin calls included,
+    which measures the work done without depending on the speed of machine.
+
+    @param func: function to run
+    @param args: arguments of function
+    @return: amount of calls
+    """
+    calls = 0
+
+    def profile(_frame, event, _arg):
+        nonlocal calls
+        if event in ("call", "c_call"):
+            calls += 1
+
+    sys.setprofile(profile)
+    try:
+        func(*args)
+    finally:
+        sys.setprofile(None)
+    return calls
+
+
+class DictComponent:
+    """
+    Reference component keeping the same attributes in a per instance dict,
+    the way components were kept before they were slotted.
+    """
+
+    def __init__(self, component: Slotted):
+        for name in component._all_slots():
+            setattr(self, name, to_reference(getattr(component, name, None)))
+
+
+def to_reference(value):
+    """
+    Convert the slotted components in value into the reference components.
+
+    @param value: component, list of components or plain value
+    @return: converted value
+    """
+    if isinstance(value, Slotted):
+        return DictComponent(value)
+    if isinstance(value, list):
+        return [to_reference(i) for i in value]
+    return value
+
+
+def memory_per_item(items: list) -> float:
+    """
+    Measure the memory held by a deep copy of the items, the plain values
+    such as strings are shared by the copy so only the containers count.
+
+    @param items: items to measure
+    @return: bytes per item
+    """
+    tracemalloc.start()
+    copied = copy.deepcopy(items)
+    memory = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    assert len(copied) == len(items)
+    return memory / len(items)
+
+
+class TestEngineBenchmark(TestCase):
+    """
+    A benchmark class for the scaling of the Engine class.
+    """
+
+    PROJECT_DIR = "../projects/test_benchmark/"
+
+    def setUp(self):
+        """
+        Create an empty project for each benchmark.
+        """
+        delete_folder(self.PROJECT_DIR)
+        os.mkdir(self.PROJECT_DIR)
+
+    def append_frames(self, amount: int) -> float:
+        """
+        Append frames into a new engine.
+
+        @param amount: amount of frames to append
+        @return: calls made per frame
+        """
+        engine = Engine(project_dir=self.PROJECT_DIR, config_dir="../service.ini")
+        engine.add_chapter("a")
+        frames = [make_empty_frame(str(i)) for i in range(amount)]
+
+        def append():
+            for frame in frames:
+                engine.append_frame(frame, "a", force=True)
+
+        calls = count_calls(append)
+        self.assertEqual(engine.length(), amount)
+        return calls / amount
+
+    def test_append_scaling(self):
+        """
+        Benchmark for appending 100k frames.
+        It asserts that the work per frame stays flat when the amount of frames
+        grows by 10 times, i.e. appending is linear overall.
+        """
+        small = self.append_frames(10_000)
+        large = self.append_frames(100_000)
+        self.assertLess(large, small + 1)
+
+    def remove_chapter(self, amount: int) -> float:
+        """
+        Remove a chapter from a new engine.
+
+        @param amount: amount of frames in the chapter
+        @return: calls made per frame
+        """
+        engine = Engine(project_dir=self.PROJECT_DIR, config_dir="../service.ini")
+        engine.add_chapter("a")
+        engine.add_chapter("b")
+        for i in range(amount):
+            engine.append_frame(make_empty_frame(str(i)), "a", force=True)
+            engine.append_frame(make_empty_frame(str(i)), "b", force=True)
+
+        calls = count_calls(engine.remove_chapter, "a")
+        self.assertEqual(engine.length(), amount)
+        return calls / amount
+
+    def test_remove_chapter_scaling(self):
+        """
+        Benchmark for removing a chapter of 100k frames.
+        It asserts that the work per frame stays flat when the chapter grows
+        by 10 times.
+        """
+        small = self.remove_chapter(10_000)
+        large = self.remove_chapter(100_000)
+        self.assertLess(large, small + 1)
+
+    def test_validate_all(self):
+        """
+        Benchmark for checking 50k frames.
+        It asserts that the resources directory is listed once for the whole
+        project instead of once per frame.
+        """
+        background_dir = os.path.join(self.PROJECT_DIR, "resources/background")
+        os.makedirs(background_dir)
+        with open(os.path.join(background_dir, "bg.png"), "wb"):
+            pass
+
+        engine = Engine(project_dir=self.PROJECT_DIR, config_dir="../service.ini")
+        engine.add_chapter("a")
+        for i in range(50_000):
+            frame = make_empty_frame(str(i))
+            frame.background.res_name = "bg.png" if i % 100 else "missing.png"
+            engine.append_frame(frame, "a", force=True)
+
+        with patch.object(
+            frame_module,
+            "get_files_in_folder",
+            wraps=frame_module.get_files_in_folder,
+        ) as listing:
+            report = engine.validate_all()
+
+        self.assertEqual(report["total"], 50_000)
+        self.assertEqual(report["invalid"], 500)
+        self.assertEqual(listing.call_count, 1)
+
+    def test_get_frames(self):
+        """
+        Benchmark for fetching 1k frames.
+        It asserts that one batched fetch returns the same frames as fetching
+        frame by frame, while it takes the task lock once and builds no model,
+        and that the frames fetched again are read from the cached json, the
+        latency of each is logged only.
+        """
+        project_controller = ProjectController("../service.ini")
+        engine_controller = EngineController("../service.ini")
+        delete_folder("./projects/test_get_frames")
+        task_id = project_controller.init_project("test_get_frames").content["task_id"]
+        task = project_controller.get_task(task_id)
+        engine = task.project_engine
+        engine.add_chapter("a")
+        for i in range(1000):
+            frame = make_empty_frame(str(i))
+            frame.character = [Character(f"c{j}.png", x=j, y=j) for j in range(3)]
+            engine.append_frame(frame, "a", force=True)
+        fids = engine.get_chapter_fids("a")
+
+        start = time.perf_counter()
+        single = [
+            jsonable_encoder(engine_controller.get_frame(task, fid=fid).content)
+            for fid in fids
+        ]
+        single_cost = time.perf_counter() - start
+
+        start = time.perf_counter()
+        result = engine_controller.get_frames(task, fids=fids + [-5])
+        batch = jsonable_encoder(result.content)
+        batch_cost = time.perf_counter() - start
+        LOGGER.info(
+            "get frames: %.1fms frame by frame, %.1fms batched for 1k frames",
+            single_cost * 1e3,
+            batch_cost * 1e3,
+        )
+
+        self.assertEqual(list(batch["frames"].values()), single)
+        self.assertEqual(batch["missing"], [-5])
+        by_chapter = engine_controller.get_frames(task, chapter_name="a", limit=10)
+        self.assertEqual(list(by_chapter.content["frames"]), fids[:10])
+
+        to_model = patch.object(
+            engine_controller_module,
+            "frame_to_model",
+            wraps=engine_controller_module.frame_to_model,
+        )
+        locking = patch.object(task.lock, "read", wraps=task.lock.read)
+        with to_model as models, locking as locks:
+            for fid in fids:
+                engine_controller.get_frame(task, fid=fid)
+        self.assertEqual(models.call_count, 1000)
+        self.assertEqual(locks.call_count, 1000)
+
+        with to_model as models, locking as locks:
+            engine_controller.get_frames(task, fids=fids)
+        self.assertEqual(models.call_count, 0)
+        self.assertEqual(locks.call_count, 1)
+
+        # hot frames are read from the cached json
+        with patch.object(
+            engine_module, "frame_to_json", wraps=engine_module.frame_to_json
+        ) as to_json:
+            for _ in range(10):
+                cached = [engine_controller.get_frame_json(task, fid) for fid in fids]
+        self.assertEqual(to_json.call_count, 1000)
+        self.assertEqual([json.loads(i)["content"] for i in cached], single)
+
+        start = time.perf_counter()
+        for fid in fids:
+            engine_controller.get_frame_json(task, fid)
+        cached_cost = time.perf_counter() - start
+        LOGGER.info(
+            "get frames: %.1fms from cached json for 1k frames", cached_cost * 1e3
+        )
+        project_controller.remove_project_dir(task_id)
+
+    def test_frame_memory(self):
+        """
+        Benchmark for the memory of 10k frames with three characters each.
+        It asserts that components have no per instance dict, and that the
+        bytes per frame in memory and in pickle are reduced compared with the
+        same frames keeping attributes in dict.
+        """
+        frames = []
+        for i in range(10_000):
+            frame = make_empty_frame(str(i))
+            frame.character = [Character(f"c{j}.png", x=j, y=j) for j in range(3)]
+            frames.append(frame)
+        references = to_reference(frames)
+
+        self.assertFalse(hasattr(frames[0], "__dict__"))
+        self.assertFalse(hasattr(frames[0].character[0], "__dict__"))
+        self.assertEqual(references[0].character[2].x, 2)
+
+        memory = memory_per_item(frames)
+        reference_memory = memory_per_item(references)
+        dumped = len(pickle.dumps(frames)) / len(frames)
+        reference_dumped = len(pickle.dumps(references)) / len(references)
+        LOGGER.info(
+            "frame memory: %.0fB/frame (%.0fB/frame in dict), "
+            "pickled %.0fB/frame (%.0fB/frame in dict)",
+            memory,
+            reference_memory,
+            dumped,
+            reference_dumped,
+        )
+
+        self.assertLess(memory, reference_memory / 2)
+        self.assertLess(dumped, reference_dumped * 0.8)
@@ -5,7 +5,14 @@ sys.path.append("..")
 import unittest
 import os
 import tempfile
-from kernel.engine_io import pickle_loader, pickle_dumper
+from kernel.engine_io import (
+    pickle_loader,
+    pickle_dumper,
+    indexed_loader,
+    indexed_dumper,
+    LazyFrameTable,
+)
+from kernel.frame import make_empty_frame
 
 
 class TestPickleIO(unittest.TestCase):
@@ -48,5 +55,73 @@ class TestPickleIO(unittest.TestCase):
             pickle_dumper(self.test_data, "invalid/file/path")
 
 
+class TestIndexedIO(unittest.TestCase):
+    """
+    A test case class for testing the indexed_loader and indexed_dumper functions.
+    """
+
+    def setUp(self):
+        """
+        Set up the game content and create a temporary file for testing.
+        """
+        self.metadata = {"head": 0, "tail": 9}
+        self.frames = {i: make_empty_frame(f"frame {i}") for i in range(10)}
+        self.chapters = {"chapter": list(range(10))}
+        self.temp_file = tempfile.NamedTemporaryFile(delete=False)
+        self.temp_file.close()
+
+    def tearDown(self):
+        """
+        Clean up by deleting the temporary file.
+        """
+        os.unlink(self.temp_file.name)
+
+    def test_lazy_load(self):
+        """
+        Test case for loading the indexed game file.
+        It asserts that frames are only decoded when accessed.
+        """
+        indexed_dumper([self.metadata, self.frames, self.chapters], self.temp_file.name)
+        metadata, frames, chapters = indexed_loader(self.temp_file.name)
+        self.assertEqual(metadata, self.metadata)
+        self.assertEqual(chapters, self.chapters)
+        self.assertIsInstance(frames, LazyFrameTable)
+        self.assertEqual(set(frames.keys()), set(self.frames.keys()))
+        self.assertFalse(frames.is_decoded(3))
+        self.assertEqual(frames[3].meta.name, "frame 3")
+        self.assertTrue(frames.is_decoded(3))
+        self.assertFalse(frames.is_decoded(4))
+
+    def test_dump_lazy_table(self):
+        """
+        Test case for dumping a partially decoded table back into its own file.
+        It asserts that both decoded and encoded frames survive the round trip.
+        """
+        indexed_dumper([self.metadata, self.frames, self.chapters], self.temp_file.name)
+        metadata, frames, chapters = indexed_loader(self.temp_file.name)
+        frames[0].meta.name = "changed"
+        frames[10] = make_empty_frame("new")
+        del frames[5]
+        indexed_dumper([metadata, frames, chapters], self.temp_file.name)
+
+        self.assertEqual(frames[9].meta.name, "frame 9")
+        _, reloaded, _ = indexed_loader(self.temp_file.name)
+        self.assertEqual(len(reloaded), 10)
+        self.assertNotIn(5, reloaded)
+        self.assertEqual(reloaded[0].meta.name, "changed")
+        self.assertEqual(reloaded[10].meta.name, "new")
+        self.assertEqual(reloaded[8].meta.name, "frame 8")
+
+    def test_legacy_file(self):
+        """
+        Test case for loading a game file written by pickle_dumper.
+        It asserts that indexed_loader falls back to the legacy format.
+        """
+        pickle_dumper([self.metadata, {}, self.chapters], self.temp_file.name)
+        self.assertEqual(
+            indexed_loader(self.temp_file.name), [self.metadata, {}, self.chapters]
+        )
+
+
 if __name__ == "__main__":
     unittest.main()
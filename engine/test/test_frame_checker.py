@@ -0,0 +1,107 @@
+import sys
+
+sys.path.append("..")
+
+from unittest import TestCase
+from kernel.frame import *
+from module.project_module import ProjectManager, ResourcesType
+from utils.file_utils import delete_folder
+
+
+class TestFrameChecker(TestCase):
+    """
+    A test case class for testing the FrameChecker class.
+    """
+
+    CONFIG_DIR = "../service.ini"
+
+    def setUp(self):
+        """
+        Create a project with a background and a character resource.
+        """
+        self.project_manager = ProjectManager("test_checker", self.CONFIG_DIR)
+        delete_folder(self.project_manager.get_project_dir())
+        self.project_manager = ProjectManager("test_checker", self.CONFIG_DIR)
+        for rtype, name in [
+            (ResourcesType.Background, "bg.png"),
+            (ResourcesType.Character, "chara.png"),
+        ]:
+            self.add_resource(rtype, name)
+        self.checker = FrameChecker(
+            self.project_manager.get_project_dir(), ConfigLoader(self.CONFIG_DIR)
+        )
+        self.project_manager.add_resource_listener(self.checker.invalidate)
+
+    def add_resource(self, rtype: ResourcesType, name: str):
+        """
+        Write an empty resource file.
+        """
+        resource_dir = self.project_manager.get_dir_by_rtype(rtype)
+        with open(os.path.join(resource_dir, name), "wb"):
+            pass
+
+    def make_frame(self, background="bg.png", character="chara.png", music=None):
+        """
+        Make a frame with the given resources.
+        """
+        return make_frame(
+            background=Background(background),
+            character=[Character(character)],
+            music=Music(music, MusicSignal.PLAY if music else MusicSignal.KEEP),
+            dialog=Dialogue("hello", Character(None)),
+            meta=FrameMeta(),
+        )
+
+    def test_check(self):
+        """
+        Test case for checking frames.
+        It asserts that missing resources of every category are reported.
+        """
+        self.assertEqual(self.checker.check(self.make_frame()), [True, None])
+        self.assertFalse(self.checker.check(self.make_frame(background="x.png"))[0])
+        self.assertFalse(self.checker.check(self.make_frame(character="x.png"))[0])
+        result = self.checker.check(self.make_frame(music="x.mp3"))
+        self.assertEqual(result, [False, "Music resource 'x.mp3' cannot find"])
+
+    def test_invalidate(self):
+        """
+        Test case for the cache of resource names.
+        It asserts that the cache is only refreshed after invalidation, and that
+        project manager invalidates it on delete, rename and upload.
+        """
+        self.assertFalse(self.checker.check(self.make_frame(music="a.mp3"))[0])
+        self.add_resource(ResourcesType.Music, "a.mp3")
+        self.assertFalse(self.checker.check(self.make_frame(music="a.mp3"))[0])
+        self.project_manager.notify_resource_changed(ResourcesType.Music)
+        self.assertTrue(self.checker.check(self.make_frame(music="a.mp3"))[0])
+
+        self.project_manager.rename_resources_by_rtype(
+            ResourcesType.Background, "bg.png", "bg2.png"
+        )
+        self.assertFalse(self.checker.check(self.make_frame())[0])
+        self.assertTrue(self.checker.check(self.make_frame(background="bg2.png"))[0])
+
+        self.project_manager.delete_resources_by_rtype(
+            ResourcesType.Character, "chara.png"
+        )
+        self.assertFalse(self.checker.check(self.make_frame(background="bg2.png"))[0])
+
+    def test_check_all(self):
+        """
+        Test case for checking a lot of frames at once.
+        It asserts that only invalid frames are reported, with the same
+        message as checking them one by one.
+        """
+        frames = [
+            self.make_frame(),
+            self.make_frame(background="x.png"),
+            self.make_frame(character="x.png"),
+            self.make_frame(music="x.mp3"),
+            self.make_frame(background="../background/bg.png"),
+        ]
+        for fid, frame in enumerate(frames):
+            frame.fid = fid
+        errors = self.checker.check_all(frames)
+        self.assertEqual(set(errors.keys()), {1, 2, 3})
+        for fid, msg in errors.items():
+            self.assertEqual(self.checker.check(frames[fid]), [False, msg])
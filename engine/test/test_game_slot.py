@@ -2,8 +2,13 @@ import sys
 
 sys.path.append("..")
 
+import configparser
+import os
+import sqlite3
 from unittest import TestCase
-from module.gamesave_module import GameSave, get_cur_time, parse_data
+from unittest.mock import patch
+from module.gamesave_module import DEFAULT_USER, GameSave, get_cur_time, parse_data
+from utils.db_utils import DBManager
 from utils import file_utils
 from utils.exception import *
 
@@ -91,3 +96,333 @@ class TestGameSlot(TestCase):
         self.game_slot.print(limit=1)
         self.game_slot.print(limit=20)
         self.game_slot.close()
+
+
+class TestGameSaveBenchmark(TestCase):
+    """
+    A benchmark class for saving progress into the GameSave class.
+    """
+
+    PROJECT_DIR = "./projects/test_gamesave"
+
+    def setUp(self):
+        """
+        Create an empty project directory.
+        """
+        file_utils.delete_folder(self.PROJECT_DIR)
+        os.makedirs(self.PROJECT_DIR)
+
+    def tearDown(self):
+        """
+        Remove the project directory.
+        """
+        file_utils.delete_folder(self.PROJECT_DIR)
+
+    def make_config(self, name: str, **settings) -> str:
+        """
+        Write a config with its own database and the given game save settings.
+
+        @return: config directory
+        """
+        config = configparser.ConfigParser()
+        config.read("../service.ini")
+        config["GameSave"]["db_name"] = f"{name}.db"
+        for key, value in settings.items():
+            config["GameSave"][key] = value
+        config_dir = os.path.join(self.PROJECT_DIR, f"{name}.ini")
+        with open(config_dir, "w") as f:
+            config.write(f)
+        return config_dir
+
+    def dump_progress(self, name: str, **settings) -> tuple[str, int]:
+        """
+        Save progress one by one under the given settings.
+
+        @return: journal mode of database, and amount of commits of saving
+        """
+        config_dir = self.make_config(name, **settings)
+        game_slot = GameSave(project_dir=self.PROJECT_DIR, config_dir=config_dir)
+        game_slot.reset()
+        with patch.object(
+            DBManager, "commit", autospec=True, side_effect=DBManager.commit
+        ) as commit:
+            for i in range(200):
+                game_slot.dump_progress(i)
+            game_slot.flush()
+        self.assertEqual(len(game_slot.get_all_progress()), 200)
+        game_slot.close()
+
+        db = sqlite3.connect(os.path.join(self.PROJECT_DIR, f"{name}.db"))
+        journal_mode = db.execute("PRAGMA journal_mode").fetchone()[0]
+        db.close()
+        return journal_mode, commit.call_count
+
+    def test_dump_progress(self):
+        """
+        Test case for saving progress one by one.
+        It asserts that the database is kept in the configured journal mode,
+        WAL by default, that each save is a single commit, and that the saves
+        are grouped into a commit per flush size under write-behind mode.
+        """
+        legacy = self.dump_progress("legacy", journal_mode="DELETE", synchronous="FULL")
+        self.assertEqual(legacy, ("delete", 200))
+        wal = self.dump_progress("wal")
+        self.assertEqual(wal, ("wal", 200))
+        behind = self.dump_progress(
+            "behind", write_behind="true", flush_interval="60000", flush_size="50"
+        )
+        self.assertEqual(behind, ("wal", 4))
+
+    def test_write_behind(self):
+        """
+        Test case for the write-behind mode.
+        It asserts that queued saves are read back, written on close, and the
+        error of writer is raised once to the user of the failed save only, by
+        the next flush or save of the user.
+        """
+        config_dir = self.make_config("behind", write_behind="true")
+        game_slot = GameSave(project_dir=self.PROJECT_DIR, config_dir=config_dir)
+        game_slot.reset()
+        saved = game_slot.dump_progress(1)
+        self.assertEqual(
+            game_slot.get_all_progress(), [{"time": float(saved), "frame": 1}]
+        )
+        game_slot.remove_progress(saved)
+        for i in range(10):
+            game_slot.dump_progress(i)
+        game_slot.close()
+
+        game_slot = GameSave(project_dir=self.PROJECT_DIR, config_dir=config_dir)
+        self.assertEqual(len(game_slot.get_all_progress()), 10)
+        game_slot.drop()
+        game_slot.dump_progress(1)  # the slot is dropped
+        game_slot.save("other", "slot", 1)
+        game_slot.flush()
+        game_slot.flush("reader")
+        with self.assertRaises(GameSlotError):
+            game_slot.flush(DEFAULT_USER)
+        game_slot.flush(DEFAULT_USER)
+        with self.assertRaises(GameSlotError):
+            game_slot.save("other", "slot", 2)
+        game_slot.reset()
+        game_slot.save("other", "slot", 3)
+        game_slot.flush("other")
+        self.assertEqual(len(game_slot.get_saves("other", "slot", 10)), 1)
+        game_slot.close()
+
+    def test_transaction(self):
+        """
+        Test case for grouping saves into a transaction.
+        It asserts that saves are dropped together when the transaction fails.
+        """
+        game_slot = GameSave(project_dir=self.PROJECT_DIR, config_dir="../service.ini")
+        game_slot.reset()
+        with self.assertRaises(RuntimeError):
+            with game_slot.transaction():
+                game_slot.dump_progress(1)
+                raise RuntimeError("interrupted")
+        with game_slot.transaction():
+            game_slot.dump_progress(2)
+            game_slot.dump_progress(3)
+        self.assertEqual([i["frame"] for i in game_slot.get_all_progress()], [2, 3])
+        game_slot.close()
+
+
+class TestGameSavePage(TestCase):
+    """
+    A test case class for the paginated queries of the GameSave class.
+    """
+
+    PROJECT_DIR = "./projects/test_gamesave_page"
+
+    def setUp(self):
+        """
+        Create a slot with 20k progress, one per second.
+        """
+        file_utils.delete_folder(self.PROJECT_DIR)
+        os.makedirs(self.PROJECT_DIR)
+        self.game_slot = GameSave(
+            project_dir=self.PROJECT_DIR, config_dir="../service.ini"
+        )
+        self.game_slot.reset()
+        self.game_slot.import_saves(
+            {
+                "user": "",
+                "slot": self.game_slot.get_slot_name(),
+                "time": 1_000_000.0 + i,
+                "frame": i,
+            }
+            for i in range(20_000)
+        )
+        self.db = DBManager(os.path.join(self.PROJECT_DIR, "gamesave.db"))
+
+    def tearDown(self):
+        """
+        Remove the project directory.
+        """
+        self.db.close()
+        self.game_slot.close()
+        file_utils.delete_folder(self.PROJECT_DIR)
+
+    def test_latest(self):
+        """
+        Test case for paging the latest progress by keyset.
+        It asserts the order and content of pages, and that the query walks
+        the index of time instead of sorting the slot.
+        """
+        page = self.game_slot.get_latest_progress(3)
+        self.assertEqual([i["frame"] for i in page], [19_999, 19_998, 19_997])
+        self.assertIsInstance(page[0]["time"], float)
+        page = self.game_slot.get_latest_progress(2, before=page[-1]["time"])
+        self.assertEqual([i["frame"] for i in page], [19_996, 19_995])
+
+        frames = [i["frame"] for i in self.game_slot.iter_progress(page_size=999)]
+        self.assertEqual(frames, list(range(20_000)))
+        newest = self.game_slot.iter_progress(newest_first=True)
+        self.assertEqual(next(newest)["frame"], 19_999)
+
+        plan = self.db.explain(
+            "SELECT Time, Frame, State FROM saves "
+            "WHERE User = ? AND Slot = ? AND Time < ? ORDER BY Time DESC LIMIT ?",
+            ("", "slot", 1_000_500.0, 20),
+        )
+        self.assertIn("INDEX", plan)
+        self.assertNotIn("TEMP B-TREE", plan)
+
+    def test_deep_page(self):
+        """
+        Test case for paging deep into the progress of a heavy player.
+        It asserts that the query of a deep page searches the index of time
+        without scanning or sorting the slot, so it costs the same as the
+        first page.
+        """
+        with patch.object(
+            DBManager, "query", autospec=True, side_effect=DBManager.query
+        ) as query:
+            page = self.game_slot.get_latest_progress(20, before=1_000_100.0)
+        self.assertEqual([i["frame"] for i in page], list(range(99, 79, -1)))
+
+        _, statement, params = query.call_args.args
+        plan = self.db.explain(statement, params)
+        self.assertIn("USING INDEX", plan)
+        self.assertNotIn("SCAN", plan)
+        self.assertNotIn("TEMP B-TREE", plan)
+
+    def test_migrate(self):
+        """
+        Test case for opening a slot created by the older version.
+        It asserts that the key-value slot is moved into the saves of the
+        default user, with text columns converted to time and frame.
+        """
+        old_db = DBManager(os.path.join(self.PROJECT_DIR, "old.db"))
+        old_db.create_table_if_not_exist("slot")
+        old_db.push_dict({"1700000000.5": "12", "1700000001.25": "7"}, "slot")
+        old_db.commit()
+        old_db.close()
+
+        config = configparser.ConfigParser()
+        config.read("../service.ini")
+        config["GameSave"]["db_name"] = "old.db"
+        config_dir = os.path.join(self.PROJECT_DIR, "old.ini")
+        with open(config_dir, "w") as f:
+            config.write(f)
+        game_slot = GameSave(project_dir=self.PROJECT_DIR, config_dir=config_dir)
+        self.assertEqual(
+            game_slot.get_all_progress(),
+            [{"time": 1700000000.5, "frame": 12}, {"time": 1700000001.25, "frame": 7}],
+        )
+        self.assertEqual(game_slot.get_slots(""), ["slot"])
+        game_slot.remove_progress("1700000000.5")
+        self.assertEqual(len(game_slot.get_all_progress()), 1)
+        game_slot.close()
+
+        old_db = DBManager(os.path.join(self.PROJECT_DIR, "old.db"))
+        self.assertEqual(old_db.get_column_types("slot"), {})
+        old_db.close()
+
+
+class TestGameSaveUsers(TestCase):
+    """
+    A test case class for the saves of many users and slots in the GameSave class.
+    """
+
+    PROJECT_DIR = "./projects/test_gamesave_users"
+
+    def setUp(self):
+        """
+        Create the saves of two users, alice has two slots.
+        """
+        file_utils.delete_folder(self.PROJECT_DIR)
+        os.makedirs(self.PROJECT_DIR)
+        self.game_slot = GameSave(
+            project_dir=self.PROJECT_DIR, config_dir="../service.ini"
+        )
+        self.game_slot.import_saves(
+            [
+                {"user": "alice", "slot": "a", "time": 1.0, "frame": 1},
+                {"user": "alice", "slot": "a", "time": 2.0, "frame": 2},
+                {"user": "alice", "slot": "a", "time": 3.0, "frame": 3},
+                {"user": "alice", "slot": "b", "time": 1.5, "frame": 10},
+                {"user": "bob", "slot": "a", "time": 1.0, "frame": 20},
+            ]
+        )
+
+    def tearDown(self):
+        """
+        Remove the project directory.
+        """
+        self.game_slot.close()
+        file_utils.delete_folder(self.PROJECT_DIR)
+
+    def test_save(self):
+        """
+        Test case for saving into the slots of users.
+        It asserts that the saves of users and slots are kept apart.
+        """
+        saved = self.game_slot.save("bob", "b", 21, state=b"\x00vars")
+        self.assertEqual(self.game_slot.get_slots("alice"), ["a", "b"])
+        self.assertEqual(self.game_slot.get_slots("bob"), ["a", "b"])
+        self.assertEqual(
+            self.game_slot.get_saves("bob", "b", 10),
+            [{"time": saved, "frame": 21, "state": b"\x00vars"}],
+        )
+        page = self.game_slot.get_saves("alice", "a", 2)
+        self.assertEqual([i["frame"] for i in page], [3, 2])
+        page = self.game_slot.get_saves("alice", "a", 2, before=page[-1]["time"])
+        self.assertEqual([i["frame"] for i in page], [1])
+        self.assertEqual(self.game_slot.get_all_progress(), [])
+
+        self.assertTrue(self.game_slot.remove_save("alice", "a", 2.0))
+        self.assertFalse(self.game_slot.remove_save("alice", "a", 2.0))
+        self.assertEqual(len(self.game_slot.get_saves("alice", "a", 10)), 2)
+
+    def test_prune(self):
+        """
+        Test case for pruning the old saves of a user.
+        It asserts that only the saves of the user are removed, slot by slot.
+        """
+        self.assertEqual(self.game_slot.prune("alice", keep=1), 2)
+        self.assertEqual(self.game_slot.get_saves("alice", "a", 10)[0]["frame"], 3)
+        self.assertEqual(len(self.game_slot.get_saves("alice", "b", 10)), 1)
+        self.assertEqual(self.game_slot.prune("alice", before=2.0, slot="a"), 0)
+        self.assertEqual(self.game_slot.prune("alice", before=2.0), 1)
+        self.assertEqual(self.game_slot.get_slots("alice"), ["a"])
+        self.assertEqual(len(self.game_slot.get_saves("bob", "a", 10)), 1)
+
+    def test_export(self):
+        """
+        Test case for exporting and importing saves.
+        It asserts that the saves are the same after a round trip, and that
+        importing again replaces instead of duplicating them.
+        """
+        self.game_slot.save("bob", "a", 22, state=b"vars")
+        saves = list(self.game_slot.export_saves(page_size=2))
+        self.assertEqual(len(saves), 6)
+        self.assertEqual(
+            [i["frame"] for i in self.game_slot.export_saves("bob")], [20, 22]
+        )
+
+        self.game_slot.reset()
+        self.assertEqual(self.game_slot.import_saves(iter(saves), batch_size=4), 6)
+        self.assertEqual(self.game_slot.import_saves(saves), 6)
+        self.assertEqual(list(self.game_slot.export_saves(page_size=4)), saves)
@@ -0,0 +1,128 @@
+import sys
+
+sys.path.append("..")
+
+import os
+import tempfile
+from email.utils import formatdate
+from unittest import TestCase
+from fastapi import FastAPI, Request
+from fastapi.testclient import TestClient
+from utils.http_utils import check_not_modified, file_etag, file_response, parse_range
+
+
+class TestHttpUtils(TestCase):
+    """
+    A test case class for testing the http utils.
+    """
+
+    CONTENT = bytes(range(256)) * 40
+
+    def setUp(self):
+        """
+        Create a file and an app serving it.
+        """
+        fd, self.path = tempfile.mkstemp(suffix=".mp3")
+        with os.fdopen(fd, "wb") as f:
+            f.write(self.CONTENT)
+
+        app = FastAPI()
+
+        @app.get("/file")
+        async def get_file(request: Request):
+            return file_response(self.path, request.headers, "private, max-age=60")
+
+        self.client = TestClient(app)
+
+    def tearDown(self):
+        """
+        Remove the file.
+        """
+        os.remove(self.path)
+
+    def test_parse_range(self):
+        """
+        Test case for parse_range function.
+        It asserts normal, open, suffix, ignored and unsatisfiable ranges.
+        """
+        self.assertEqual(parse_range("bytes=0-99", 1000), (0, 99))
+        self.assertEqual(parse_range("bytes=900-", 1000), (900, 999))
+        self.assertEqual(parse_range("bytes=900-2000", 1000), (900, 999))
+        self.assertEqual(parse_range("bytes=-100", 1000), (900, 999))
+        self.assertEqual(parse_range("bytes=-2000", 1000), (0, 999))
+        self.assertIsNone(parse_range("bytes=0-1,5-6", 1000))
+        self.assertIsNone(parse_range("items=0-1", 1000))
+        self.assertIsNone(parse_range("bytes=5-1", 1000))
+        self.assertIsNone(parse_range("bytes=a-b", 1000))
+        with self.assertRaises(ValueError):
+            parse_range("bytes=1000-", 1000)
+        with self.assertRaises(ValueError):
+            parse_range("bytes=-0", 1000)
+
+    def test_not_modified(self):
+        """
+        Test case for check_not_modified function.
+        It asserts that If-None-Match takes precedence over If-Modified-Since.
+        """
+        stat_result = os.stat(self.path)
+        etag = file_etag(stat_result)
+        since = formatdate(stat_result.st_mtime + 10, usegmt=True)
+        before = formatdate(stat_result.st_mtime - 10, usegmt=True)
+        self.assertTrue(check_not_modified({"if-none-match": etag}, etag, 0))
+        self.assertTrue(check_not_modified({"if-none-match": f"W/{etag}"}, etag, 0))
+        self.assertFalse(check_not_modified({"if-none-match": '"x"'}, etag, 0))
+        self.assertTrue(
+            check_not_modified({"if-modified-since": since}, etag, stat_result.st_mtime)
+        )
+        self.assertFalse(
+            check_not_modified(
+                {"if-modified-since": before}, etag, stat_result.st_mtime
+            )
+        )
+        self.assertFalse(
+            check_not_modified(
+                {"if-none-match": '"x"', "if-modified-since": since},
+                etag,
+                stat_result.st_mtime,
+            )
+        )
+
+    def test_file_response(self):
+        """
+        Test case for file_response function.
+        It asserts the full, conditional and range responses.
+        """
+        response = self.client.get("/file")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.content, self.CONTENT)
+        self.assertEqual(response.headers["cache-control"], "private, max-age=60")
+        self.assertEqual(response.headers["accept-ranges"], "bytes")
+        etag = response.headers["etag"]
+
+        response = self.client.get("/file", headers={"If-None-Match": etag})
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b"")
+
+        response = self.client.get("/file", headers={"Range": "bytes=100-199"})
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response.content, self.CONTENT[100:200])
+        self.assertEqual(
+            response.headers["content-range"], f"bytes 100-199/{len(self.CONTENT)}"
+        )
+        self.assertEqual(response.headers["content-type"], "audio/mpeg")
+
+        response = self.client.get(
+            "/file", headers={"Range": "bytes=100-199", "If-Range": '"old"'}
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.content, self.CONTENT)
+
+        response = self.client.get("/file", headers={"Range": "bytes=100000-"})
+        self.assertEqual(response.status_code, 416)
+
+        # rewriting the file changes the entity tag
+        with open(self.path, "ab") as f:
+            f.write(b"more")
+        response = self.client.get("/file", headers={"If-None-Match": etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response.headers["etag"], etag)
@@ -0,0 +1,142 @@
+import sys
+
+sys.path.append("..")
+
+import os
+import time
+from unittest import TestCase
+from module.project_module import ProjectManager, ResourcesType
+from utils.file_utils import delete_folder
+
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+
+class TestResourceIndex(TestCase):
+    """
+    A test case class for testing the resource index of ProjectManager.
+    """
+
+    CONFIG_DIR = "../service.ini"
+
+    def setUp(self):
+        """
+        Create a project with some characters.
+        """
+        delete_folder("./projects/test_index")
+        self.project_manager = ProjectManager("test_index", self.CONFIG_DIR)
+        self.rtype = ResourcesType.Character
+        self.res_dir = self.project_manager.get_dir_by_rtype(self.rtype)
+        for name in ["alice_smile.png", "alice_cry.png", "bob_smile.png", "carol.png"]:
+            self.add_resource(name)
+
+    def tearDown(self):
+        """
+        Remove the project.
+        """
+        self.project_manager.delete_project()
+
+    def add_resource(self, name: str, size: int = 10):
+        """
+        Write a resource file without telling the project manager.
+        """
+        with open(os.path.join(self.res_dir, name), "wb") as f:
+            f.write(b"\0" * size)
+
+    def test_query(self):
+        """
+        Test case for prefix, substring and paginated queries.
+        It asserts that matched names are ordered and counted before paging.
+        """
+        query = self.project_manager.query_resources_by_rtype
+        self.assertEqual(
+            query(self.rtype, prefix="alice")["items"],
+            ["alice_cry.png", "alice_smile.png"],
+        )
+        self.assertEqual(
+            query(self.rtype, contains="smile")["items"],
+            ["alice_smile.png", "bob_smile.png"],
+        )
+        self.assertEqual(
+            query(self.rtype, prefix="a", contains="smile")["items"],
+            ["alice_smile.png"],
+        )
+        self.assertEqual(
+            query(self.rtype, offset=1, limit=2),
+            {"total": 4, "items": ["alice_smile.png", "bob_smile.png"]},
+        )
+        self.assertEqual(query(self.rtype, prefix="z"), {"total": 0, "items": []})
+        self.assertEqual(
+            self.project_manager.get_resources_by_rtype(self.rtype, "o"),
+            ["bob_smile.png", "carol.png"],
+        )
+
+    def test_meta(self):
+        """
+        Test case for the metadata of resources.
+        It asserts size, mtime and dimensions of images.
+        """
+        if Image is not None:
+            Image.new("RGB", (30, 20)).save(os.path.join(self.res_dir, "dave.png"))
+        self.add_resource("empty.png", size=7)
+        self.project_manager.notify_resource_changed(self.rtype)
+
+        items = self.project_manager.query_resources_by_rtype(
+            self.rtype, prefix="e", with_meta=True
+        )["items"]
+        self.assertEqual(items[0]["name"], "empty.png")
+        self.assertEqual(items[0]["size"], 7)
+        self.assertAlmostEqual(items[0]["mtime"], time.time(), delta=60)
+        self.assertIsNone(items[0]["dimensions"])
+
+        if Image is not None:
+            items = self.project_manager.query_resources_by_rtype(
+                self.rtype, prefix="dave", with_meta=True
+            )["items"]
+            self.assertEqual(items[0]["dimensions"], [30, 20])
+
+    def test_invalidate(self):
+        """
+        Test case for keeping the index.
+        It asserts that the index is only rebuilt when resources are changed.
+        """
+        get = self.project_manager.get_resources_by_rtype
+        self.assertEqual(len(get(self.rtype)), 4)
+
+        # written behind the back of project manager, not seen until notified
+        self.add_resource("eve.png")
+        self.assertEqual(len(get(self.rtype)), 4)
+        self.project_manager.notify_resource_changed(self.rtype)
+        self.assertEqual(len(get(self.rtype)), 5)
+
+        self.project_manager.delete_resources_by_rtype(self.rtype, "eve.png")
+        self.assertNotIn("eve.png", get(self.rtype))
+        self.project_manager.rename_resources_by_rtype(self.rtype, "carol.png", "x.png")
+        self.assertEqual(get(self.rtype)[-1], "x.png")
+
+        # hidden files, i.e. unfinished uploads, are not indexed
+        self.add_resource(".upload_123")
+        self.project_manager.notify_resource_changed(self.rtype)
+        self.assertNotIn(".upload_123", get(self.rtype))
+
+    def test_benchmark(self):
+        """
+        Test case for querying a large category.
+        It asserts that queries are answered without scanning the directory again.
+        """
+        for i in range(5000):
+            self.add_resource(f"sprite_{i:05d}.png", size=0)
+        self.project_manager.notify_resource_changed(self.rtype)
+        query = self.project_manager.query_resources_by_rtype
+        query(self.rtype)
+
+        start = time.perf_counter()
+        for i in range(500):
+            result = query(self.rtype, prefix=f"sprite_0{i % 50:02d}", limit=20)
+        used = time.perf_counter() - start
+        print(f"500 prefix queries over 5000 resources: {used:.4f}s")
+        self.assertEqual(result["total"], 100)
+        self.assertEqual(len(result["items"]), 20)
+        self.assertLess(used, 0.5)
@@ -0,0 +1,144 @@
+import sys
+
+sys.path.append("..")
+
+import os
+import tempfile
+import tracemalloc
+from unittest import TestCase
+from fastapi import UploadFile
+from controller.project_controller import ProjectController
+from controller.resource_controller import ResourceController
+from module.config_module import ConfigLoader
+from module.project_module import ResourcesType
+from utils.file_utils import delete_folder
+from utils.status import StatusCode
+
+
+class TestResourceUpload(TestCase):
+    """
+    A test case class for testing the uploading of ResourceController.
+    """
+
+    CONFIG_DIR = "../service.ini"
+
+    def setUp(self):
+        """
+        Create a task to upload resources into.
+        """
+        self.project_controller = ProjectController(self.CONFIG_DIR)
+        self.resource_controller = ResourceController(self.CONFIG_DIR)
+        delete_folder("./projects/test_upload")
+        result = self.project_controller.init_project("test_upload")
+        self.task_id = result.content["task_id"]
+        self.task = self.project_controller.get_task(self.task_id)
+        self.music_dir = self.task.project_manager.get_dir_by_rtype(ResourcesType.Music)
+
+    def tearDown(self):
+        """
+        Remove the project of task.
+        """
+        self.project_controller.remove_project_dir(self.task_id)
+
+    @staticmethod
+    def make_upload(filename: str, size: int) -> UploadFile:
+        """
+        Make an upload backed by a file on disk with the given size.
+        """
+        source = tempfile.TemporaryFile()
+        chunk = b"\0" * (1 << 20)
+        for _ in range(size // len(chunk)):
+            source.write(chunk)
+        source.write(b"\0" * (size % len(chunk)))
+        source.seek(0)
+        return UploadFile(file=source, filename=filename)
+
+    def upload_peak(self, size: int) -> int:
+        """
+        Upload a file with the given size and measure the peak memory.
+        """
+        upload = self.make_upload("song.mp3", size)
+        tracemalloc.start()
+        try:
+            result = self.resource_controller.upload_file(
+                task=self.task, rtype=ResourcesType.Music, file=upload
+            )
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+
+        self.assertEqual(result.status, StatusCode.OK)
+        self.assertEqual(result.content["size"], size)
+        return peak
+
+    def test_upload_file(self):
+        """
+        Test case for uploading a file.
+        It asserts that the file is written and no temporary file is left.
+        """
+        result = self.resource_controller.upload_file(
+            task=self.task,
+            rtype=ResourcesType.Music,
+            file=self.make_upload("song.mp3", 1000),
+        )
+        self.assertEqual(result.status, StatusCode.OK)
+        self.assertEqual(os.listdir(self.music_dir), ["song.mp3"])
+        self.assertEqual(
+            os.path.getsize(os.path.join(self.music_dir, "song.mp3")), 1000
+        )
+
+    def test_oversize(self):
+        """
+        Test case for uploading a file over the max size.
+        It asserts that the upload fails and nothing is left in the directory.
+        """
+        max_size = int(ConfigLoader(self.CONFIG_DIR).resources()["max_size"])
+        result = self.resource_controller.upload_file(
+            task=self.task,
+            rtype=ResourcesType.Music,
+            file=self.make_upload("song.mp3", max_size + 1),
+        )
+        self.assertEqual(result.status, StatusCode.FAIL)
+        self.assertEqual(os.listdir(self.music_dir), [])
+
+    def test_upload_files(self):
+        """
+        Test case for uploading a lot of files at once.
+        It asserts that each file gets its own status and only valid ones are written.
+        """
+        notified = []
+        self.task.project_manager.add_resource_listener(notified.append)
+        files = [self.make_upload(f"song{i}.mp3", 1000 + i) for i in range(20)]
+        files.append(self.make_upload("image.png", 10))
+        result = self.resource_controller.upload_files(
+            task=self.task, rtype=ResourcesType.Music, files=files
+        )
+        self.assertEqual(result.status, StatusCode.OK)
+        self.assertEqual(
+            [i.status for i in result.content],
+            [StatusCode.OK] * 20 + [StatusCode.FAIL],
+        )
+        self.assertEqual(result.content[3].content["size"], 1003)
+        self.assertEqual(
+            sorted(os.listdir(self.music_dir)),
+            sorted(f"song{i}.mp3" for i in range(20)),
+        )
+        self.assertEqual(notified, ["music_dir"])
+
+        result = self.resource_controller.upload_files(
+            task=self.task,
+            rtype=ResourcesType.Music,
+            files=[self.make_upload("image.png", 10)],
+        )
+        self.assertEqual(result.status, StatusCode.FAIL)
+        self.assertEqual(len(notified), 1)
+
+    def test_memory(self):
+        """
+        Test case for the memory used by uploading.
+        It asserts that the peak memory does not grow with the file size.
+        """
+        small = self.upload_peak(4 << 20)
+        large = self.upload_peak(40 << 20)
+        self.assertLess(large, 4 << 20)
+        self.assertLess(large, small * 2)
@@ -0,0 +1,148 @@
+import sys
+
+sys.path.append("..")
+
+import asyncio
+import threading
+import time
+from unittest import IsolatedAsyncioTestCase
+from controller.project_controller import task_reader, task_writer
+from utils.rw_lock import ReadWriteLock
+from utils.task_dispatcher import TaskDispatcher
+
+
+class FakeTask:
+    """
+    A task only holding the lock.
+    """
+
+    def __init__(self):
+        self.lock = ReadWriteLock()
+
+
+class FakeController:
+    """
+    A controller reading and writing the task.
+    """
+
+    @task_reader
+    def read(self, task: FakeTask) -> str:
+        """
+        Read the task.
+        """
+        return "read"
+
+    @task_writer
+    def write(self, task: FakeTask, seconds: float) -> str:
+        """
+        Hold the task for a while.
+        """
+        time.sleep(seconds)
+        return "write"
+
+
+class TestTaskDispatcher(IsolatedAsyncioTestCase):
+    """
+    A test case class for testing the TaskDispatcher class.
+    """
+
+    def setUp(self):
+        """
+        Create a dispatcher and a work recording how many run at the same time.
+        """
+        self.dispatcher = TaskDispatcher(max_workers=4)
+        self.lock = threading.Lock()
+        self.running = 0
+        self.max_running = 0
+
+    def tearDown(self):
+        """
+        Stop the dispatcher.
+        """
+        self.dispatcher.shutdown()
+
+    def work(self, value):
+        """
+        A blocking work returning its argument.
+        """
+        with self.lock:
+            self.running += 1
+            self.max_running = max(self.max_running, self.running)
+        time.sleep(0.05)
+        with self.lock:
+            self.running -= 1
+        return value
+
+    async def test_same_key(self):
+        """
+        Test case for work with the same key.
+        It asserts that they run in parallel and results are kept in order.
+        """
+        results = await asyncio.gather(
+            *[self.dispatcher.run("task", self.work, i) for i in range(4)]
+        )
+        self.assertEqual(results, [0, 1, 2, 3])
+        self.assertEqual(self.max_running, 4)
+
+    async def test_metrics(self):
+        """
+        Test case for the metrics of dispatcher.
+        It asserts that work over the pool size is seen waiting in the queue.
+        """
+        works = [self.dispatcher.run(str(i % 2), self.work, i) for i in range(5)]
+        works.append(self.dispatcher.run(None, self.work, 5))
+        gathered = asyncio.gather(*works)
+        await asyncio.sleep(0.01)
+        metrics = self.dispatcher.metrics()
+        self.assertEqual(metrics["queue_depth"], {"0": 3, "1": 2, "None": 1})
+        self.assertEqual(metrics["submitted"], 6)
+        self.assertEqual(metrics["running"], 4)
+        self.assertEqual(metrics["waiting"], 2)
+
+        self.assertEqual(await gathered, [0, 1, 2, 3, 4, 5])
+        self.assertEqual(self.max_running, 4)
+        metrics = self.dispatcher.metrics()
+        self.assertEqual(metrics["queue_depth"], {})
+        self.assertEqual(metrics["completed"], 6)
+
+    async def test_exception(self):
+        """
+        Test case for a failing work.
+        It asserts that the exception is raised to the caller and the key is cleared.
+        """
+
+        def fail():
+            raise ValueError("fail")
+
+        with self.assertRaises(ValueError):
+            await self.dispatcher.run("task", fail)
+        self.assertEqual(self.dispatcher.metrics()["queue_depth"], {})
+        self.assertEqual(await self.dispatcher.run("task", self.work, 1), 1)
+
+    async def test_task_lock(self):
+        """
+        Test case for work waiting for the lock of a busy task.
+        It asserts that the waiting work does not take a thread, so the work
+        of the other tasks is not starved.
+        """
+        controller = FakeController()
+        task = FakeTask()
+        writing = asyncio.ensure_future(
+            self.dispatcher.run("busy", controller.write, task, 0.5)
+        )
+        await asyncio.sleep(0.01)
+        readers = asyncio.gather(
+            *[self.dispatcher.run("busy", controller.read, task) for _ in range(4)]
+        )
+        await asyncio.sleep(0.01)
+        self.assertEqual(self.dispatcher.metrics()["running"], 1)
+
+        others = asyncio.gather(
+            *[self.dispatcher.run("other", self.work, i) for i in range(3)]
+        )
+        self.assertEqual(await asyncio.wait_for(others, 0.3), [0, 1, 2])
+        self.assertFalse(writing.done())
+
+        self.assertEqual(await readers, ["read"] * 4)
+        self.assertEqual(await writing, "write")
+        self.assertEqual(self.dispatcher.metrics()["queue_depth"], {})
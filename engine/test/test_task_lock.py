@@ -0,0 +1,237 @@
+import sys
+
+sys.path.append("..")
+
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from unittest import TestCase
+from controller.project_controller import ProjectController
+from controller.engine_controller import EngineController
+from controller.gamesave_controller import GameSaveController
+from kernel.frame import Frame
+from utils.file_utils import delete_folder
+from utils.rw_lock import ReadWriteLock
+from utils.status import StatusCode
+
+
+class TestReadWriteLock(TestCase):
+    """
+    A test case class for testing the ReadWriteLock class.
+    """
+
+    def run_holders(self, holders: list[str]) -> int:
+        """
+        Hold the lock from a thread for each holder at the same time.
+
+        @param holders: "read" or "write" for each thread
+        @return: max amount of threads holding the lock at the same time
+        """
+        lock = ReadWriteLock()
+        counter = threading.Lock()
+        state = {"holding": 0, "max_holding": 0}
+
+        def hold(mode: str):
+            with getattr(lock, mode)():
+                with counter:
+                    state["holding"] += 1
+                    state["max_holding"] = max(state["max_holding"], state["holding"])
+                time.sleep(0.05)
+                with counter:
+                    state["holding"] -= 1
+
+        threads = [threading.Thread(target=hold, args=(i,)) for i in holders]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return state["max_holding"]
+
+    def test_readers(self):
+        """
+        Test case for readers.
+        It asserts that readers hold the lock at the same time.
+        """
+        self.assertEqual(self.run_holders(["read"] * 4), 4)
+
+    def test_writers(self):
+        """
+        Test case for writers mixed with readers.
+        It asserts that a writer holds the lock alone.
+        """
+        self.assertEqual(self.run_holders(["write"] * 4), 1)
+
+        lock = ReadWriteLock()
+
+        def read():
+            with lock.read():
+                pass
+
+        with lock.write():
+            reader = threading.Thread(target=read)
+            reader.start()
+            reader.join(0.05)
+            self.assertTrue(reader.is_alive())
+        reader.join()
+        self.assertFalse(reader.is_alive())
+
+
+class TestTaskLock(TestCase):
+    """
+    A test case class for concurrent access to a single task.
+    """
+
+    CONFIG_DIR = "../service.ini"
+    CHAPTER = "chapter"
+
+    def setUp(self):
+        """
+        Create a task with a chapter.
+        """
+        self.project_controller = ProjectController(self.CONFIG_DIR)
+        self.engine_controller = EngineController(self.CONFIG_DIR)
+        delete_folder("./projects/test_lock")
+        result = self.project_controller.init_project("test_lock")
+        self.task_id = result.content["task_id"]
+        self.task = self.project_controller.get_task(self.task_id)
+        self.engine_controller.add_chapter(self.task, self.CHAPTER)
+
+    def tearDown(self):
+        """
+        Remove the project of task.
+        """
+        if self.project_controller.check_task_exist(self.task_id):
+            self.project_controller.remove_project_dir(self.task_id)
+
+    def writer(self, rounds: int):
+        """
+        Append, move and remove frames owned by this writer.
+        """
+        controller = self.engine_controller
+        owned = []
+        for _ in range(rounds):
+            fid = controller.append_frame(self.task, self.CHAPTER, "frame").content[0]
+            if len(owned) > 0:
+                controller.move_frame(self.task, fid, random.choice(owned))
+            owned.append(fid)
+            if len(owned) > 5:
+                fid = owned.pop(random.randrange(len(owned)))
+                controller.remove_frame(self.task, fid)
+
+    def reader(self, stop: threading.Event):
+        """
+        Read the frames until stopped, the struct should never be half changed.
+        """
+        controller = self.engine_controller
+        while not stop.is_set():
+            fids = controller.get_frame_ids(self.task, self.CHAPTER).content
+            struct = controller.render_struct(self.task, self.CHAPTER).content
+            self.assertEqual(len(struct[self.CHAPTER]), len(set(struct[self.CHAPTER])))
+            if len(fids) > 0:
+                result = controller.get_frame(self.task, fid=random.choice(fids))
+                self.assertIn(result.status, (StatusCode.OK, StatusCode.FAIL))
+
+    def test_stress(self):
+        """
+        Test case for many readers and writers on the same task.
+        It asserts that no operation fails and the frame list stays consistent.
+        """
+        errors = []
+        stop = threading.Event()
+
+        def guard(func, *args):
+            try:
+                func(*args)
+            except Exception as e:
+                errors.append(e)
+                stop.set()
+
+        readers = [
+            threading.Thread(target=guard, args=(self.reader, stop)) for _ in range(8)
+        ]
+        writers = [
+            threading.Thread(target=guard, args=(self.writer, 30)) for _ in range(4)
+        ]
+        for thread in readers + writers:
+            thread.start()
+        for thread in writers:
+            thread.join()
+        stop.set()
+        for thread in readers:
+            thread.join()
+        self.assertEqual(errors, [])
+
+        engine = self.task.project_engine
+        order = engine.render_struct(self.CHAPTER)[self.CHAPTER]
+        self.assertEqual(len(order), 4 * 5)
+        self.assertEqual(set(order), engine.get_frame_ids())
+        for prev_fid, fid in zip(order, order[1:]):
+            self.assertEqual(engine.get_frame(prev_fid).action.next_f, fid)
+            self.assertEqual(engine.get_frame(fid).action.prev_f, prev_fid)
+        self.assertEqual(engine.get_frame(order[0]).action.prev_f, Frame.VOID_FRAME_ID)
+
+    def test_gamesave(self):
+        """
+        Test case for saving while the project is being read by the editor.
+        It asserts that saves do not wait for the readers of task.
+        """
+        controller = GameSaveController()
+        holding = threading.Event()
+        release = threading.Event()
+
+        def read():
+            with self.task.lock.read():
+                holding.set()
+                release.wait()
+
+        thread = threading.Thread(target=read)
+        thread.start()
+        holding.wait()
+        try:
+            with ThreadPoolExecutor(max_workers=1) as executor:
+                result = executor.submit(
+                    controller.save, self.task, "user", "slot", 1
+                ).result(timeout=5)
+            self.assertEqual(result.status, StatusCode.OK)
+        finally:
+            release.set()
+            thread.join()
+        result = controller.get_saves(self.task, "user", "slot")
+        self.assertEqual(len(result.content), 1)
+
+    def test_remove_project(self):
+        """
+        Test case for removing the project while the task is being read.
+        It asserts that the task list is not held while waiting for the task,
+        so the other projects can be opened and the blobs collected meanwhile.
+        """
+        holding = threading.Event()
+        release = threading.Event()
+
+        def read():
+            with self.task.lock.read():
+                holding.set()
+                release.wait()
+
+        thread = threading.Thread(target=read)
+        thread.start()
+        holding.wait()
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            try:
+                removing = executor.submit(
+                    self.project_controller.remove_project_dir, self.task_id
+                )
+                time.sleep(0.1)
+                self.assertFalse(removing.done())
+                opening = executor.submit(
+                    self.project_controller.init_project, "test_lock_other"
+                )
+                other_id = opening.result(timeout=5).content["task_id"]
+                self.project_controller.collect_blobs()
+            finally:
+                release.set()
+            self.assertEqual(removing.result(timeout=5).status, StatusCode.OK)
+        thread.join()
+        self.assertFalse(self.project_controller.check_task_exist(self.task_id))
+        self.project_controller.remove_project_dir(other_id)
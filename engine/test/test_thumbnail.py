@@ -0,0 +1,135 @@
+import sys
+
+sys.path.append("..")
+
+import configparser
+import os
+import threading
+import time
+from concurrent.futures import Future
+from unittest import TestCase, skipUnless
+from unittest.mock import patch
+from module.thumbnail_module import ThumbnailCache
+from utils.file_utils import delete_folder
+
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+
+@skipUnless(ThumbnailCache.available(), "pillow is not installed")
+class TestThumbnailCache(TestCase):
+    """
+    A test case class for testing the ThumbnailCache class.
+    """
+
+    CONFIG_DIR = "../service.ini"
+    PROJECT_DIR = "./projects/test_thumbnail"
+
+    def setUp(self):
+        """
+        Create a project directory with an image.
+        """
+        delete_folder(self.PROJECT_DIR)
+        os.makedirs(self.PROJECT_DIR)
+        self.image_dir = os.path.join(self.PROJECT_DIR, "bg.png")
+        Image.new("RGB", (1920, 1080), (255, 0, 0)).save(self.image_dir)
+        self.cache = ThumbnailCache(self.PROJECT_DIR, self.CONFIG_DIR)
+
+    def tearDown(self):
+        """
+        Remove the project directory.
+        """
+        delete_folder(self.PROJECT_DIR)
+
+    @classmethod
+    def tearDownClass(cls):
+        """
+        Stop the process pool.
+        """
+        ThumbnailCache.shutdown()
+
+    def test_get(self):
+        """
+        Test case for the get method.
+        It asserts the size of thumbnail, the cache hit and the key of new version.
+        """
+        self.assertEqual(self.cache.fit_size(100), 128)
+        self.assertEqual(self.cache.fit_size(300), 512)
+        self.assertEqual(self.cache.fit_size(4096), 512)
+
+        thumbnail_dir = self.cache.get("background", self.image_dir, 100)
+        with Image.open(thumbnail_dir) as image:
+            self.assertEqual(image.size, (128, 72))
+        self.assertEqual(
+            self.cache.get("background", self.image_dir, 128), thumbnail_dir
+        )
+        self.assertEqual(self.cache.usage()["amount"], 1)
+
+        # a rewritten image never hits the stale thumbnail
+        time.sleep(0.01)
+        Image.new("RGB", (100, 200), (0, 255, 0)).save(self.image_dir)
+        new_dir = self.cache.get("background", self.image_dir, 128)
+        self.assertNotEqual(new_dir, thumbnail_dir)
+        with Image.open(new_dir) as image:
+            self.assertEqual(image.size, (64, 128))
+
+        # the cache is recovered from disk
+        cache = ThumbnailCache(self.PROJECT_DIR, self.CONFIG_DIR)
+        self.assertEqual(cache.usage()["amount"], 2)
+
+    def test_prefetch(self):
+        """
+        Test case for the prefetch method.
+        It asserts that get waits for the thumbnail in generation.
+        """
+        self.cache.prefetch("background", self.image_dir, 128)
+        thumbnail_dir = self.cache.get("background", self.image_dir, 128)
+        self.assertTrue(os.path.isfile(thumbnail_dir))
+
+    def test_evict(self):
+        """
+        Test case for evicting by disk quota.
+        It asserts that the least recently used thumbnails are removed.
+        """
+        images = []
+        for i in range(4):
+            image_dir = os.path.join(self.PROJECT_DIR, f"c{i}.png")
+            Image.new("RGB", (600, 600), (255, 0, 0)).save(image_dir)
+            images.append(image_dir)
+
+        first = self.cache.get("character", images[0], 512)
+        quota = os.path.getsize(first) * 2 + 1
+        config = configparser.ConfigParser()
+        config.read(self.CONFIG_DIR)
+        config["Thumbnail"]["quota"] = str(quota)
+        config_dir = os.path.join(self.PROJECT_DIR, "service.ini")
+        with open(config_dir, "w") as f:
+            config.write(f)
+
+        cache = ThumbnailCache(self.PROJECT_DIR, config_dir)
+        second = cache.get("character", images[1], 512)
+        cache.get("character", images[0], 512)  # first is used again
+        cache.get("character", images[2], 512)
+
+        self.assertTrue(os.path.isfile(first))
+        self.assertFalse(os.path.isfile(second))
+        self.assertLessEqual(cache.usage()["total"], quota)
+
+        # evicted by other requests between generated and used
+        result = Future.result
+        evicting = []
+
+        def evict(future, *args, **kwargs):
+            value = result(future, *args, **kwargs)
+            if threading.current_thread() is threading.main_thread() and not evicting:
+                evicting.append(True)
+                cache.get("character", images[3], 512)
+                cache.get("character", images[0], 512)
+            return value
+
+        with patch.object(Future, "result", autospec=True, side_effect=evict):
+            second = cache.get("character", images[1], 512)
+        self.assertTrue(os.path.isfile(second))
+        self.assertEqual(cache.usage()["amount"], 2)
@@ -0,0 +1,307 @@
+"""
+pool of sqlite connections shared by threads
+
+"""
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Iterator, Optional
+
+from utils.db_utils import DBManager
+from utils.exception import DBManagerError
+
+_pools: dict[str, "ConnectionPool"] = {}  # {database directory: pool}
+_pools_refs: dict[str, int] = {}  # {database directory: amount of users}
+_pools_lock = threading.Lock()  # guard the pools
+
+
+class ConnectionPool:
+    """
+    connections of a database shared by threads, there is a single writer
+    connection, taken by one thread at a time (the same thread can take it
+    again, i.e. nested transaction), and up to max readers read-only
+    connections, a thread holding the writer reads from it, so it sees its
+    own changes not committed yet
+
+    a connection is only used by the thread holding it, connections idle
+    longer than idle timeout are closed when the pool is used or reaped
+
+    """
+
+    def __init__(
+        self,
+        db_dir: str,
+        max_readers: int = 4,
+        idle_timeout: float = 60,
+        wait_timeout: float = 30,
+        **db_config,
+    ):
+        """
+        constructor for connection pool, connections are opened on demand
+
+        @param db_dir: database directory
+        @param max_readers: max amount of reader connections
+        @param idle_timeout: seconds before an idle connection is closed
+        @param wait_timeout: max seconds to wait for a connection
+        @param db_config: journal mode and synchronous level of database
+
+        """
+        if max_readers < 1:
+            raise DBManagerError(f"invalid amount of readers {max_readers}")
+        self.__db_dir = db_dir
+        self.__db_config = db_config
+        self.__max_readers = max_readers
+        self.__idle_timeout = idle_timeout
+        self.__wait_timeout = wait_timeout
+
+        self.__cond = threading.Condition()  # guard the states below
+        self.__idle: list[tuple[DBManager, float]] = []  # [(reader, idle since)]
+        self.__readers_in_use = 0
+        self.__writer: Optional[DBManager] = None
+        self.__writer_idle_since = time.monotonic()
+        self.__writer_owner: Optional[int] = None  # id of thread holding writer
+        self.__writer_depth = 0
+        self.__closed = False
+
+        self.__opened = 0
+        self.__reaped = 0
+        self.__waits = 0
+
+    def __open(self, read_only: bool) -> DBManager:
+        """
+        open a connection of database
+
+        @param read_only: open a reader connection
+        @return: connection
+        """
+        dbman = DBManager(self.__db_dir, check_same_thread=False, **self.__db_config)
+        if read_only:
+            dbman.execute("PRAGMA query_only = ON")
+        return dbman
+
+    def __wait(self, deadline: float):
+        """
+        wait until a connection is released, must hold the condition
+
+        @param deadline: give up after this moment
+        """
+        self.__waits += 1
+        timeout = deadline - time.monotonic()
+        if timeout <= 0 or not self.__cond.wait(timeout):
+            raise DBManagerError(
+                f"no connection of {self.__db_dir} freed in {self.__wait_timeout}s"
+            )
+
+    def __check_open(self):
+        """
+        raise if the pool is closed, must hold the condition
+        """
+        if self.__closed:
+            raise DBManagerError(f"pool of {self.__db_dir} is closed")
+
+    def owns_writer(self) -> bool:
+        """
+        check if current thread holds the writer
+
+        @return: holds or not
+        """
+        return self.__writer_owner == threading.get_ident()
+
+    @contextmanager
+    def writer(self) -> Iterator[DBManager]:
+        """
+        hold the writer connection, wait if another thread holds it
+
+            with pool.writer() as db:
+                with db.transaction():
+                    ...
+
+        @return: context manager of writer connection
+        """
+        thread_id = threading.get_ident()
+        with self.__cond:
+            self.__check_open()
+            deadline = time.monotonic() + self.__wait_timeout
+            while self.__writer_owner not in (None, thread_id):
+                self.__wait(deadline)
+                self.__check_open()
+            if self.__writer is None:
+                self.__reap()
+                self.__writer = self.__open(read_only=False)
+                self.__opened += 1
+            self.__writer_owner = thread_id
+            self.__writer_depth += 1
+            dbman = self.__writer
+
+        try:
+            yield dbman
+        finally:
+            with self.__cond:
+                self.__writer_depth -= 1
+                if self.__writer_depth == 0:
+                    self.__writer_owner = None
+                    self.__writer_idle_since = time.monotonic()
+                    self.__cond.notify_all()
+
+    @contextmanager
+    def reader(self) -> Iterator[DBManager]:
+        """
+        hold a reader connection, wait if all the readers are in use, the
+        thread holding the writer reads from the writer instead
+
+            with pool.reader() as db:
+                db.query(...)
+
+        @return: context manager of reader connection
+        """
+        if self.owns_writer():
+            with self.writer() as dbman:
+                yield dbman
+            return
+
+        with self.__cond:
+            self.__check_open()
+            self.__reap()
+            deadline = time.monotonic() + self.__wait_timeout
+            while len(self.__idle) == 0 and self.__readers_in_use >= self.__max_readers:
+                self.__wait(deadline)
+                self.__check_open()
+            self.__readers_in_use += 1
+            dbman = None
+            if len(self.__idle) > 0:
+                dbman = self.__idle.pop()[0]
+            else:
+                self.__opened += 1
+
+        try:
+            if dbman is None:
+                dbman = self.__open(read_only=True)
+        except BaseException:
+            with self.__cond:
+                self.__readers_in_use -= 1
+                self.__cond.notify_all()
+            raise
+
+        try:
+            yield dbman
+        finally:
+            with self.__cond:
+                self.__readers_in_use -= 1
+                if self.__closed:
+                    dbman.close()
+                else:
+                    # the latest used is taken first, so the others go idle
+                    self.__idle.append((dbman, time.monotonic()))
+                self.__cond.notify_all()
+
+    def __reap(self) -> int:
+        """
+        close the connections idle longer than idle timeout, must hold the
+        condition
+
+        @return: amount of connections closed
+        """
+        expire = time.monotonic() - self.__idle_timeout
+        reaped = 0
+        while len(self.__idle) > 0 and self.__idle[0][1] <= expire:
+            self.__idle.pop(0)[0].close()
+            reaped += 1
+        if (
+            self.__writer is not None
+            and self.__writer_owner is None
+            and self.__writer_idle_since <= expire
+        ):
+            self.__writer.close()
+            self.__writer = None
+            reaped += 1
+        self.__reaped += reaped
+        return reaped
+
+    def reap(self) -> int:
+        """
+        close the connections idle longer than idle timeout
+
+        @return: amount of connections closed
+        """
+        with self.__cond:
+            return self.__reap()
+
+    def metrics(self) -> dict:
+        """
+        get the metrics of pool
+
+        @return: metrics
+        """
+        with self.__cond:
+            return {
+                "max_readers": self.__max_readers,
+                "readers_open": len(self.__idle) + self.__readers_in_use,
+                "readers_in_use": self.__readers_in_use,
+                "writer_open": self.__writer is not None,
+                "writer_in_use": self.__writer_owner is not None,
+                "opened": self.__opened,
+                "reaped": self.__reaped,
+                "waits": self.__waits,
+            }
+
+    def close(self):
+        """
+        close the idle connections and the writer, the readers in use are
+        closed when released
+
+        """
+        with self.__cond:
+            self.__closed = True
+            for dbman, _ in self.__idle:
+                dbman.close()
+            self.__idle.clear()
+            if self.__writer is not None:
+                self.__writer.close()
+                self.__writer = None
+            self.__cond.notify_all()
+
+
+def acquire_pool(db_dir: str, **pool_config) -> ConnectionPool:
+    """
+    get the pool of database, shared by all the users of the same database,
+    the pool is created by the first user with its config
+
+    @param db_dir: database directory
+    @param pool_config: config of pool, see `ConnectionPool`
+    @return: pool of database
+    """
+    key = os.path.realpath(db_dir)
+    with _pools_lock:
+        if key not in _pools:
+            _pools[key] = ConnectionPool(db_dir, **pool_config)
+            _pools_refs[key] = 0
+        _pools_refs[key] += 1
+        return _pools[key]
+
+
+def release_pool(db_dir: str):
+    """
+    release the pool of database, it is closed after the last user released
+
+    @param db_dir: database directory
+    """
+    key = os.path.realpath(db_dir)
+    with _pools_lock:
+        if key not in _pools:
+            return
+        _pools_refs[key] -= 1
+        if _pools_refs[key] == 0:
+            _pools_refs.pop(key)
+            _pools.pop(key).close()
+
+
+def pools_metrics() -> dict:
+    """
+    get the metrics of all the pools
+
+    @return: {database directory: metrics}
+    """
+    with _pools_lock:
+        pools = dict(_pools)
+    return {key: pool.metrics() for key, pool in pools.items()}
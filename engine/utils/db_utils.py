@@ -3,39 +3,126 @@ A general database key-value PDO
 """
 
 import os
+import re
 import sqlite3
+from contextlib import contextmanager
+from typing import Optional
 from utils.exception import DBManagerError
 
+TABLE_NAME_PATTERN = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
+JOURNAL_MODES = ("DELETE", "TRUNCATE", "PERSIST", "MEMORY", "WAL", "OFF")
+SYNCHRONOUS_LEVELS = ("OFF", "NORMAL", "FULL", "EXTRA")
+COLUMN_TYPES = ("TEXT", "INTEGER", "REAL", "BLOB")
+COLUMNS = ("ID", "Key", "Value")
+
+
+def quote_table(table_name: str) -> str:
+    """
+    check and quote the table (or index) name, as it is put into statement
+    directly
+
+    @param table_name: table name
+    @return: quoted table name
+    """
+    if not TABLE_NAME_PATTERN.match(table_name):
+        raise DBManagerError(f"invalid table name '{table_name}'")
+    return f'"{table_name}"'
+
 
 class DBManager:
     """
     PDO for split3 database, stimulate key-value database schema
+
+    all statements are parameterized so sqlite reuses the prepared statement,
+    only the table name (which cannot be a parameter) is checked and quoted
     """
 
-    def __init__(self, db_dir):
+    def __init__(
+        self,
+        db_dir,
+        journal_mode: str = "WAL",
+        synchronous: str = "NORMAL",
+        check_same_thread: bool = True,
+    ):
         """
         constructor for DBManager
 
         @param db_dir: database directory
+        @param journal_mode: journal mode of sqlite, i.e. WAL
+        @param synchronous: how often sqlite syncs to disk, under WAL mode
+                            NORMAL only syncs on checkpoint
+        @param check_same_thread: only allow the creating thread to use it,
+                                  turn off if the caller serializes the use
         """
         self.__cursor = None
         self.__db = None
-        self.connect(db_dir)
+        self.__depth = 0  # depth of nested transaction
+        self.connect(db_dir, journal_mode, synchronous, check_same_thread)
 
-    def create_table_if_not_exist(self, table_name: str):
+    @staticmethod
+    def __table(table_name: str) -> str:
         """
-        create table via given table name, do nothing if table already exist
+        check and quote the table name, as it is put into statement directly
 
         @param table_name: table name
+        @return: quoted table name
+        """
+        return quote_table(table_name)
+
+    @staticmethod
+    def __column(column: str) -> str:
+        """
+        check the column name, as it is put into statement directly
+
+        @param column: column name
+        @return: column name
+        """
+        if column not in COLUMNS:
+            raise DBManagerError(f"invalid column '{column}'")
+        return column
+
+    @staticmethod
+    def __column_type(column_type: str) -> str:
+        """
+        check the column type
+
+        @param column_type: type of column
+        @return: type of column
+        """
+        column_type = column_type.upper()
+        if column_type not in COLUMN_TYPES:
+            raise DBManagerError(f"invalid column type '{column_type}'")
+        return column_type
+
+    def create_table_if_not_exist(
+        self, table_name: str, key_type: str = "TEXT", value_type: str = "TEXT"
+    ):
+        """
+        create table via given table name, do nothing if table already exist,
+        the key is unique and indexed
+
+        @param table_name: table name
+        @param key_type: type of key column, i.e. REAL for timestamp
+        @param value_type: type of value column
         @return:
         """
         self.__cursor.execute(
-            f"""CREATE TABLE IF NOT EXISTS {table_name}
+            f"""CREATE TABLE IF NOT EXISTS {self.__table(table_name)}
                             (ID INTEGER PRIMARY KEY AUTOINCREMENT NOT NULL  ,
-                            Key TEXT            NOT NULL UNIQUE ,
-                            Value Text          NOT NULL)"""
+                            Key {self.__column_type(key_type)} NOT NULL UNIQUE ,
+                            Value {self.__column_type(value_type)} NOT NULL)"""
         )
 
+    def get_column_types(self, table_name: str) -> dict:
+        """
+        get the declared type of columns
+
+        @param table_name: table name
+        @return: {column name: type}, empty if table not exist
+        """
+        rows = self.__db.execute(f"PRAGMA table_info({self.__table(table_name)})")
+        return {row[1]: row[2].upper() for row in rows}
+
     def push(self, key: str, value: str, table_name: str):
         """
         push key-value into specified table
@@ -45,24 +132,27 @@ class DBManager:
         @param table_name: table name
         @return:
         """
-        try:
-            self.__cursor.execute(
-                f'INSERT INTO {table_name} (Key,Value) Values ("{key}", "{value}")'
-            )
-        except sqlite3.Error as e_msg:
-            raise DBManagerError(
-                f"key f'{key}' already exist in table '{table_name}'"
-            ) from e_msg
+        self.push_dict({key: value}, table_name)
 
     def push_dict(self, data: dict, table_name: str):
         """
-        push a dictionary into table
+        push a dictionary into table by a single statement
+
         @param data: data in dict format
         @param table_name: table name
         @return:
         """
-        for key in data.keys():
-            self.push(key, data[key], table_name)
+        try:
+            self.__cursor.executemany(
+                f"INSERT INTO {self.__table(table_name)} (Key, Value) VALUES (?, ?)",
+                data.items(),
+            )
+        except sqlite3.IntegrityError as e_msg:
+            raise DBManagerError(
+                f"key already exist in table '{table_name}'"
+            ) from e_msg
+        except sqlite3.Error as e_msg:
+            raise DBManagerError(str(e_msg)) from e_msg
 
     def update(self, key: str, value: str, table_name: str):
         """
@@ -74,7 +164,8 @@ class DBManager:
         """
         try:
             self.__cursor.execute(
-                f'UPDATE {table_name} SET Value="{value}" WHERE Key="{key}"'
+                f"UPDATE {self.__table(table_name)} SET Value = ? WHERE Key = ?",
+                (value, key),
             )
         except sqlite3.Error as e_msg:
             raise DBManagerError(str(e_msg)) from e_msg
@@ -88,7 +179,9 @@ class DBManager:
         @return:
         """
         try:
-            self.__cursor.execute(f'DELETE from {table_name} where key="{key}"')
+            self.__cursor.execute(
+                f"DELETE FROM {self.__table(table_name)} WHERE Key = ?", (key,)
+            )
         except sqlite3.Error as e_msg:
             raise DBManagerError(str(e_msg)) from e_msg
 
@@ -99,22 +192,37 @@ class DBManager:
         @param table_name: table name
         @return:
         """
-        self.__cursor.execute(f"DROP TABLE IF EXISTS {table_name}")
+        self.__cursor.execute(f"DROP TABLE IF EXISTS {self.__table(table_name)}")
 
-    def select(self, table_name: str, is_desc: bool = False, amount: int = -1) -> dict:
+    def select(
+        self,
+        table_name: str,
+        is_desc: bool = False,
+        amount: int = -1,
+        offset: int = 0,
+        order_by: Optional[str] = None,
+    ) -> dict:
         """
         select items from table given
 
         @param table_name: table name
-        @param is_desc: is ordered descend
+        @param is_desc: is ordered descend, by value if order_by not given
         @param amount: amount item to be selected, if overflow or -1, select all items
+        @param offset: skip the first items
+        @param order_by: column to order by, i.e. ID, Key or Value
         @return: selected items
         """
-        arg_limit = "LIMIT " + str(amount) if amount != -1 else ""
-        arg_desc = "ORDERED BY Value DESC" if is_desc else ""
+        if order_by is None and is_desc:
+            order_by = "Value"
+        arg_order = ""
+        if order_by is not None:
+            arg_order = f"ORDER BY {self.__column(order_by)} "
+            arg_order += "DESC" if is_desc else "ASC"
         try:
             data = self.__cursor.execute(
-                f"SELECT id, key, value  from {table_name} {arg_limit} {arg_desc}"
+                f"SELECT ID, Key, Value FROM {self.__table(table_name)} "
+                f"{arg_order} LIMIT ? OFFSET ?",
+                (amount, offset),
             )
         except Exception as e_msg:
             raise DBManagerError(
@@ -125,6 +233,98 @@ class DBManager:
             out[row[1]] = row[2]
         return out
 
+    def execute(self, statement: str, params: tuple = ()) -> int:
+        """
+        execute a parameterized statement, for the tables not in key-value
+        schema
+
+        @param statement: sql statement
+        @param params: parameters of statement
+        @return: amount of rows changed
+        """
+        try:
+            return self.__cursor.execute(statement, params).rowcount
+        except sqlite3.Error as e_msg:
+            raise DBManagerError(str(e_msg)) from e_msg
+
+    def executemany(self, statement: str, rows) -> int:
+        """
+        execute a parameterized statement once for each row of parameters
+
+        @param statement: sql statement
+        @param rows: iterable of parameters
+        @return: amount of rows changed
+        """
+        try:
+            return self.__cursor.executemany(statement, rows).rowcount
+        except sqlite3.Error as e_msg:
+            raise DBManagerError(str(e_msg)) from e_msg
+
+    def query(self, statement: str, params: tuple = ()) -> list[tuple]:
+        """
+        run a parameterized query and fetch all the rows
+
+        @param statement: sql statement
+        @param params: parameters of statement
+        @return: list of rows
+        """
+        try:
+            return self.__db.execute(statement, params).fetchall()
+        except sqlite3.Error as e_msg:
+            raise DBManagerError(str(e_msg)) from e_msg
+
+    def explain(self, statement: str, params: tuple = ()) -> str:
+        """
+        get the query plan of statement, i.e. to check if an index is used
+
+        @param statement: sql statement
+        @param params: parameters of statement
+        @return: query plan, one step per line
+        """
+        rows = self.__db.execute(f"EXPLAIN QUERY PLAN {statement}", params)
+        return "\n".join(row[-1] for row in rows)
+
+    @contextmanager
+    def transaction(self):
+        """
+        run the statements inside as a unit, committed once at the end, or
+        rolled back if any exception raised, nested transactions are kept
+        by savepoint and only the outermost one commits
+
+            with db.transaction():
+                db.push(...)
+                db.remove(...)
+
+        @return: context manager of transaction
+        """
+        depth = self.__depth
+        try:
+            if depth == 0:
+                if not self.__db.in_transaction:
+                    self.__db.execute("BEGIN")
+            else:
+                self.__db.execute(f"SAVEPOINT sp{depth}")
+        except sqlite3.Error as e_msg:
+            raise DBManagerError(f"cannot begin transaction: {str(e_msg)}") from e_msg
+
+        self.__depth += 1
+        try:
+            yield self
+        except BaseException:
+            self.__depth = depth
+            if depth == 0:
+                self.rollback()
+            else:
+                self.__db.execute(f"ROLLBACK TO sp{depth}")
+                self.__db.execute(f"RELEASE sp{depth}")
+            raise
+
+        self.__depth = depth
+        if depth == 0:
+            self.commit()
+        else:
+            self.__db.execute(f"RELEASE sp{depth}")
+
     def commit(self):
         """
         commit database change
@@ -136,6 +336,17 @@ class DBManager:
         except Exception as e_msg:
             raise DBManagerError("error occur when commit database") from e_msg
 
+    def rollback(self):
+        """
+        drop the database change since last commit
+
+        @return:
+        """
+        try:
+            self.__db.rollback()
+        except Exception as e_msg:
+            raise DBManagerError("error occur when rollback database") from e_msg
+
     def close(self):
         """
         close the database
@@ -147,16 +358,34 @@ class DBManager:
         except Exception as e_msg:
             raise DBManagerError("error occur when close database") from e_msg
 
-    def connect(self, db_dir):
+    def connect(
+        self,
+        db_dir,
+        journal_mode: str = "WAL",
+        synchronous: str = "NORMAL",
+        check_same_thread: bool = True,
+    ):
         """
         connect the database
 
         @param db_dir: database directory
+        @param journal_mode: journal mode of sqlite
+        @param synchronous: synchronous level of sqlite
+        @param check_same_thread: only allow the creating thread to use it
         @return:
         """
+        journal_mode = journal_mode.upper()
+        synchronous = synchronous.upper()
+        if journal_mode not in JOURNAL_MODES:
+            raise DBManagerError(f"unknown journal mode '{journal_mode}'")
+        if synchronous not in SYNCHRONOUS_LEVELS:
+            raise DBManagerError(f"unknown synchronous level '{synchronous}'")
+
         if not os.path.exists(db_dir):
             print(f"create new db: {db_dir} in: ")
         else:
             print(f"connect to db: {db_dir}")
-        self.__db = sqlite3.connect(db_dir)
+        self.__db = sqlite3.connect(db_dir, check_same_thread=check_same_thread)
+        self.__db.execute(f"PRAGMA journal_mode={journal_mode}")
+        self.__db.execute(f"PRAGMA synchronous={synchronous}")
         self.__cursor = self.__db.cursor()
@@ -21,6 +21,18 @@ class ProjectManagerError(Exception):
     """
 
 
+class BlobStoreError(Exception):
+    """
+    exception class for BlobStore
+    """
+
+
+class ThumbnailError(Exception):
+    """
+    exception class for ThumbnailCache
+    """
+
+
 class ConfigLoaderError(Exception):
     """
     exception class for ConfigLoader
@@ -27,7 +27,7 @@ def check_folder_valid(folder_dir: str) -> bool:
 
 def get_files_in_folder(folder_dir: str, suffix: str = "") -> list:
     """
-    get all files in folder
+    get all files in folder, hidden files (i.e. unfinished uploads) are skipped
 
     :param folder_dir: folder direction
     :param suffix: filter by suffix of files
@@ -35,7 +35,11 @@ def get_files_in_folder(folder_dir: str, suffix: str = "") -> list:
     """
     files = get_all_in_folder(folder_dir)
     if len(files) != 0:
-        files = [f for f in files if os.path.isfile(folder_dir + "/" + f)]
+        files = [
+            f
+            for f in files
+            if not f.startswith(".") and os.path.isfile(folder_dir + "/" + f)
+        ]
         if len(suffix) != 0:
             files = [f for f in files if get_ext(f) == "." + suffix]
     return files
@@ -43,14 +47,18 @@ def get_files_in_folder(folder_dir: str, suffix: str = "") -> list:
 
 def get_folders_in_folder(folder_dir: str) -> list:
     """
-    get all folders in folder
+    get all folders in folder, hidden folders (i.e. blob store) are skipped
 
     :param folder_dir: folder direction
     :return: the list of files under folder
     """
     folders = get_all_in_folder(folder_dir)
     if len(folders) != 0:
-        folders = [f for f in folders if os.path.isdir(folder_dir + "/" + f)]
+        folders = [
+            f
+            for f in folders
+            if not f.startswith(".") and os.path.isdir(folder_dir + "/" + f)
+        ]
     return folders
 
 
@@ -0,0 +1,162 @@
+"""
+utils for serving files over http, with validators for conditional requests
+and byte ranges
+
+"""
+import os
+from email.utils import formatdate, parsedate_to_datetime
+from mimetypes import guess_type
+from typing import Mapping, Optional
+
+from starlette.responses import FileResponse, Response, StreamingResponse
+
+RANGE_CHUNK_SIZE = 64 * 1024
+
+
+def file_etag(stat_result: os.stat_result) -> str:
+    """
+    strong entity tag derived from the metadata of file, changes whenever
+    the file is rewritten
+
+    @param stat_result: stat of file
+    @return: quoted entity tag
+
+    """
+    return f'"{stat_result.st_mtime_ns:x}-{stat_result.st_size:x}"'
+
+
+def check_not_modified(
+    request_headers: Mapping[str, str], etag: str, last_modified: float
+) -> bool:
+    """
+    check if the copy held by client is still fresh, If-None-Match takes
+    precedence over If-Modified-Since
+
+    @param request_headers: headers of request
+    @param etag: entity tag of file
+    @param last_modified: modify time of file
+    @return: not modified or not
+
+    """
+    if_none_match = request_headers.get("if-none-match")
+    if if_none_match is not None:
+        if if_none_match.strip() == "*":
+            return True
+        tags = [i.strip().removeprefix("W/") for i in if_none_match.split(",")]
+        return etag in tags
+
+    if_modified_since = request_headers.get("if-modified-since")
+    if if_modified_since is not None:
+        try:
+            since = parsedate_to_datetime(if_modified_since).timestamp()
+        except (TypeError, ValueError):
+            return False
+        return int(last_modified) <= since
+
+    return False
+
+
+def parse_range(range_header: str, size: int) -> Optional[tuple[int, int]]:
+    """
+    parse a single byte range, multiple ranges are not supported and
+    ignored so the whole file will be sent
+
+    @param range_header: value of Range header
+    @param size: size of file
+    @return: first and last byte position (inclusive), none for whole file
+    @raise ValueError: the range cannot be satisfied
+
+    """
+    unit, _, ranges = range_header.partition("=")
+    if unit.strip().lower() != "bytes" or "," in ranges:
+        return None
+
+    start, sep, end = [i.strip() for i in ranges.partition("-")]
+    if sep == "" or start == end == "":
+        return None
+    if not (start == "" or start.isdigit()) or not (end == "" or end.isdigit()):
+        return None
+    if start != "" and end != "" and int(end) < int(start):
+        return None
+
+    if start == "":
+        # suffix range, the last n bytes
+        if int(end) == 0 or size == 0:
+            raise ValueError(f"range {range_header} out of file size {size}")
+        return max(size - int(end), 0), size - 1
+
+    first = int(start)
+    if first >= size:
+        raise ValueError(f"range {range_header} out of file size {size}")
+    last = size - 1 if end == "" else min(int(end), size - 1)
+    return first, last
+
+
+def _iter_file(path: str, first: int, last: int):
+    """
+    read the byte range of file chunk by chunk
+
+    @param path: file path
+    @param first: first byte position
+    @param last: last byte position (inclusive)
+
+    """
+    with open(path, "rb") as f:
+        f.seek(first)
+        remain = last - first + 1
+        while remain > 0:
+            chunk = f.read(min(RANGE_CHUNK_SIZE, remain))
+            if not chunk:
+                break
+            remain -= len(chunk)
+            yield chunk
+
+
+def file_response(
+    path: str, request_headers: Mapping[str, str], cache_control: str = "no-cache"
+) -> Response:
+    """
+    response for the file, answer 304 for fresh copy held by client
+    and 206 for byte range request
+
+    @param path: file path
+    @param request_headers: headers of request
+    @param cache_control: value of Cache-Control header
+    @return: response
+
+    """
+    stat_result = os.stat(path)
+    etag = file_etag(stat_result)
+    headers = {
+        "etag": etag,
+        "last-modified": formatdate(stat_result.st_mtime, usegmt=True),
+        "cache-control": cache_control,
+        "accept-ranges": "bytes",
+    }
+
+    if check_not_modified(request_headers, etag, stat_result.st_mtime):
+        return Response(status_code=304, headers=headers)
+
+    range_header = request_headers.get("range")
+    if_range = request_headers.get("if-range")
+    if range_header is not None and (if_range is None or if_range.strip() == etag):
+        size = stat_result.st_size
+        try:
+            byte_range = parse_range(range_header, size)
+        except ValueError:
+            headers["content-range"] = f"bytes */{size}"
+            return Response(status_code=416, headers=headers)
+
+        if byte_range is not None:
+            first, last = byte_range
+            headers["content-range"] = f"bytes {first}-{last}/{size}"
+            headers["content-length"] = str(last - first + 1)
+            media_type = guess_type(path)[0] or "application/octet-stream"
+            return StreamingResponse(
+                _iter_file(path, first, last),
+                status_code=206,
+                headers=headers,
+                media_type=media_type,
+            )
+
+    return FileResponse(path, headers=headers, stat_result=stat_result)
@@ -33,3 +33,15 @@ class ReturnDict(ReturnStatus):
     """
 
     content: Optional[dict]
+
+
+def encode_reply(content: bytes) -> bytes:
+    """
+    wrap the content already encoded as json into an ok reply, the same as
+    the reply encoded by fastapi
+
+    @param content: json of content
+    @return: json of reply
+
+    """
+    return b'{"status":%d,"msg":"ok","content":%b}' % (StatusCode.OK.value, content)
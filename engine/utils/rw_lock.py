@@ -0,0 +1,115 @@
+"""
+reader/writer lock
+
+"""
+import asyncio
+import threading
+from contextlib import asynccontextmanager, contextmanager
+
+
+class ReadWriteLock:
+    """
+    lock allowing many readers or a single writer at the same time,
+    waiting writers block new readers so writers will not starve
+
+    """
+
+    def __init__(self):
+        self.__condition = threading.Condition()
+        self.__readers: int = 0  # amount of readers holding the lock
+        self.__writer: bool = False  # if a writer holding the lock
+        self.__writers_waiting: int = 0
+
+    @contextmanager
+    def read(self):
+        """
+        hold the lock as reader
+
+        """
+        with self.__condition:
+            while self.__writer or self.__writers_waiting > 0:
+                self.__condition.wait()
+            self.__readers += 1
+        try:
+            yield
+        finally:
+            with self.__condition:
+                self.__readers -= 1
+                if self.__readers == 0:
+                    self.__condition.notify_all()
+
+    @contextmanager
+    def write(self):
+        """
+        hold the lock as writer
+
+        """
+        with self.__condition:
+            self.__writers_waiting += 1
+            while self.__writer or self.__readers > 0:
+                self.__condition.wait()
+            self.__writers_waiting -= 1
+            self.__writer = True
+        try:
+            yield
+        finally:
+            with self.__condition:
+                self.__writer = False
+                self.__condition.notify_all()
+
+
+class AsyncReadWriteLock:
+    """
+    the same lock as ReadWriteLock for coroutines, waiting is done in the
+    event loop instead of blocking a thread
+
+    """
+
+    def __init__(self):
+        self.__condition = asyncio.Condition()
+        self.__readers: int = 0  # amount of readers holding the lock
+        self.__writer: bool = False  # if a writer holding the lock
+        self.__writers_waiting: int = 0
+
+    @asynccontextmanager
+    async def read(self):
+        """
+        hold the lock as reader
+
+        """
+        async with self.__condition:
+            while self.__writer or self.__writers_waiting > 0:
+                await self.__condition.wait()
+            self.__readers += 1
+        try:
+            yield
+        finally:
+            async with self.__condition:
+                self.__readers -= 1
+                if self.__readers == 0:
+                    self.__condition.notify_all()
+
+    @asynccontextmanager
+    async def write(self):
+        """
+        hold the lock as writer
+
+        """
+        async with self.__condition:
+            self.__writers_waiting += 1
+            try:
+                while self.__writer or self.__readers > 0:
+                    await self.__condition.wait()
+            except asyncio.CancelledError:
+                # the request is gone, let the readers blocked by it go on
+                self.__writers_waiting -= 1
+                self.__condition.notify_all()
+                raise
+            self.__writers_waiting -= 1
+            self.__writer = True
+        try:
+            yield
+        finally:
+            async with self.__condition:
+                self.__writer = False
+                self.__condition.notify_all()
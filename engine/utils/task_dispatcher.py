@@ -0,0 +1,126 @@
+"""
+dispatch blocking work off the event loop
+
+"""
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Callable, Optional
+
+from utils.rw_lock import AsyncReadWriteLock
+
+
+class TaskDispatcher:
+    """
+    run blocking work in a bounded thread pool, work is grouped by key
+    (i.e. task id) for metrics, the controllers guard each task with its own
+    reader/writer lock so reading work on the same task runs in parallel
+
+    work marked as task reader or writer waits for the lock of its key in
+    the event loop before it is handed to a thread, so a thread is never
+    held by work waiting for the other work on the same task
+
+    """
+
+    def __init__(self, max_workers: int):
+        """
+        constructor for task dispatcher
+
+        @param max_workers: max amount of threads to run blocking work
+
+        """
+        self.__max_workers = max_workers
+        self.__executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="dispatcher"
+        )
+        self.__queue_depth: dict[str, int] = {}  # {key: amount of work not finished}
+        self.__gates: dict[str, AsyncReadWriteLock] = {}  # {key: lock of key}
+        self.__submitted: int = 0  # work handed to thread pool but not finished
+        self.__completed: int = 0
+        self.__running: int = 0  # work being run by a thread
+        self.__running_lock = threading.Lock()
+
+    async def run(self, key: Optional[str], func: Callable, *args, **kwargs):
+        """
+        run the function in thread pool and wait for the result
+
+        @param key: key to group the work, none for no group
+        @param func: blocking function to be called
+        @return: the result of function
+
+        """
+        self.__queue_depth[key] = self.__queue_depth.get(key, 0) + 1
+        try:
+            work = partial(func, *args, **kwargs)
+            access = getattr(func, "task_access", None)
+            if key is None or access is None:
+                return await self.__submit(work)
+
+            gate = self.__gates.setdefault(key, AsyncReadWriteLock())
+            async with getattr(gate, access)():
+                return await self.__submit(work)
+        finally:
+            self.__queue_depth[key] -= 1
+            if self.__queue_depth[key] == 0:
+                # no work holding or waiting for the lock of key
+                self.__queue_depth.pop(key)
+                self.__gates.pop(key, None)
+
+    async def __submit(self, work: Callable):
+        """
+        hand the work to thread pool
+
+        @param work: the work to run
+        @return: the result of work
+
+        """
+        self.__submitted += 1
+        try:
+            return await asyncio.get_running_loop().run_in_executor(
+                self.__executor, partial(self.__work, work)
+            )
+        finally:
+            self.__submitted -= 1
+            self.__completed += 1
+
+    def __work(self, work: Callable):
+        """
+        run the work in thread, counting the running work
+
+        @param work: the work to run
+        @return: the result of work
+
+        """
+        with self.__running_lock:
+            self.__running += 1
+        try:
+            return work()
+        finally:
+            with self.__running_lock:
+                self.__running -= 1
+
+    def metrics(self) -> dict:
+        """
+        get the metrics of dispatcher
+
+        @return: metrics
+
+        """
+        return {
+            "max_workers": self.__max_workers,
+            "submitted": self.__submitted,
+            "running": self.__running,
+            "waiting": self.__submitted - self.__running,
+            "completed": self.__completed,
+            "queue_depth": {
+                str(key): depth for key, depth in self.__queue_depth.items()
+            },
+        }
+
+    def shutdown(self):
+        """
+        wait for the submitted work and stop the thread pool
+
+        """
+        self.__executor.shutdown(wait=True)